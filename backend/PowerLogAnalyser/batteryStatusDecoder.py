@@ -1,71 +1,94 @@
 import os, json, re
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
+from .bitfield_decoder import decoder_for
+from .bitdefs_registry import registry as bitdefs_registry
 from backend.config import OPENAI_API_KEY, OPENAI_BASE_URL
 
+LLM_MODEL = "deepseek/deepseek-r1-0528-qwen3-8b:free"  # new version needs eplacement with finetuned model Qwen,,,
+
 class BatteryStatusSummarizer:
-    def __init__(self, client: OpenAI, bitdef_path: str, cache_file: str = "RAG_DATA/battStatus_cache.json"):
+    def __init__(self, client: OpenAI, bitdef_path: str, cache_file: str = "RAG_DATA/battStatus_cache.json",
+                 max_concurrency: int = 4, max_retries: int = 3, backoff_seconds: float = 1.0):
+        """
+        max_concurrency: number of LLM calls in flight at once (1 = sequential).
+        max_retries / backoff_seconds: retries per LLM call, with exponential backoff and jitter.
+        """
         self.client = client
         self.bitdef_path = bitdef_path
         self.cache_file = cache_file
+        self.cache_log_file = cache_file + ".log"
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self._cache_lock = threading.Lock()
         self.status_cache = self._load_cache()
 
     def _load_cache(self):
+        """
+        The cache is a JSON snapshot plus an append-only log of entries added since, one JSON
+        object per line. Later log entries win.
+        """
+        cache = {}
         if os.path.exists(self.cache_file):
             with open(self.cache_file, "r") as f:
-                return json.load(f)
-        return {}
+                cache = json.load(f)
+        if os.path.exists(self.cache_log_file):
+            with open(self.cache_log_file, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn final line from an interrupted write
+                    cache[entry["hex"]] = entry["explanation"]
+        return cache
+
+    def _save_cache_entry(self, hex_val, explanation):
+        with self._cache_lock:
+            self.status_cache[hex_val] = explanation
+            with open(self.cache_log_file, "a") as f:
+                f.write(json.dumps({"hex": hex_val, "explanation": explanation}) + "\n")
 
     def _save_cache(self):
-        with open(self.cache_file, "w") as f:
-            json.dump(self.status_cache, f, indent=2)
+        """Compacts the append log into the JSON snapshot."""
+        with self._cache_lock:
+            if not os.path.exists(self.cache_log_file):
+                return  # nothing added since the last snapshot
+            tmp_file = self.cache_file + ".tmp"
+            with open(tmp_file, "w") as f:
+                json.dump(self.status_cache, f, indent=2)
+            os.replace(tmp_file, self.cache_file)
+            os.remove(self.cache_log_file)
 
     def load_bit_defs(self):
-        namespace = {}
-        with open(self.bitdef_path, "r") as f:
-            exec(f.read(), {}, namespace)
-        return namespace["bit_defs"]
+        return bitdefs_registry.get(os.path.abspath(self.bitdef_path), "bit_defs")
 
     @staticmethod
     def decode_hex_status(hex_status: str, bit_defs: dict):
         """
         Decodes a hex status string. Handles multiple space-separated hex values.......
         Only shows bits that are set to 1 (active).
+        Decoding goes through lookup tables built once per bit_defs (see bitfield_decoder.py).
         """
-        if not hex_status:
-            return ["Empty value"]
-
-        decoded = []
-        hex_parts = hex_status.strip().split()
+        return decoder_for(bit_defs).decode_hex_status(hex_status)
 
-        for part in hex_parts:
+    def _call_llm(self, messages, temperature):
+        """Chat completion with retries and exponential backoff; raises the last error."""
+        for attempt in range(self.max_retries + 1):
             try:
-                val = int(part, 16)
-            except ValueError:
-                decoded.append(f"Invalid hex: {part}")
-                continue
-
-            active_bits = []
-
-            # Decode bits 15 to 4 (show only if set to 1)
-            for bit in range(15, 4, -1):
-                if ((val >> bit) & 1) == 1:
-                    bit_info = bit_defs.get(bit)
-                    if bit_info:
-                        active_bits.append(f"Bit {bit} ({bit_info['name']}): {bit_info['description']}")
-
-            # Always decode 4-bit error code (Bits 3-0)
-            error_code_val = val & 0x0F
-            error_desc = bit_defs.get("error_code", {}).get(error_code_val, "Unknown error code")
-            active_bits.append(f"Bits 3-0 (Error Code): 0x{error_code_val:01X} → {error_desc}")
-
-            if active_bits:
-                decoded.append(f"{part} → " + " | ".join(active_bits))
-            else:
-                decoded.append(f"{part} → No active bits")
-
-        return decoded
-
-    
+                response = self.client.chat.completions.create(
+                    model=LLM_MODEL,
+                    messages=messages,
+                    temperature=temperature
+                )
+                return response.choices[0].message.content.strip()
+            except Exception:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self.backoff_seconds * (2 ** attempt) * (1 + random.random()))
 
     def _explain_status_with_llm(self, decoded_status: str):
         prompt = f"""You are a battery status bitfield decoder for embedded medical devices.
@@ -74,75 +97,80 @@ Using the below information provided give a short operational conclusion.
 hex_summary: {decoded_status}
 """
         try:
-            response = self.client.chat.completions.create(
-                model="deepseek/deepseek-r1-0528-qwen3-8b:free",  # new version needs eplacement with finetuned model Qwen,,,
-                messages=[
+            return self._call_llm([
                     {"role": "system", "content": "You are a technical expert in embedded systems, batteries, and register decoding. Always explain your reasoning clearly."},
                     {"role": "user", "content": prompt}
-                ],
-                temperature=0.5
-            )
-            return response.choices[0].message.content.strip()
+                ], temperature=0.5)
         except Exception as e:
             return f"LLM Error: {str(e)}"
 
+    def _summarize_chunk_with_llm(self, summary_texts):
+        try:
+            final_prompt = f"Summarize the battery status for the following time chunks in short:\n{summary_texts}"
+            return self._call_llm([
+                    {"role": "system", "content": "You are a technical expert in embedded systems, batteries, and register decoding."},
+                    {"role": "user", "content": final_prompt}
+                ], temperature=0.5)
+        except Exception as e:
+            return f"Summary LLM error: {str(e)}"
+
     def _remove_duplicates(self, items):
         seen = set()
         return [x for x in items if not (x in seen or seen.add(x))]
 
+    def _explain_and_cache(self, hex_val, bit_defs):
+        decoded = "\n".join(self.decode_hex_status(hex_val, bit_defs))
+        explanation = self._explain_status_with_llm(decoded)
+        if not explanation.startswith("LLM Error:"):
+            self._save_cache_entry(hex_val, explanation)
+        return hex_val, explanation
+
     def summarize_chunks(self, chunk_file: str, output_file: str = "PowerLogSummary.json"):
         with open(chunk_file) as f:
             chunks = json.load(f)
 
         bit_defs = self.load_bit_defs()
-        batt_summary = {"battStatus_Summary": []}
 
+        chunk_ids = []
+        chunk_statuses = []
         for chunk in chunks:
-            chunk_id = chunk.get("ChunkID", "Unknown")
             raw_status = chunk.get("BattStatus", [])
-
             # Normalize input
             status_list = [raw_status] if isinstance(raw_status, str) else (raw_status or [])
-            status_list = self._remove_duplicates(status_list)
-
-            summary_texts = []
-
-            for hex_val in status_list:
-                if hex_val in self.status_cache:
-                    explanation = self.status_cache[hex_val]
-                else:
-                    decoded = "\n".join(self.decode_hex_status(hex_val, bit_defs))
-                    explanation = self._explain_status_with_llm(decoded)
-                    self.status_cache[hex_val] = explanation
-                    self._save_cache()
-                summary_texts.append(explanation)
-
-            # Final chunk-level summarization via LLM
-            try:
-                final_prompt = f"Summarize the battery status for the following time chunks in short:\n{summary_texts}"
-                response = self.client.chat.completions.create(
-                    model="deepseek/deepseek-r1-0528-qwen3-8b:free",
-                    messages=[
-                        {"role": "system", "content": "You are a technical expert in embedded systems, batteries, and register decoding."},
-                        {"role": "user", "content": final_prompt}
-                    ],
-                    temperature=0.5
-                )
-                chunk_summary = response.choices[0].message.content.strip()
-            except Exception as e:
-                chunk_summary = f"Summary LLM error: {str(e)}"
+            chunk_ids.append(chunk.get("ChunkID", "Unknown"))
+            chunk_statuses.append(self._remove_duplicates(status_list))
+
+        # Every distinct hex value across all chunks is explained once, before any chunk summary
+        all_hex_values = self._remove_duplicates([h for statuses in chunk_statuses for h in statuses])
+        missing = [h for h in all_hex_values if h not in self.status_cache]
+        explanations = {h: self.status_cache[h] for h in all_hex_values if h in self.status_cache}
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            for hex_val, explanation in pool.map(lambda h: self._explain_and_cache(h, bit_defs), missing):
+                explanations[hex_val] = explanation
+
+            # Final chunk-level summarization via LLM, results kept in chunk order
+            chunk_summaries = pool.map(
+                lambda statuses: self._summarize_chunk_with_llm([explanations[h] for h in statuses]),
+                chunk_statuses
+            )
 
-            batt_summary["battStatus_Summary"].append({
-                "ChunkID": chunk_id,
-                "BattStatus": status_list,
-                "Summary": chunk_summary
-            })
-            print(f" Chunk {chunk_id} processed.")
+            batt_summary = {"battStatus_Summary": []}
+            for chunk_id, status_list, chunk_summary in zip(chunk_ids, chunk_statuses, chunk_summaries):
+                batt_summary["battStatus_Summary"].append({
+                    "ChunkID": chunk_id,
+                    "BattStatus": status_list,
+                    "Summary": chunk_summary
+                })
+                print(f" Chunk {chunk_id} processed.")
 
         with open(output_file, "w") as f:
             json.dump(batt_summary, f, indent=2)
         print(f" {output_file} created successfully.")
 
+        # The log only needs to outlive a run that is interrupted before this point
+        self._save_cache()
+
 
 
 if __name__ == "__main__":
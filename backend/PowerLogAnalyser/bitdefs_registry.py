@@ -0,0 +1,109 @@
+import os
+import ast
+import json
+import hashlib
+import threading
+from .bitfield_decoder import BitfieldDecoder
+
+"""
+Shared, in-process registry of the RAG_DATA/BitsDef register definitions.
+
+Each definition file is parsed once with ast.literal_eval (the files are plain dict literals,
+so nothing in them is executed) and cached together with its decode tables. Entries are keyed
+by file mtime and size, so an edited file is picked up on the next lookup without a restart.
+Returned definitions are shared between callers and must be treated as read-only.
+"""
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+# Register name -> (definition file relative to the project root, variable defined in it)
+REGISTER_FILES = {
+    "BattStatus": ("RAG_DATA/BitsDef/BatteryStatus.txt", "bit_defs"),
+    "ChgrStatus": ("RAG_DATA/BitsDef/ChargerStatus.txt", "charging_status_bit_defs"),
+    "OperationalStatus": ("RAG_DATA/BitsDef/OperationalStatus.txt", "operational_status_bit_defs"),
+    "GaugeStatus": ("RAG_DATA/BitsDef/GaugeStatus.txt", "gauging_status_bit_defs"),
+    "PFStatus": ("RAG_DATA/BitsDef/ProtectionFaultStatus.txt", "pf_status_bit_defs"),
+    "PFAlert": ("RAG_DATA/BitsDef/ProtectionFaultAlert.txt", "pf_alert_bit_defs"),
+    "SafetyStatus": ("RAG_DATA/BitsDef/SafetyStatus.txt", "safety_status_bit_defs"),
+    "SafetyAlert": ("RAG_DATA/BitsDef/SafetyAlert.txt", "safety_alert_bit_defs"),
+}
+
+
+def parse_definition_file(path):
+    """Returns the top-level NAME = <literal> assignments of a definition file."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    values = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            try:
+                values[node.targets[0].id] = ast.literal_eval(node.value)
+            except ValueError as e:
+                raise ValueError(f"{path}: {node.targets[0].id} is not a plain literal ({e})") from None
+    return values
+
+
+class BitDefsRegistry:
+    def __init__(self, project_root=PROJECT_ROOT, register_files=REGISTER_FILES):
+        self.project_root = project_root
+        self.register_files = register_files
+        self._files = {}  # absolute path -> (stamp, values, {bit_key: decoder})
+        self._payloads = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, path):
+        return path if os.path.isabs(path) else os.path.join(self.project_root, path)
+
+    def _entry(self, path):
+        path = self.resolve(path)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._files.get(path)
+            if entry is None or entry[0] != stamp:
+                entry = (stamp, parse_definition_file(path), {})
+                self._files[path] = entry
+            return entry
+
+    def get(self, path, bit_key):
+        """Definition dict `bit_key` from the file at `path` (absolute or project-relative)."""
+        return self._entry(path)[1][bit_key]
+
+    def decoder(self, path, bit_key):
+        """Decode tables for a definition, built once per version of the file."""
+        _, values, decoders = self._entry(path)
+        with self._lock:
+            if bit_key not in decoders:
+                decoders[bit_key] = BitfieldDecoder(values[bit_key])
+            return decoders[bit_key]
+
+    def bitfields(self):
+        """Register name -> definition dict for all known status registers."""
+        return {name: self.get(path, key) for name, (path, key) in self.register_files.items()}
+
+    def decoders(self):
+        return {name: self.decoder(path, key) for name, (path, key) in self.register_files.items()}
+
+    def version(self):
+        """Changes whenever any register definition file changes."""
+        return tuple(self._entry(path)[0] for path, _ in self.register_files.values())
+
+    def json_payload(self, name, build):
+        """
+        Serialized JSON of build() plus its ETag, rebuilt only when a definition file changes.
+        Keys are not sorted: definitions mix int bit numbers and str keys.
+        """
+        version = self.version()
+        with self._lock:
+            cached = self._payloads.get(name)
+            if cached and cached[0] == version:
+                return cached[1], cached[2]
+        body = json.dumps(build(), ensure_ascii=False).encode("utf-8")
+        etag = hashlib.sha1(body).hexdigest()
+        with self._lock:
+            self._payloads[name] = (version, body, etag)
+        return body, etag
+
+
+registry = BitDefsRegistry()
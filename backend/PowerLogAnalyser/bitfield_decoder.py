@@ -0,0 +1,101 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+
+"""
+Table-driven decoding of status register values.
+
+decode_hex_status reports bits 15..5 by name and bits 3..0 as an error code, so a decoded
+value depends only on its low 16 bits. A BitfieldDecoder precomputes, once per register
+definition, the text for every combination of bits 15..5 (2048 entries) and for every error
+code (16 entries). The full decode of a 16-bit value is then assembled from two lookups and
+memoized in a 65,536-entry table, so each value is only ever assembled once.
+"""
+
+TABLE_SIZE = 1 << 16
+HIGH_SHIFT = 5
+_HIGH_BITS = range(15, 4, -1)
+
+
+class BitfieldDecoder:
+    def __init__(self, bit_defs):
+        self.bit_defs = bit_defs
+        bit_texts = {}
+        for bit in _HIGH_BITS:
+            bit_info = bit_defs.get(bit)
+            if bit_info:
+                bit_texts[bit] = f"Bit {bit} ({bit_info['name']}): {bit_info['description']}"
+
+        # Text for bits 15..5, indexed by value >> 5
+        self._high = []
+        for high in range(TABLE_SIZE >> HIGH_SHIFT):
+            value = high << HIGH_SHIFT
+            self._high.append(" | ".join(
+                bit_texts[bit] for bit in _HIGH_BITS if bit in bit_texts and (value >> bit) & 1
+            ))
+
+        error_codes = bit_defs.get("error_code", {})
+        self._error = [
+            f"Bits 3-0 (Error Code): 0x{code:01X} → {error_codes.get(code, 'Unknown error code')}"
+            for code in range(16)
+        ]
+        self._table = [None] * TABLE_SIZE
+
+    def describe(self, value):
+        """Active-bit text for a register value, without the leading hex spelling."""
+        value &= 0xFFFF
+        text = self._table[value]
+        if text is None:
+            high = self._high[value >> HIGH_SHIFT]
+            error = self._error[value & 0x0F]
+            text = f"{high} | {error}" if high else error
+            self._table[value] = text
+        return text
+
+    def decode_hex_status(self, hex_status):
+        """Same output as BatteryStatusSummarizer.decode_hex_status."""
+        if not hex_status:
+            return ["Empty value"]
+
+        decoded = []
+        for part in hex_status.strip().split():
+            try:
+                val = int(part, 16)
+            except ValueError:
+                decoded.append(f"Invalid hex: {part}")
+                continue
+            decoded.append(f"{part} → {self.describe(val)}")
+        return decoded
+
+    def decode_column(self, values):
+        """
+        Decodes an array of register values (e.g. BitfieldColumn.to_numpy()) at once.
+        Returns an object array holding each row's active-bit text.
+        """
+        values = np.asarray(values).astype(np.int64, copy=False) & 0xFFFF
+        unique, inverse = np.unique(values, return_inverse=True)
+        texts = np.array([self.describe(int(v)) for v in unique], dtype=object)
+        return texts[inverse.reshape(values.shape)]
+
+
+_MAX_SHARED_DECODERS = 32
+_decoders = OrderedDict()
+_decoders_lock = threading.Lock()
+
+
+def decoder_for(bit_defs):
+    """
+    Returns the shared decoder for a loaded definition dict, building its tables on first use.
+    Definitions are treated as immutable once loaded.
+    """
+    key = id(bit_defs)
+    with _decoders_lock:
+        entry = _decoders.get(key)
+        # The dict is kept alive by the entry, so its id can't be reused while cached
+        if entry is None or entry[0] is not bit_defs:
+            entry = (bit_defs, BitfieldDecoder(bit_defs))
+            _decoders[key] = entry
+            while len(_decoders) > _MAX_SHARED_DECODERS:
+                _decoders.popitem(last=False)
+        _decoders.move_to_end(key)
+        return entry[1]
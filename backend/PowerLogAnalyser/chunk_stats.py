@@ -0,0 +1,261 @@
+import csv
+import warnings
+import numpy as np
+
+"""
+Vectorized per-chunk statistics for the numeric power log parameters.
+
+For every chunk, all numeric parameters found in the parameter definitions are stacked
+into one rows x parameters float matrix (unparseable entries as NaN). Min, max, mean,
+std, percentiles, out-of-range counts and time-in-violation are then computed for all
+parameters at once. The result is a list of flat records, one per (chunk, parameter).
+The text report, the stats CSV and the /get_chunk_stats endpoint all read these records
+instead of recomputing anything.
+"""
+
+PERCENTILES = (5, 50, 95)
+
+STAT_FIELDS = [
+    "ChunkID", "Parameter", "Unit", "Rows", "Count",
+    "Min", "Max", "Mean", "Std", "P5", "P50", "P95",
+    "ExpectedMin", "ExpectedMax", "BelowMin", "AboveMax", "ViolationSeconds",
+]
+
+
+def numeric_rows(values):
+    """
+    Converts a chunk column (typed column buffer, NumPy array, list or scalar) into a
+    float64 array with one entry per row; entries that aren't numbers become NaN.
+    """
+    if hasattr(values, "to_numpy"):
+        return values.to_numpy().astype(np.float64, copy=False)
+
+    arr = np.asarray(values if isinstance(values, (list, np.ndarray)) else [values])
+    if arr.dtype.kind not in "iuf":
+        # Legacy chunks store strings; keep the original "plain decimal" acceptance rule
+        arr = np.array(
+            [float(v) if str(v).replace('.', '', 1).lstrip('-').isdigit() else np.nan for v in arr.tolist()],
+            dtype=np.float64,
+        )
+    return arr.astype(np.float64, copy=False)
+
+
+def row_times(chunk):
+    """Per-row timestamps of a chunk as int64 epoch seconds, or None if the chunk has none."""
+    series = chunk.get("Perc_Time_Series")
+    if hasattr(series, "times"):
+        return series.times.to_numpy()
+    if isinstance(series, list) and series:
+        try:
+            return np.array([item["time"] for item in series], dtype="datetime64[s]").astype(np.int64)
+        except (KeyError, TypeError, ValueError):
+            return None
+    return None
+
+
+def _is_scalar(values):
+    return not isinstance(values, (list, np.ndarray)) and not hasattr(values, "to_numpy")
+
+
+def _none_if_nan(value):
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def _nan_percentiles(matrix, counts):
+    """
+    Row-wise percentiles ignoring NaN, same values as np.nanpercentile's default linear method,
+    from a single sort of the matrix (nanpercentile falls back to a per-row Python loop).
+    """
+    ordered = np.sort(matrix, axis=1)  # NaN sorts last
+    last = np.maximum(counts - 1, 0)
+    rows = np.arange(matrix.shape[0])
+    result = np.empty((len(PERCENTILES), matrix.shape[0]))
+    for i, q in enumerate(PERCENTILES):
+        position = last * (q / 100)
+        below = np.floor(position).astype(np.int64)
+        above = np.minimum(below + 1, last)
+        t = position - below
+        a = ordered[rows, below]
+        b = ordered[rows, above]
+        diff = b - a
+        # numpy's _lerp: interpolate from whichever end is closer
+        result[i] = np.where(t >= 0.5, b - diff * (1 - t), a + diff * t)
+    result[:, counts == 0] = np.nan
+    return result
+
+
+def compute_chunk_stats(chunk, param_defs):
+    """Returns one stats record per numeric parameter of the chunk, in chunk field order."""
+    names = [
+        name for name in chunk
+        if name in param_defs and param_defs[name].get("type") != "bitfield"
+    ]
+    if not names:
+        return []
+
+    times = row_times(chunk)
+    n_rows = len(times) if times is not None else None
+
+    columns = []
+    for name in names:
+        values = chunk[name]
+        try:
+            if _is_scalar(values) and n_rows:
+                # Constant columns are stored as a single value for the whole chunk
+                column = np.full(n_rows, numeric_rows(values)[0])
+            else:
+                column = numeric_rows(values)
+        except (TypeError, ValueError):
+            column = None
+        columns.append(column)
+
+    width = max((len(c) for c in columns if c is not None), default=0)
+    matrix = np.full((len(names), width), np.nan)
+    for i, column in enumerate(columns):
+        if column is not None:
+            matrix[i, :len(column)] = column
+
+    mins = np.array([param_defs[name].get("min", -np.inf) for name in names], dtype=np.float64)
+    maxs = np.array([param_defs[name].get("max", np.inf) for name in names], dtype=np.float64)
+
+    valid = ~np.isnan(matrix)
+    counts = valid.sum(axis=1)
+    below = matrix < mins[:, None]
+    above = matrix > maxs[:, None]
+
+    with warnings.catch_warnings():
+        # Parameters without a single valid entry produce all-NaN rows
+        warnings.simplefilter("ignore", RuntimeWarning)
+        stat_min = np.nanmin(matrix, axis=1) if width else np.full(len(names), np.nan)
+        stat_max = np.nanmax(matrix, axis=1) if width else np.full(len(names), np.nan)
+        stat_mean = np.nanmean(matrix, axis=1) if width else np.full(len(names), np.nan)
+        stat_std = np.nanstd(matrix, axis=1) if width else np.full(len(names), np.nan)
+        stat_pct = (_nan_percentiles(matrix, counts) if width
+                    else np.full((len(PERCENTILES), len(names)), np.nan))
+
+    # Each row lasts until the next row's timestamp; the last row has no measurable duration
+    durations = None
+    if n_rows:
+        durations = np.append(np.diff(times), 0).clip(min=0)
+
+    records = []
+    for i, name in enumerate(names):
+        param = param_defs[name]
+        violation_seconds = None
+        if durations is not None and columns[i] is not None and len(columns[i]) == n_rows:
+            violation_seconds = int(durations[below[i, :n_rows] | above[i, :n_rows]].sum())
+        records.append({
+            "ChunkID": chunk.get("ChunkID"),
+            "Parameter": name,
+            "Unit": param.get("unit", ""),
+            "Rows": None if columns[i] is None else len(columns[i]),
+            "Count": None if columns[i] is None else int(counts[i]),
+            "Min": _none_if_nan(stat_min[i]),
+            "Max": _none_if_nan(stat_max[i]),
+            "Mean": _none_if_nan(stat_mean[i]),
+            "Std": _none_if_nan(stat_std[i]),
+            "P5": _none_if_nan(stat_pct[0][i]),
+            "P50": _none_if_nan(stat_pct[1][i]),
+            "P95": _none_if_nan(stat_pct[2][i]),
+            "ExpectedMin": param.get("min"),
+            "ExpectedMax": param.get("max"),
+            "BelowMin": int(below[i].sum()),
+            "AboveMax": int(above[i].sum()),
+            "ViolationSeconds": violation_seconds,
+        })
+    return records
+
+
+def render_numeric_stats(record):
+    """The report line for one parameter, in the format analyze_numeric_param always produced."""
+    name = record["Parameter"]
+    if record["Count"] is None:
+        return f"{name}: Invalid data format"
+    if record["Rows"] == 0:
+        return f"{name}: No data available"
+    if record["Count"] == 0:
+        return f"{name}: No valid numeric entries"
+
+    unit = record["Unit"]
+    defined_min = record["ExpectedMin"] if record["ExpectedMin"] is not None else float('-inf')
+    defined_max = record["ExpectedMax"] if record["ExpectedMax"] is not None else float('inf')
+    min_val = record["Min"]
+    max_val = record["Max"]
+    avg_val = round(record["Mean"], 2)
+
+    summary_parts = []
+
+    # Special case: data is all zero  symbols are added for better readability
+    if min_val == 0 and max_val == 0:
+        summary_parts.append(f"min={min_val}❗")
+        summary_parts.append(f"max={max_val}❗")
+        summary_parts.append(f"avg={avg_val}❗")
+        note = " (⚠️ Data may be missing or uninitialized)"
+    else:
+        summary_parts.append(f"min={min_val}⚠️" if min_val < defined_min else f"min={min_val}")
+        summary_parts.append(f"max={max_val}⚠️" if max_val > defined_max else f"max={max_val}")
+        if avg_val < defined_min or avg_val > defined_max:
+            summary_parts.append(f"avg={avg_val}⚠️")
+        else:
+            summary_parts.append(f"avg={avg_val}")
+        note = ""
+
+    return (
+        f"{name}: {', '.join(summary_parts)} {unit} "
+        f"(Expected: {defined_min}–{defined_max} {unit}){note}"
+    ).strip()
+
+
+class ChunkStatsWriter:
+    """Streams stats records to a CSV file as chunks are analysed."""
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self.append = append
+        self._file = None
+        self._writer = None
+
+    def __enter__(self):
+        self._file = open(self.path, "a" if self.append else "w", newline="", encoding="utf-8")
+        self._writer = csv.DictWriter(self._file, fieldnames=STAT_FIELDS)
+        if not self.append:
+            self._writer.writeheader()
+        return self
+
+    def write(self, records):
+        self._writer.writerows(records)
+
+    def __exit__(self, *exc):
+        self._file.close()
+        return False
+
+
+def _parse_cell(value):
+    if value == "":
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    return int(number) if number.is_integer() and "." not in value else number
+
+
+def load_stats(path, chunk_id=None):
+    """Reads a stats CSV back into records, optionally only those of one chunk."""
+    with open(path, newline="", encoding="utf-8") as f:
+        records = []
+        for row in csv.DictReader(f):
+            if chunk_id is not None and row["ChunkID"] != chunk_id:
+                continue
+            records.append({
+                key: value if key in ("ChunkID", "Parameter", "Unit") else _parse_cell(value)
+                for key, value in row.items()
+            })
+    return records
+
+
+def stats_to_dataframe(records):
+    """Records as a pandas DataFrame (pandas is only needed for this)."""
+    import pandas as pd
+    return pd.DataFrame.from_records(records, columns=STAT_FIELDS)
@@ -0,0 +1,145 @@
+import numpy as np
+from collections import deque
+from chunker.powerchunk import PowerLogChunker
+from .chunk_stats import compute_chunk_stats
+
+"""
+Online analysis of a live power log stream.
+
+Lines are fed one at a time through the same PowerLogChunker state machine the offline
+analysis uses, and every numeric parameter from the parameter definitions is range-checked
+as it arrives. feed_line() returns the events the line produced, as (event name, payload):
+
+- "chunk":  a chunk was opened or closed ("state": "open" / "closed"); closed chunks carry
+            the same stats records as powerchunk_stats.csv
+- "alert":  a parameter went out of its expected range ("raised") or came back ("cleared")
+- "stats":  rolling min/max/mean of each numeric parameter over the last `window` rows,
+            every `stats_every` rows
+"""
+
+
+def _to_float(value):
+    # Same "plain decimal" acceptance rule as the offline stats
+    text = str(value)
+    return float(text) if text.replace('.', '', 1).lstrip('-').isdigit() else None
+
+
+class LiveLogMonitor:
+    def __init__(self, param_defs, columns, device_name="live", window=60, stats_every=10):
+        self.param_defs = param_defs
+        self.chunker = PowerLogChunker(None, device_name, columns)
+        self.stats_every = stats_every
+        # Numeric parameters present in the log, with their position in a parsed line
+        self._numeric = [
+            (i, col) for i, col in enumerate(columns)
+            if col in param_defs and param_defs[col].get("type") != "bitfield"
+        ]
+        self._limits = {
+            col: (param_defs[col].get("min", float("-inf")), param_defs[col].get("max", float("inf")))
+            for _, col in self._numeric
+        }
+        self._windows = {col: deque(maxlen=window) for _, col in self._numeric}
+        self._violating = set()
+        self._open_chunk_id = None
+        self._chunk_rows = 0
+        self._rows = 0
+
+    def feed_line(self, line):
+        events = []
+        finished = self.chunker.feed_line(line)
+        if finished is not None:
+            events.append(("chunk", self._closed_chunk_event(finished)))
+
+        row = self.chunker.last_row
+        if row is None:
+            return events
+
+        if self.chunker.current_chunk_id != self._open_chunk_id:
+            self._open_chunk_id = self.chunker.current_chunk_id
+            self._chunk_rows = 0
+            events.append(("chunk", self._open_chunk_event()))
+        self._chunk_rows += 1
+        self._rows += 1
+
+        dt, values = row
+        timestamp = dt.strftime("%Y-%m-%d %H:%M:%S")
+        for i, col in self._numeric:
+            value = _to_float(values[i])
+            if value is None:
+                continue
+            self._windows[col].append(value)
+            events.extend(self._check_range(col, value, timestamp))
+
+        if self._rows % self.stats_every == 0:
+            events.append(("stats", self.rolling_stats(timestamp)))
+        return events
+
+    def flush(self):
+        """Closes the open chunk at the end of the stream."""
+        finished = self.chunker.flush()
+        if finished is None:
+            return []
+        return [("chunk", self._closed_chunk_event(finished))]
+
+    def rolling_stats(self, timestamp=None):
+        stats = {}
+        for col, window in self._windows.items():
+            if not window:
+                continue
+            values = np.fromiter(window, dtype=np.float64, count=len(window))
+            stats[col] = {
+                "min": float(values.min()),
+                "max": float(values.max()),
+                "mean": round(float(values.mean()), 2),
+                "rows": len(values),
+                "unit": self.param_defs[col].get("unit", ""),
+            }
+        return {"time": timestamp, "ChunkID": self._open_chunk_id, "parameters": stats}
+
+    def _check_range(self, col, value, timestamp):
+        low, high = self._limits[col]
+        out_of_range = value < low or value > high
+        # Only transitions are reported, not every out-of-range row
+        if out_of_range == (col in self._violating):
+            return []
+        if out_of_range:
+            self._violating.add(col)
+        else:
+            self._violating.discard(col)
+        return [("alert", {
+            "state": "raised" if out_of_range else "cleared",
+            "Parameter": col,
+            "value": value,
+            "min": self._limits[col][0] if low != float("-inf") else None,
+            "max": self._limits[col][1] if high != float("inf") else None,
+            "unit": self.param_defs[col].get("unit", ""),
+            "time": timestamp,
+            "ChunkID": self._open_chunk_id,
+        })]
+
+    def _open_chunk_event(self):
+        chunk = self.chunker.current_chunk
+        return {
+            "state": "open",
+            "ChunkID": chunk["ChunkID"],
+            "StartDate": chunk["StartDate"],
+            "StartTime": chunk["StartTime"],
+            "BattPres": chunk["BattPres"],
+            "PowerSrc": chunk["PowerSrc"],
+        }
+
+    def _closed_chunk_event(self, chunk):
+        self._open_chunk_id = None
+        return {
+            "state": "closed",
+            "ChunkID": chunk["ChunkID"],
+            "StartDate": chunk["StartDate"],
+            "StartTime": chunk["StartTime"],
+            "EndDate": chunk["EndDate"],
+            "EndTime": chunk["EndTime"],
+            "TotalTime": chunk["TotalTime"],
+            "BattPres": chunk["BattPres"],
+            "PowerSrc": chunk["PowerSrc"],
+            "Rows": self._chunk_rows,
+            "stats": compute_chunk_stats(chunk, self.param_defs),
+        }
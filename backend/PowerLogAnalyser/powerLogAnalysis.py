@@ -1,6 +1,14 @@
 from .batteryStatusDecoder import BatteryStatusSummarizer
+from .bitdefs_registry import registry as bitdefs_registry
+from .chunk_stats import numeric_rows, compute_chunk_stats, render_numeric_stats, ChunkStatsWriter
 import sys, os
 import json , csv
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from chunker.chunk_store import ChunkStore
+from config import ANALYSIS_WORKERS
 
 """
 This code defines and uses a class called PowerLogAnalyzer to 
@@ -21,94 +29,45 @@ parameter_definitions = {
 }
 
 
+def to_numeric_array(values):
+    """
+    Converts a chunk column (typed column buffer, NumPy array, list or scalar) into a
+    float64 array holding only the valid numeric entries.
+    """
+    arr = numeric_rows(values)
+    return arr[~np.isnan(arr)]
+
+
 class PowerLogAnalyzer:
     def __init__(self, parameter_defs):
         self.param_defs = parameter_defs
         self.bitfield_defs = self.load_bitfields()
+        # Decode tables are built once per definition file version, not per analyzer
+        self.bitfield_decoders = bitdefs_registry.decoders()
 
     def load_bit_defs(self, path, bit_key):
-        namespace = {}
-        # Construct an absolute path from the project root
-        full_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', path)
-        with open(full_path, "r") as f:
-            exec(f.read(), {}, namespace)
-        return namespace[bit_key]
+        # Parsed once and cached by the shared registry; path is relative to the project root
+        return bitdefs_registry.get(path, bit_key)
     
     def load_bitfields(self):
         # Load hex to meaning mapping from your RAG_DATA text files
-        return {
-            "BattStatus": self.load_bit_defs("RAG_DATA/BitsDef/BatteryStatus.txt", "bit_defs"),
-            "ChgrStatus": self.load_bit_defs("RAG_DATA/BitsDef/ChargerStatus.txt","charging_status_bit_defs"),
-            "OperationalStatus": self.load_bit_defs("RAG_DATA/BitsDef/OperationalStatus.txt","operational_status_bit_defs"),
-            "GaugeStatus": self.load_bit_defs("RAG_DATA/BitsDef/GaugeStatus.txt", "gauging_status_bit_defs"),
-            "PFStatus": self.load_bit_defs("RAG_DATA/BitsDef/ProtectionFaultStatus.txt","pf_status_bit_defs"),
-            "PFAlert": self.load_bit_defs("RAG_DATA/BitsDef/ProtectionFaultAlert.txt","pf_alert_bit_defs"),
-            "SafetyStatus": self.load_bit_defs("RAG_DATA/BitsDef/SafetyStatus.txt","safety_status_bit_defs"),
-            "SafetyAlert": self.load_bit_defs("RAG_DATA/BitsDef/SafetyAlert.txt","safety_alert_bit_defs"),
-            }
+        return bitdefs_registry.bitfields()
 
     # This function analyzes numeric parameters, checking their values against defined min/max ranges.
     def analyze_numeric_param(self, name, values):
         param = self.param_defs.get(name, {})
-        if not param or not values:
+        if not param or values is None or len(values) == 0:
             return f"{name}: No data available"
-
-        try:
-            values = [float(v) for v in values if str(v).replace('.', '', 1).lstrip('-').isdigit()]
-        except:
-            return f"{name}: Invalid data format"
-
-        if not values:
-            return f"{name}: No valid numeric entries"
-
-        unit = param.get("unit", "")
-        defined_min = param.get("min", float('-inf'))
-        defined_max = param.get("max", float('inf'))
-
-        min_val = min(values)
-        max_val = max(values)
-        avg_val = round(sum(values) / len(values), 2)
-
-        summary_parts = []
-
-        # Special case: data is all zero  symbols are added for better readability
-        if min_val == 0 and max_val == 0:
-            summary_parts.append(f"min={min_val}❗")
-            summary_parts.append(f"max={max_val}❗")
-            summary_parts.append(f"avg={avg_val}❗")
-            note = " (⚠️ Data may be missing or uninitialized)"
-        else:
-            # Append min with warning if needed
-            if min_val < defined_min:
-                summary_parts.append(f"min={min_val}⚠️")
-            else:
-                summary_parts.append(f"min={min_val}")
-
-            # Append max with warning if needed
-            if max_val > defined_max:
-                summary_parts.append(f"max={max_val}⚠️")
-            else:
-                summary_parts.append(f"max={max_val}")
-
-            # Append avg with warning if needed
-            if avg_val < defined_min or avg_val > defined_max:
-                summary_parts.append(f"avg={avg_val}⚠️")
-            else:
-                summary_parts.append(f"avg={avg_val}")
-            note = ""
-
-        return (
-            f"{name}: {', '.join(summary_parts)} {unit} "
-            f"(Expected: {defined_min}–{defined_max} {unit}){note}"
-        ).strip()
+        records = compute_chunk_stats({name: values}, {name: param})
+        return render_numeric_stats(records[0])
 
     #This function analyzes bitfield parameters, decoding their hex values into human-readable meanings.
     def analyze_bitfield_param(self, name, values):
-        unique = list(dict.fromkeys(values))
+        unique = values.unique_raw() if hasattr(values, "unique_raw") else list(dict.fromkeys(values))
         results = []
         for hex_val in unique:
             try:
-                decoded = BatteryStatusSummarizer.decode_hex_status(hex_val, self.bitfield_defs[name])
+                decoded = self.bitfield_decoders[name].decode_hex_status(hex_val)
                 results.append(f"{hex_val} → " + "; ".join(decoded))
             except Exception as e:
                 results.append(f"{hex_val} → Error decoding: {str(e)}")
@@ -116,45 +75,138 @@ class PowerLogAnalyzer:
 
     # This function checks if the data is numeric or bitfield, and then calls the appropriate analysis function.
     def analyze_chunk(self, chunk):
+        return self.analyze_chunk_with_stats(chunk)[0]
+
+    def analyze_chunk_with_stats(self, chunk):
+        """
+        Returns the chunk's text summary together with the stats records it was rendered from.
+        Numeric parameters are computed together in one pass (see chunk_stats.py).
+        """
+        records = compute_chunk_stats(chunk, self.param_defs)
+        numeric = {record["Parameter"]: record for record in records}
+
         analysis = []
         for param in chunk:
             if param not in self.param_defs:
                 continue
 
-            values = chunk[param] if isinstance(chunk[param], list) else [chunk[param]]
-            if self.param_defs[param].get("type") == "bitfield":
-                analysis.append(self.analyze_bitfield_param(param, values))
-            else:
-                analysis.append(self.analyze_numeric_param(param, values))
+            if param in numeric:
+                analysis.append(render_numeric_stats(numeric[param]))
+                continue
+
+            values = chunk[param]
+            if not isinstance(values, (list, np.ndarray)) and not hasattr(values, "to_list"):
+                values = [values]
+            analysis.append(self.analyze_bitfield_param(param, values))
         
-        return "\n".join(a for a in analysis if a)
+        return "\n".join(a for a in analysis if a), records
 
-def get_parameter_definitions():
-    analyzer = PowerLogAnalyzer(parameter_definitions)
-    return parameter_definitions, analyzer.bitfield_defs
+STATS_FILE_NAME = "powerchunk_stats.csv"
 
-def analyze_power_log(chunks_file_path):
+def get_parameter_definitions():
+    return parameter_definitions, bitdefs_registry.bitfields()
+
+def get_parameter_definitions_json():
+    """Pre-serialized /get_power_log_definitions body and its ETag."""
+    def build():
+        param_defs, bitfield_defs = get_parameter_definitions()
+        return {'parameter_definitions': param_defs, 'bitfield_definitions': bitfield_defs}
+    return bitdefs_registry.json_payload('power_log_definitions', build)
+
+# Chunks handed to a worker process at a time
+ANALYSIS_BATCH_SIZE = 64
+
+_worker_analyzer = None
+
+def _init_analysis_worker(param_defs):
+    global _worker_analyzer
+    _worker_analyzer = PowerLogAnalyzer(param_defs)
+
+def _analyze_batch(raw_chunks):
+    results = []
+    for raw in raw_chunks:
+        chunk = json.loads(raw)
+        summary, stats = _worker_analyzer.analyze_chunk_with_stats(chunk)
+        results.append((chunk['ChunkID'], summary, stats))
+    return results
+
+def _batches(items, size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+def _analyze_in_processes(store, param_defs, workers, first_chunk=0):
+    """Yields (ChunkID, summary, stats) in chunk order, analysing batches across a process pool."""
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_analysis_worker, initargs=(param_defs,)) as pool:
+        # Keep a bounded number of batches in flight so memory stays flat on large logs
+        pending = deque()
+        try:
+            for batch in _batches(store.iter_raw_chunks(first_chunk), ANALYSIS_BATCH_SIZE):
+                pending.append(pool.submit(_analyze_batch, batch))
+                if len(pending) >= workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            # Closed early (e.g. cancelled): don't wait for batches nobody will read
+            for future in pending:
+                future.cancel()
+
+def analyze_power_log(chunks_file_path, workers=None, first_chunk=0, progress=None):
+    """
+    workers: processes used to analyse chunks (defaults to ANALYSIS_WORKERS). Logs with
+    no more than one batch of chunks are always analysed in-process.
+    first_chunk: incremental mode. Only chunks from this index on are analysed, and their
+    output is appended to the existing summary and stats files.
+    progress: optional callback progress(chunks_analysed=n), called after every
+    ANALYSIS_BATCH_SIZE chunks and at the end. Exceptions it raises (e.g. cancellation) abort
+    the analysis.
+    """
     if not os.path.exists(chunks_file_path):
         return f"Error: chunks.json not found at {chunks_file_path}"
 
-    with open(chunks_file_path) as f:
-        chunks = json.load(f)
-
-    analyzer = PowerLogAnalyzer(parameter_definitions)
-
-    output_txt = os.path.join(os.path.dirname(chunks_file_path), "powerchunk_analysis_summary.txt")
+    workers = workers or ANALYSIS_WORKERS
+    store = ChunkStore(chunks_file_path)
+    if workers > 1 and len(store.chunk_ids()) - first_chunk > ANALYSIS_BATCH_SIZE:
+        results = _analyze_in_processes(store, parameter_definitions, workers, first_chunk)
+    else:
+        # Stream chunks from the store instead of loading the whole file
+        analyzer = PowerLogAnalyzer(parameter_definitions)
+        results = (
+            (chunk['ChunkID'],) + analyzer.analyze_chunk_with_stats(chunk)
+            for chunk in map(json.loads, store.iter_raw_chunks(first_chunk))
+        )
+
+    output_dir = os.path.dirname(chunks_file_path)
+    output_txt = os.path.join(output_dir, "powerchunk_analysis_summary.txt")
+    append = first_chunk > 0
     
     analysis_results = []
-    with open(output_txt, "w", encoding='utf-8') as f:
-        for chunk in chunks:
-            summary = analyzer.analyze_chunk(chunk)
-            analysis_results.append(f"🧩 ChunkID: {chunk['ChunkID']}\n\n")
-            analysis_results.append(summary.strip() + "\n\n")
-            analysis_results.append("-" * 60 + "\n\n")
-            
-            f.write(f"🧩 ChunkID: {chunk['ChunkID']}\n\n")
-            f.write(summary.strip() + "\n\n")
-            f.write("-" * 60 + "\n\n")
+    analysed = 0
+    with open(output_txt, "a" if append else "w", encoding='utf-8') as f, \
+            ChunkStatsWriter(os.path.join(output_dir, STATS_FILE_NAME), append=append) as stats_writer:
+        try:
+            for chunk_id, summary, stats in results:
+                stats_writer.write(stats)
+                analysis_results.append(f"🧩 ChunkID: {chunk_id}\n\n")
+                analysis_results.append(summary.strip() + "\n\n")
+                analysis_results.append("-" * 60 + "\n\n")
+
+                f.write(f"🧩 ChunkID: {chunk_id}\n\n")
+                f.write(summary.strip() + "\n\n")
+                f.write("-" * 60 + "\n\n")
+
+                analysed += 1
+                if progress and analysed % ANALYSIS_BATCH_SIZE == 0:
+                    progress(chunks_analysed=analysed)
+        finally:
+            # Stops the worker processes' remaining batches when cancelled
+            results.close()
+    if progress:
+        progress(chunks_analysed=analysed)
 
     return "\n".join(analysis_results)
 
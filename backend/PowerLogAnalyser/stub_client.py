@@ -0,0 +1,50 @@
+import time
+import random
+import threading
+from types import SimpleNamespace
+
+"""
+Local stand-in for the OpenAI client, for exercising BatteryStatusSummarizer without
+network access. Exposes the same client.chat.completions.create(...) call shape, with
+optional latency and injected failures to exercise concurrency and retries.
+"""
+
+
+class StubLLMClient:
+    def __init__(self, latency_seconds=0.0, failure_rate=0.0, reply=None, seed=None):
+        """
+        latency_seconds: simulated time per call.
+        failure_rate: probability (0-1) that a call raises, to exercise retry/backoff.
+        reply: optional function(messages) -> str; defaults to echoing the last prompt line.
+        """
+        self.latency_seconds = latency_seconds
+        self.failure_rate = failure_rate
+        self.reply = reply or self._default_reply
+        self.calls = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    @staticmethod
+    def _default_reply(messages):
+        prompt = messages[-1]["content"].strip().splitlines()
+        return f"[stub] {prompt[-1] if prompt else ''}"
+
+    def _create(self, model, messages, temperature=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+            fail = self._random.random() < self.failure_rate
+        try:
+            if self.latency_seconds:
+                time.sleep(self.latency_seconds)
+            if fail:
+                raise RuntimeError("stub LLM failure")
+            message = SimpleNamespace(role="assistant", content=self.reply(messages))
+            return SimpleNamespace(model=model, choices=[SimpleNamespace(index=0, message=message)])
+        finally:
+            with self._lock:
+                self._in_flight -= 1
@@ -0,0 +1,158 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from chunker.powerchunk import COLUMNS
+from PowerLogAnalyser.powerLogAnalysis import parameter_definitions
+from config import ANALYSIS_CACHE_FOLDER, ANALYSIS_CACHE_MAX_BYTES, RAG_DATA_FOLDER
+
+"""
+Content-addressed cache of analysis results.
+
+Entries are keyed on a SHA-256 of the powerlog input files' contents, the chunker COLUMNS,
+the parameter definitions and the BitsDef files - everything the chunks, summary CSV,
+analysis summary and stats are derived from. On a hit, the cached artifacts are hard-linked
+into the new issue folder (copied where hard links aren't possible) instead of being
+recomputed. Least recently used entries are evicted once the cache exceeds
+ANALYSIS_CACHE_MAX_BYTES.
+"""
+
+KEY_VERSION = "4"
+META_FILE = "meta.json"
+BITSDEF_FOLDER = os.path.join(RAG_DATA_FOLDER, "BitsDef")
+
+# Cached name -> per-issue file name
+ARTIFACTS = {
+    "chunks.json": "chunks_{issue}.json",
+    "chunks.json.idx": "chunks_{issue}.json.idx",
+    "chunk_summary.csv": "chunk_summary_{issue}.csv",
+    "powerchunk_analysis_summary.txt": "powerchunk_analysis_summary.txt",
+    "powerchunk_stats.csv": "powerchunk_stats.csv",
+}
+# Cached when present, restored only if the issue folder doesn't already have it
+OPTIONAL_ARTIFACTS = {
+    "PowerlogFile.txt": "PowerlogFile.txt",
+    "ingest_state.json": "ingest_state.json",
+}
+
+
+def _update_with_file(digest, path):
+    digest.update(str(os.path.getsize(path)).encode())
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+
+
+def compute_cache_key(input_files, variant=''):
+    """
+    Hash of the given input files' contents (in order) plus the analysis definitions.
+    variant tells apart analyses of the same input that give different results.
+    """
+    digest = hashlib.sha256()
+    digest.update(KEY_VERSION.encode())
+    digest.update(variant.encode())
+    digest.update(json.dumps(COLUMNS).encode())
+    digest.update(json.dumps(parameter_definitions, sort_keys=True, default=str).encode())
+    if os.path.isdir(BITSDEF_FOLDER):
+        for name in sorted(os.listdir(BITSDEF_FOLDER)):
+            digest.update(name.encode())
+            _update_with_file(digest, os.path.join(BITSDEF_FOLDER, name))
+    for path in input_files:
+        _update_with_file(digest, path)
+    return digest.hexdigest()
+
+
+def _link_or_copy(src, dst):
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def release_artifacts(issue_dir, issue_name):
+    """
+    Unlinks an issue's analysis artifacts before they are regenerated. They may be hard links
+    into the cache, and rewriting them in place would corrupt the cached copy.
+    """
+    for template in list(ARTIFACTS.values()) + list(OPTIONAL_ARTIFACTS.values()):
+        path = os.path.join(issue_dir, template.format(issue=issue_name))
+        if os.path.lexists(path):
+            os.remove(path)
+
+
+class AnalysisCache:
+    def __init__(self, cache_folder=ANALYSIS_CACHE_FOLDER, max_bytes=ANALYSIS_CACHE_MAX_BYTES):
+        self.cache_folder = cache_folder
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_folder, exist_ok=True)
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_folder, key)
+
+    def restore(self, key, issue_dir, issue_name):
+        """Links a cached result into issue_dir. Returns False on a miss."""
+        entry_dir = self._entry_dir(key)
+        with self._lock:
+            if not all(os.path.exists(os.path.join(entry_dir, name)) for name in ARTIFACTS):
+                return False
+            for name, template in ARTIFACTS.items():
+                _link_or_copy(os.path.join(entry_dir, name), os.path.join(issue_dir, template.format(issue=issue_name)))
+            for name, template in OPTIONAL_ARTIFACTS.items():
+                src = os.path.join(entry_dir, name)
+                dst = os.path.join(issue_dir, template.format(issue=issue_name))
+                if os.path.exists(src) and not os.path.exists(dst):
+                    _link_or_copy(src, dst)
+            # Mark as most recently used
+            os.utime(os.path.join(entry_dir, META_FILE))
+        print(f"Analysis cache hit for '{issue_name}' ({key[:12]})")
+        return True
+
+    def store(self, key, issue_dir, issue_name):
+        """Adds an issue's freshly generated artifacts to the cache, then enforces the size limit."""
+        entry_dir = self._entry_dir(key)
+        with self._lock:
+            if os.path.exists(entry_dir):
+                return
+            tmp_dir = entry_dir + ".tmp"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+            try:
+                for name, template in {**ARTIFACTS, **OPTIONAL_ARTIFACTS}.items():
+                    src = os.path.join(issue_dir, template.format(issue=issue_name))
+                    if os.path.exists(src):
+                        _link_or_copy(src, os.path.join(tmp_dir, name))
+                    elif name in ARTIFACTS:
+                        return
+                with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+                    json.dump({"source_issue": issue_name, "created": time.time()}, f)
+                os.replace(tmp_dir, entry_dir)
+            finally:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            self._evict()
+
+    def _entry_size(self, entry_dir):
+        return sum(
+            os.path.getsize(os.path.join(entry_dir, name))
+            for name in os.listdir(entry_dir)
+        )
+
+    def _evict(self):
+        entries = []
+        for key in os.listdir(self.cache_folder):
+            entry_dir = self._entry_dir(key)
+            meta = os.path.join(entry_dir, META_FILE)
+            if key.endswith(".tmp") or not os.path.exists(meta):
+                continue
+            entries.append((os.path.getmtime(meta), self._entry_size(entry_dir), entry_dir))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
@@ -11,9 +11,14 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from services.log_analysis_service import LogAnalysisService
 from services.chat_service import ChatService
-from services.live_log_service import LiveLogService
-from PowerLogAnalyser.powerLogAnalysis import get_parameter_definitions
-from config import PROJECT_ROOT, UPLOAD_FOLDER, DATASET_FOLDER, RAG_DATA_FOLDER
+from services.live_log_service import LiveLogService, ReplayFileSource
+from services.job_service import JobService, JobQueueFull
+from PowerLogAnalyser.powerLogAnalysis import get_parameter_definitions_json, STATS_FILE_NAME
+from PowerLogAnalyser.chunk_stats import load_stats
+from message_index import read_message_window
+from chunker.chunk_store import ChunkStore
+from config import PROJECT_ROOT, UPLOAD_FOLDER, DATASET_FOLDER, RAG_DATA_FOLDER, ANALYSIS_MAX_CONCURRENT_JOBS, ANALYSIS_MAX_QUEUED_JOBS
+from config import LIVE_LOG_REPLAY_FILE, LIVE_LOG_REPLAY_INTERVAL
 
 app = Flask(__name__, static_folder=os.path.join(PROJECT_ROOT, 'frontend'), static_url_path='/static', template_folder=os.path.join(PROJECT_ROOT, 'frontend'))
 CORS(app)
@@ -24,7 +29,11 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 # Initialize services
 log_analysis_service = LogAnalysisService(DATASET_FOLDER)
 chat_service = ChatService(RAG_DATA_FOLDER)
-live_log_service = LiveLogService()
+if LIVE_LOG_REPLAY_FILE:
+    live_log_service = LiveLogService(lambda pump_ip: ReplayFileSource(LIVE_LOG_REPLAY_FILE, LIVE_LOG_REPLAY_INTERVAL))
+else:
+    live_log_service = LiveLogService()
+job_service = JobService(max_workers=ANALYSIS_MAX_CONCURRENT_JOBS, max_queued=ANALYSIS_MAX_QUEUED_JOBS)
 
 @app.route('/')
 def index():
@@ -46,9 +55,13 @@ def upload_and_analyze():
         return jsonify({'error': 'Issue name is required'}), 400
 
     try:
-        result = log_analysis_service.analyze_uploaded_logs(powerlog_file, message_file, issue_name)
-        return jsonify(result)
+        # The upload has to be saved while the request is open; chunking and analysis run as a job
+        log_analysis_service.save_uploaded_logs(powerlog_file, message_file, issue_name)
+        job = job_service.submit('upload_analysis', issue_name, log_analysis_service.analyze_saved_upload, issue_name)
+        return jsonify({'job_id': job.job_id, 'status': job.status, 'issue_name': issue_name}), 202
 
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 429
     except Exception as e:
         traceback.print_exc()
         return jsonify({'error': 'An unexpected error occurred during analysis.', 'details': str(e)}), 500
@@ -68,6 +81,19 @@ def get_summary_csv(issue_name):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/get_chunk_stats/<issue_name>', methods=['GET'])
+def get_chunk_stats(issue_name):
+    stats_file_path = os.path.join(DATASET_FOLDER, issue_name, STATS_FILE_NAME)
+    if not os.path.exists(stats_file_path):
+        return jsonify({'error': 'Stats file not found for this issue'}), 404
+
+    try:
+        # Optional ?chunk_id= narrows the result to one chunk
+        return jsonify({'stats': load_stats(stats_file_path, request.args.get('chunk_id'))})
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({'error': 'Internal Server Error', 'details': str(e)}), 500
+
 @app.route('/get_chunk_soc/<issue_name>/<chunk_id>', methods=['GET'])
 def get_chunk_soc(issue_name, chunk_id):
     chunks_file_name = f'chunks_{issue_name}.json'
@@ -78,20 +104,18 @@ def get_chunk_soc(issue_name, chunk_id):
         return jsonify({'error': 'Chunks file not found'}), 404
 
     try:
-        with open(chunks_file_path, 'r') as f:
-            chunks = json.load(f)
-        
-        for chunk in chunks:
-            if chunk.get('ChunkID') == chunk_id:
-                return jsonify({
-                    'perc_values': chunk.get('Perc', []),
-                    'soh_values': chunk.get('SOH', []),
-                    'perc_time_series': chunk.get('Perc_Time_Series', []),
-                    'volt_values': chunk.get('Volt', []),
-                    'curr_values': chunk.get('Curr', []),
-                    'temp_values': chunk.get('Temp', [])
-                })
-        
+        # Reads only the requested chunk via the chunk store's offset index
+        chunk = ChunkStore(chunks_file_path).get(chunk_id)
+        if chunk is not None:
+            return jsonify({
+                'perc_values': chunk.get('Perc', []),
+                'soh_values': chunk.get('SOH', []),
+                'perc_time_series': chunk.get('Perc_Time_Series', []),
+                'volt_values': chunk.get('Volt', []),
+                'curr_values': chunk.get('Curr', []),
+                'temp_values': chunk.get('Temp', [])
+            })
+
         return jsonify({'error': 'Chunk not found'}), 404
 
     except Exception as e:
@@ -115,27 +139,8 @@ def get_message_logs(issue_name):
         start_dt_req = datetime.strptime(start_time_str, '%m/%d/%Y %H:%M:%S')
         end_dt_req = datetime.strptime(end_time_str, '%m/%d/%Y %H:%M:%S')
 
-        filtered_logs = []
-        with open(message_file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            for line in f:
-                try:
-                    match = re.match(r'(\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2})\.\d{3}', line)
-                    if match:
-                        log_time_str_partial = match.group(1)
-                        log_time_str_full = f"{start_dt_req.year} {log_time_str_partial}"
-                        log_dt = datetime.strptime(log_time_str_full, '%Y %b %d %H:%M:%S')
-                        
-                        if start_dt_req <= log_dt <= end_dt_req:
-                            filtered_logs.append(line.strip())
-                    else:
-                        if filtered_logs and not re.match(r'^\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}\.\d{3}', line.strip()):
-                            filtered_logs.append(line.strip())
-
-                except ValueError:
-                    pass
-                except Exception as e:
-                    print(f"Error processing log line: {line.strip()} - {e}")
-                    continue
+        # Seeks straight to the requested window using the messages time index
+        filtered_logs = read_message_window(message_file_path, start_dt_req, end_dt_req)
 
         return jsonify({'logs': filtered_logs})
 
@@ -159,6 +164,53 @@ def get_powerlog_file(issue_name):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _chat_command_response(user_query, session_id):
+    """
+    The response to the chat messages that aren't questions for the assistant: an issue name
+    for a pending analysis, /analyze and /livepower. None for a normal conversational query.
+    """
+    # Scenario 1: User is providing an issue name for a pending analysis
+    if log_analysis_service.is_awaiting_issue_name(session_id):
+        issue_name = user_query
+        # Only taken once the job is accepted, so with a full queue the name can just be sent again
+        analysis_data = log_analysis_service.get_pending_analysis(session_id)
+        try:
+            job = job_service.submit('path_analysis', issue_name, log_analysis_service.run_path_analysis, analysis_data, issue_name)
+        except JobQueueFull as e:
+            return jsonify({'error': f'{e} Send the issue name again to retry.'}), 429
+        log_analysis_service.pop_pending_analysis(session_id)
+        return jsonify({
+            'response': f'Analysing the logs for \'{issue_name}\'. I\'ll let you know when the report is ready.',
+            'job_id': job.job_id,
+            'issue_name': issue_name
+        })
+
+    # Scenario 2: User is requesting analysis from a local path via /analyze command
+    if user_query.strip().startswith('/analyze'):
+        parts = user_query.strip().split(' ', 1)
+        if len(parts) > 1:
+            raw_log_path = parts[1]
+            result = log_analysis_service.initiate_path_analysis(session_id, raw_log_path)
+            return jsonify(result)
+        else:
+            return jsonify({'error': "Invalid /analyze command. Please provide a valid path to the '\\logpaTH' directory."}), 400
+
+    # Scenario 3: User is requesting a live power log stream
+    elif user_query.strip().startswith('/livepower'):
+        parts = user_query.strip().split(' ', 1)
+        if len(parts) > 1:
+            pump_ip = parts[1]
+            # Validate IP address format
+            if re.match(r"^(?:[0-9]{1,3}\.){3}[0-9]{1,3}$", pump_ip):
+                return jsonify({'action': 'open_live_log', 'pump_ip': pump_ip})
+            else:
+                return jsonify({'error': 'Invalid IP address format.'}), 400
+        else:
+            return jsonify({'error': 'Invalid /livepower command. Please provide a device address.'}), 400
+
+    # Scenario 4: Normal conversational query
+    return None
+
 @app.route('/chat', methods=['POST'])
 def chat():
     try:
@@ -169,54 +221,81 @@ def chat():
         if not user_query:
             return jsonify({'error': 'No query provided'}), 400
 
-        # Scenario 1: User is providing an issue name for a pending analysis
-        if log_analysis_service.is_awaiting_issue_name(session_id):
-            issue_name = user_query
-            result = log_analysis_service.finalize_analysis(session_id, issue_name)
-            return jsonify(result)
+        response = _chat_command_response(user_query, session_id)
+        if response is not None:
+            return response
 
-        # Scenario 2: User is requesting analysis from a local path via /analyze command
-        if user_query.strip().startswith('/analyze'):
-            parts = user_query.strip().split(' ', 1)
-            if len(parts) > 1:
-                raw_log_path = parts[1]
-                result = log_analysis_service.initiate_path_analysis(session_id, raw_log_path)
-                return jsonify(result)
-            else:
-                return jsonify({'error': "Invalid /analyze command. Please provide a valid path to the '\\logpaTH' directory."}), 400
-
-        # Scenario 3: User is requesting a live power log stream
-        elif user_query.strip().startswith('/livepower'):
-            parts = user_query.strip().split(' ', 1)
-            if len(parts) > 1:
-                pump_ip = parts[1]
-                # Validate IP address format
-                if re.match(r"^(?:[0-9]{1,3}\.){3}[0-9]{1,3}$", pump_ip):
-                    return jsonify({'action': 'open_live_log', 'pump_ip': pump_ip})
-                else:
-                    return jsonify({'error': 'Invalid IP address format.'}), 400
-            else:
-                return jsonify({'error': 'Invalid /livepower command. Please provide a device address.'}), 400
+        result = chat_service.handle_chat_query(user_query)
+        return jsonify(result)
 
-        # Scenario 4: Normal conversational query
-        else:
-            result = chat_service.handle_chat_query(user_query)
-            return jsonify(result)
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({'error': 'An unexpected error occurred in the chat endpoint.', 'details': str(e)}), 500
+
+@app.route('/chat_stream', methods=['POST'])
+def chat_stream():
+    """
+    /chat with the assistant's answer streamed as server-sent events (see
+    ChatService.stream_chat_query). Commands get the same JSON response as on /chat.
+    """
+    from flask import Response, stream_with_context
+    try:
+        data = request.get_json()
+        user_query = data.get('query')
+        session_id = data.get('session_id', 'default_session')
+
+        if not user_query:
+            return jsonify({'error': 'No query provided'}), 400
+
+        response = _chat_command_response(user_query, session_id)
+        if response is not None:
+            return response
+
+        return Response(
+            stream_with_context(chat_service.stream_chat_query(user_query)),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
 
     except Exception as e:
         traceback.print_exc()
         return jsonify({'error': 'An unexpected error occurred in the chat endpoint.', 'details': str(e)}), 500
 
+@app.route('/chat/metrics', methods=['GET'])
+def chat_metrics():
+    # Hit/miss counts of the LLM response cache
+    return jsonify(chat_service.cache_stats())
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_service.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    job = job_service.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
 @app.route('/get_power_log_definitions', methods=['GET'])
 def get_power_log_definitions():
-    param_defs, bitfield_defs = get_parameter_definitions()
-    return jsonify({'parameter_definitions': param_defs, 'bitfield_definitions': bitfield_defs})
+    from flask import Response
+    body, etag = get_parameter_definitions_json()
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    # Revalidate every time so edited BitsDef files show up; unchanged definitions get a 304
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
 @app.route('/live_power_log/<pump_ip>')
 def live_power_log(pump_ip):
     from flask import Response
-    # Use the dedicated service to stream logs
-    return Response(live_log_service.stream_log_for_ip(pump_ip), mimetype='text/event-stream')
+    # Use the dedicated service to stream logs; ?analytics=0 relays the raw lines only
+    analytics = request.args.get('analytics', '1') != '0'
+    return Response(live_log_service.stream_log_for_ip(pump_ip, analytics=analytics), mimetype='text/event-stream')
 
 @app.route('/depth_view')
 def depth_view():
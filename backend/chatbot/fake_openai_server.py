@@ -0,0 +1,165 @@
+import json
+import time
+import threading
+import argparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+"""
+A local stand-in for an OpenAI-compatible chat completions API, for testing the chat path
+without network access or an API key. POST /chat/completions (or /v1/chat/completions)
+answers with "Echo: <last user message>" (or reply(messages)) after `delay` seconds plus
+`token_delay` per word, and counts the requests it served. With "stream": true the answer is
+sent as server-sent chunks, one word each, `token_delay` seconds apart (the first one after
+`delay`), preceded by `reasoning_words` words of "reasoning" deltas, as a reasoning model
+sends its thinking.
+
+    python backend/chatbot/fake_openai_server.py --port 8099 --delay 2
+    OPENAI_BASE_URL=http://127.0.0.1:8099/v1 python backend/app.py
+
+or from code:
+    server = FakeOpenAIServer(delay=0.5).start()
+    client = OpenAI(api_key="test", base_url=server.base_url)
+    ...
+    server.close()
+"""
+
+
+def echo_reply(messages):
+    user = [m.get("content", "") for m in messages if m.get("role") == "user"]
+    return f"Echo: {user[-1] if user else ''}"
+
+
+class FakeOpenAIServer:
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0, reply=echo_reply, token_delay=0.0,
+                 reasoning_words=0):
+        """port 0 picks a free port; see base_url."""
+        self.delay = delay
+        self.token_delay = token_delay
+        self.reasoning_words = reasoning_words
+        self.reply = reply
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _count(self):
+        with self._lock:
+            self.requests += 1
+            return self.requests
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path.rstrip("/") not in ("/chat/completions", "/v1/chat/completions"):
+                    self._json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                number = fake._count()
+                answer = fake.reply(body.get("messages", []))
+                if fake.delay:
+                    time.sleep(fake.delay)
+                if body.get("stream"):
+                    self._stream(f"chatcmpl-fake-{number}", body.get("model", "fake"), answer)
+                    return
+                # Generated just as slowly as a streamed answer, only sent at the end
+                if fake.token_delay:
+                    time.sleep(fake.token_delay * (fake.reasoning_words + len(answer.split(" ")) - 1))
+                self._json(200, {
+                    "id": f"chatcmpl-fake-{number}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": answer},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                })
+
+            def _stream(self, completion_id, model, answer):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+
+                def chunk(delta, finish_reason=None):
+                    payload = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                    }
+                    self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+
+                try:
+                    deltas = [{"role": "assistant", "content": "", "reasoning": f"thinking {i} "}
+                              for i in range(fake.reasoning_words)]
+                    deltas += [{"role": "assistant", "content": word if i == 0 else " " + word}
+                               for i, word in enumerate(answer.split(" "))]
+                    for i, delta in enumerate(deltas):
+                        if i and fake.token_delay:
+                            time.sleep(fake.token_delay)
+                        chunk(delta)
+                    chunk({}, "stop")
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client stopped reading
+                    pass
+
+            def _json(self, status, payload):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds before each answer")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds between streamed words")
+    parser.add_argument("--reasoning-words", type=int, default=0, help="reasoning words streamed before the answer")
+    args = parser.parse_args()
+    server = FakeOpenAIServer(args.host, args.port, args.delay, token_delay=args.token_delay,
+                              reasoning_words=args.reasoning_words)
+    print(f"Fake OpenAI server on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
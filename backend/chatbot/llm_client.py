@@ -0,0 +1,94 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from backend.config import CHAT_MODEL, CHAT_TEMPERATURE
+from backend.chatbot.response_cache import ResponseCache
+
+
+class EmptyLLMResponse(Exception):
+    """The LLM answered without any message content."""
+
+
+class ChatLLM:
+    def __init__(self, client, model: str = CHAT_MODEL, temperature: float = CHAT_TEMPERATURE,
+                 cache: ResponseCache = None, system_prompt: str = "You are a helpful assistant."):
+        """
+        client: an OpenAI client (any OpenAI-compatible server).
+        cache: responses are reused from it, and concurrent identical prompts share one call;
+               None calls the LLM every time.
+        """
+        self.client = client
+        self.model = model
+        self.temperature = temperature
+        self.cache = cache
+        self.system_prompt = system_prompt
+
+    def messages(self, prompt: str):
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+
+    def complete(self, prompt: str) -> str:
+        """The LLM's answer to prompt. Raises EmptyLLMResponse, or the client's error; neither is cached."""
+        messages = self.messages(prompt)
+        if self.cache is None:
+            return self._create(messages)
+        key = self.cache.key(self.model, messages, self.temperature)
+        return self.cache.get_or_compute(key, lambda: self._create(messages))
+
+    def stream(self, prompt: str):
+        """
+        Yields ("reasoning" | "token", text) as the LLM produces its answer: reasoning models'
+        thinking first (if the server sends it), then the answer's tokens. A cached answer is
+        yielded as a single token; a streamed answer is cached once it is complete. Streams
+        aren't coalesced, each one is its own upstream call.
+        """
+        messages = self.messages(prompt)
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(self.model, messages, self.temperature)
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield "token", cached
+                return
+
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+            stream=True
+        )
+        parts = []
+        try:
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                # OpenRouter sends "reasoning", DeepSeek's own API "reasoning_content"
+                reasoning = getattr(delta, "reasoning", None) or getattr(delta, "reasoning_content", None)
+                if reasoning:
+                    yield "reasoning", reasoning
+                if delta.content:
+                    parts.append(delta.content)
+                    yield "token", delta.content
+        finally:
+            # Also runs when the client goes away mid-answer: stop the upstream generation
+            response.close()
+
+        answer = "".join(parts).strip()
+        if not answer:
+            raise EmptyLLMResponse("The stream ended without any content")
+        if key is not None:
+            self.cache.put(key, answer)
+
+    def _create(self, messages) -> str:
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature
+        )
+        if response and response.choices and response.choices[0] and response.choices[0].message \
+                and response.choices[0].message.content:
+            return response.choices[0].message.content.strip()
+        raise EmptyLLMResponse(response)
@@ -3,11 +3,13 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parents[2]))
 from openai import OpenAI
-from backend.config import OPENAI_API_KEY, OPENAI_BASE_URL
+from backend.config import OPENAI_API_KEY, OPENAI_BASE_URL, EMBED_WARM_UP, REQUIREMENT_TOP_K
+from backend.config import CHAT_CACHE_SIZE, CHAT_CACHE_TTL_SECONDS, CHAT_CACHE_PATH
+from backend.chatbot.llm_client import ChatLLM, EmptyLLMResponse
+from backend.chatbot.response_cache import ResponseCache
 from db.lancedb_manager import RequirementDatabase
-from backend.requirement_embedder.embedder import get_embedding, build_embed_input
-from backend.requirement_embedder.pdf_extractor import extract_pdf_to_text, process_text_file
-import random
+from backend.requirement_embedder.embedder import get_embedding, build_embed_input, warm_up
+from backend.requirement_embedder.pdf_extractor import sync_requirement_pdfs
 
 class QueryHandler:
     def __init__(self, rag_data_path):
@@ -17,9 +19,15 @@ class QueryHandler:
             api_key=OPENAI_API_KEY,
             base_url=OPENAI_BASE_URL
         )
+        # Identical prompts (e.g. the same question asked again) are answered from the cache
+        self.response_cache = ResponseCache(CHAT_CACHE_SIZE, CHAT_CACHE_TTL_SECONDS, CHAT_CACHE_PATH)
+        self.llm = ChatLLM(self.client, cache=self.response_cache)
         self.req_db = RequirementDatabase()
         self.confirmation_pending = False
         self.pending_query = None
+        if EMBED_WARM_UP:
+            # Otherwise the embedding model loads on the first requirement query
+            warm_up(background=True)
 
     
 
@@ -39,43 +47,29 @@ class QueryHandler:
         extracted_text_dir = self.rag_data_path / "extracted_texts"
         extracted_text_dir.mkdir(parents=True, exist_ok=True)
 
-        pdf_files = {p.stem for p in raw_pdf_dir.glob("*.pdf")}
-        extracted_files = {p.stem for p in extracted_text_dir.glob("*.txt")}
-
-        new_pdfs = pdf_files - extracted_files
-
-        if new_pdfs:
-            print(f"Found {len(new_pdfs)} new PDFs to extract.")
-            for pdf_stem in new_pdfs:
-                pdf_file = raw_pdf_dir / f"{pdf_stem}.pdf"
-                text_path = extracted_text_dir / f"{pdf_stem}.txt"
-                print(f"📄 Extracting text: {pdf_file.name}")
-                extract_pdf_to_text(str(pdf_file), str(text_path))
-
-                record = process_text_file(str(text_path))
-                embed_input = build_embed_input(record["text"], record["metadata"])
-                embedding = get_embedding(embed_input)
-                self.req_db.upsert_requirement(
-                    requirement_id=record["requirement_id"],
-                    document_id=pdf_file.stem,
-                    chunk_id=random.randint(0,999),
-                    text=record["text"],
-                    metadata=record["metadata"],
-                    embedding=embedding,
-                )
-                print(f" Inserted chunks from {pdf_file.name}\n")
+        # New PDFs are ingested, rows of removed PDFs deleted
+        result = sync_requirement_pdfs(raw_pdf_dir, extracted_text_dir, self.req_db, only_new=True)
+        if result["written"] or result["removed"]:
             return "Refreshing requirement database..."
         return None
 
-    def _handle_requirement_query(self, query):
+    def _find_requirements(self, query):
+        # A query naming a requirement/document id or a log message exactly needs no embedding
+        results = self.req_db.exact_matches(query, top_k=REQUIREMENT_TOP_K)
+        if results:
+            return results
+
         embedding_input = build_embed_input(query, metadata={})
         embedding = get_embedding(embedding_input)
         embedding = [float(x) for x in embedding]
 
-        results = self.req_db.query_similar(query_embedding=embedding, top_k=1)
+        return self.req_db.query_hybrid(query, query_embedding=embedding, top_k=REQUIREMENT_TOP_K)
+
+    def _requirement_prompt(self, query):
+        results = self._find_requirements(query)
 
         if not results:
-            return " No matching requirements found for your query."
+            return None, " No matching requirements found for your query."
 
         prompt = f"""You are an assistant helping engineers answer technical queries using requirement documents.
 
@@ -89,29 +83,23 @@ Based on this, provide a clear and concise answer to the user's query. But once
 If the answer isn't explicitly available, say "No relevant requirement found."
 """
 
-        return self._get_llm_response(prompt)
+        return prompt, None
 
     def _get_llm_response(self, prompt):
         try:
-            response = self.client.chat.completions.create(
-                model="deepseek/deepseek-r1-0528-qwen3-8b:free",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7
-            )
-
-            if response and response.choices and response.choices[0] and response.choices[0].message:
-                return response.choices[0].message.content.strip()
-            else:
-                print(f"LLM response was empty or malformed: {response}")
-                return "I apologize, but I received an empty or malformed response from the AI. Please try again."
+            return self.llm.complete(prompt)
+        except EmptyLLMResponse as e:
+            print(f"LLM response was empty or malformed: {e}")
+            return "I apologize, but I received an empty or malformed response from the AI. Please try again."
         except Exception as e:
             print(f"Error calling LLM: {e}")
             return "I apologize, but I encountered an error while trying to process your request. Please try again later."
 
-    def handle_query(self, query):
+    def _plan_query(self, query):
+        """
+        Routes a chat message: returns (prompt, None) when the answer comes from the LLM, or
+        (None, reply) when it doesn't (confirmation questions, sync notices, no results).
+        """
         if self.confirmation_pending:
             if query.lower() in ['yes', 'y', 'sure']:
                 self.confirmation_pending = False
@@ -119,8 +107,8 @@ If the answer isn't explicitly available, say "No relevant requirement found."
                 self.pending_query = None
                 sync_message = self._sync_requirements()
                 if sync_message:
-                    return sync_message
-                return self._handle_requirement_query(original_query)
+                    return None, sync_message
+                return self._requirement_prompt(original_query)
             else:
                 self.confirmation_pending = False
                 original_query = self.pending_query
@@ -129,15 +117,40 @@ If the answer isn't explicitly available, say "No relevant requirement found."
 
                 User Question: {original_query}
                 """
-                return self._get_llm_response(prompt)
+                return prompt, None
 
         if self._is_requirement_query(query):
             self.confirmation_pending = True
             self.pending_query = query
-            return "It looks like you're asking for a requirement. Do you want me to search the requirement database?"
+            return None, "It looks like you're asking for a requirement. Do you want me to search the requirement database?"
         
         prompt = f"""You are a helpful assistant that answers questions about PowerLog files and battery/power-related concepts. If the answer is not in the provided information or is outside the scope of battery/power-related topics, state that you don't know. Format your responses using Markdown for bolding, italics, and lists.
 
         User Question: {query}
         """
+        return prompt, None
+
+    def handle_query(self, query):
+        prompt, reply = self._plan_query(query)
+        if prompt is None:
+            return reply
         return self._get_llm_response(prompt)
+
+    def handle_query_stream(self, query):
+        """
+        handle_query, streamed: yields ("reasoning" | "token", text) while the answer is being
+        generated, or ("error", message) if the LLM call fails. Replies that don't come from
+        the LLM are yielded as a single token.
+        """
+        prompt, reply = self._plan_query(query)
+        if prompt is None:
+            yield "token", reply
+            return
+        try:
+            yield from self.llm.stream(prompt)
+        except EmptyLLMResponse as e:
+            print(f"LLM response was empty or malformed: {e}")
+            yield "error", "I apologize, but I received an empty or malformed response from the AI. Please try again."
+        except Exception as e:
+            print(f"Error calling LLM: {e}")
+            yield "error", "I apologize, but I encountered an error while trying to process your request. Please try again later."
@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+"""
+Cache of LLM responses keyed on (model, messages, temperature), with a TTL, LRU eviction and
+an optional SQLite file behind it. get_or_compute also coalesces concurrent identical requests:
+while one caller is waiting for the LLM, others asking the same thing wait for its answer
+instead of making their own call ("single flight").
+"""
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResponseCache:
+    def __init__(self, maxsize: int = 512, ttl: float = 3600, path: str = None):
+        """
+        maxsize: responses kept in memory (least recently used evicted first).
+        ttl: seconds a response is served from the cache; 0 disables caching, leaving only the
+             coalescing of concurrent identical requests.
+        path: SQLite file to persist responses in, or None for memory only.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self._memory = OrderedDict()  # key -> (expires_at, response)
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._metrics = {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0, "evictions": 0, "expired": 0}
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS responses "
+                             "(key TEXT PRIMARY KEY, expires_at REAL NOT NULL, response TEXT NOT NULL)")
+            self._db.commit()
+
+    @staticmethod
+    def key(model: str, messages, temperature: float) -> str:
+        payload = json.dumps([model, messages, temperature], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        """The cached response, or None (counted as a hit or miss)."""
+        with self._lock:
+            response = self._lookup(key)
+            self._metrics["hits" if response is not None else "misses"] += 1
+            return response
+
+    def put(self, key: str, response: str) -> None:
+        if self.ttl <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, expires_at, response)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO responses (key, expires_at, response) VALUES (?, ?, ?)",
+                                 (key, expires_at, response))
+                self._db.commit()
+
+    def get_or_compute(self, key: str, compute):
+        """
+        The cached response for key, or compute()'s result (cached once it returns). Concurrent
+        callers with the same key share one compute() call. If it raises, every waiting caller
+        gets the exception and nothing is cached.
+        """
+        with self._lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                self._metrics["hits"] += 1
+                return cached
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._metrics["misses"] += 1
+            else:
+                self._metrics["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            self.put(key, flight.value)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            with self._lock:
+                self._metrics["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._metrics["hits"] + self._metrics["misses"] + self._metrics["coalesced"]
+            return {
+                **self._metrics,
+                "size": len(self._memory),
+                "in_flight": len(self._flights),
+                # Requests answered without an LLM call of their own
+                "hit_rate": (self._metrics["hits"] + self._metrics["coalesced"]) / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def _lookup(self, key):
+        entry = self._memory.get(key)
+        if entry is None and self._db is not None:
+            entry = self._db.execute("SELECT expires_at, response FROM responses WHERE key = ?", (key,)).fetchone()
+            if entry is not None:
+                self._remember(key, *entry)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at <= time.time():
+            self._metrics["expired"] += 1
+            del self._memory[key]
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+            return None
+        self._memory.move_to_end(key)
+        return response
+
+    def _remember(self, key, expires_at, response):
+        self._memory[key] = (expires_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+            self._metrics["evictions"] += 1
@@ -0,0 +1,191 @@
+import os
+import json
+import threading
+from itertools import islice
+
+"""
+Random-access store over chunks_<issue>.json.
+
+generate_chunks writes the chunks file one chunk per line and records each chunk's byte
+offset and length in a sidecar index (chunks_<issue>.json.idx). A lookup by ChunkID then
+reads just that chunk instead of parsing the whole file. Chunk files written before the
+index existed (pretty-printed JSON) are indexed on first access and read the same way.
+"""
+
+INDEX_VERSION = 1
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def chunk_index_path(chunks_file_path):
+    return chunks_file_path + ".idx"
+
+
+def write_chunk_index(chunks_file_path, offsets, source_size):
+    """offsets: ordered mapping of ChunkID -> (byte offset, byte length)."""
+    index = {
+        "version": INDEX_VERSION,
+        "source_size": source_size,
+        "chunks": {chunk_id: list(span) for chunk_id, span in offsets.items()},
+    }
+    index_path = chunk_index_path(chunks_file_path)
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, index_path)
+    return index
+
+
+def build_chunk_index(chunks_file_path):
+    """
+    Indexes an existing chunks file by decoding it once. Returns None if offsets can't be
+    mapped to bytes (non-ASCII content), in which case lookups fall back to a full scan.
+    """
+    with open(chunks_file_path, "rb") as f:
+        data = f.read()
+    text = data.decode("utf-8")
+    if len(text) != len(data):
+        return None
+
+    decoder = json.JSONDecoder()
+    offsets = {}
+    pos = text.index("[") + 1
+    while True:
+        while pos < len(text) and text[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(text) or text[pos] == "]":
+            break
+        chunk, end = decoder.raw_decode(text, pos)
+        offsets[chunk.get("ChunkID")] = (pos, end - pos)
+        pos = end
+    return write_chunk_index(chunks_file_path, offsets, len(data))
+
+
+class ChunkStore:
+    def __init__(self, chunks_file_path):
+        self.chunks_file_path = chunks_file_path
+
+    def _load_index(self):
+        index_path = chunk_index_path(self.chunks_file_path)
+        source_size = os.path.getsize(self.chunks_file_path)
+        with _loaded_lock:
+            cached = _loaded.get(index_path)
+            if os.path.exists(index_path):
+                mtime = os.path.getmtime(index_path)
+                if cached and cached[0] == mtime and cached[1]["source_size"] == source_size:
+                    return cached[1]
+                with open(index_path) as f:
+                    index = json.load(f)
+                if index.get("version") == INDEX_VERSION and index["source_size"] == source_size:
+                    _loaded[index_path] = (mtime, index)
+                    return index
+
+            index = build_chunk_index(self.chunks_file_path)
+            if index is not None:
+                _loaded[index_path] = (os.path.getmtime(index_path), index)
+            return index
+
+    def is_line_per_chunk(self):
+        """Whether the file was written one chunk per line (as opposed to pretty-printed legacy JSON)."""
+        with open(self.chunks_file_path, "r") as f:
+            return _is_line_per_chunk(f)
+
+    def index(self):
+        """The offset index (ChunkID -> [offset, length] under "chunks"), or None if unavailable."""
+        return self._load_index()
+
+    def get(self, chunk_id):
+        """Returns the chunk with the given ChunkID, or None."""
+        index = self._load_index()
+        if index is None:
+            for chunk in self.iter_chunks():
+                if chunk.get("ChunkID") == chunk_id:
+                    return chunk
+            return None
+
+        span = index["chunks"].get(chunk_id)
+        if span is None:
+            return None
+        offset, length = span
+        with open(self.chunks_file_path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    def chunk_ids(self):
+        index = self._load_index()
+        if index is None:
+            return [chunk.get("ChunkID") for chunk in self.iter_chunks()]
+        return list(index["chunks"])
+
+    def iter_chunks(self):
+        """Yields chunks in file order, one line at a time for files written by the streaming writer."""
+        with open(self.chunks_file_path, "r") as f:
+            if _is_line_per_chunk(f):
+                for line in f:
+                    line = line.strip().rstrip(",")
+                    if line and line != "]":
+                        yield json.loads(line)
+            else:
+                # Pretty-printed legacy file
+                yield from json.load(f)
+
+    def iter_raw_chunks(self, start=0):
+        """
+        Yields each chunk's JSON text in file order, without decoding line-per-chunk files.
+        start: index of the first chunk to yield; indexed files seek straight to it.
+        """
+        with open(self.chunks_file_path, "r") as f:
+            if _is_line_per_chunk(f):
+                index = self._load_index() if start else None
+                if index is not None:
+                    chunk_ids = list(index["chunks"])
+                    if start >= len(chunk_ids):
+                        return
+                    f.seek(index["chunks"][chunk_ids[start]][0])
+                    start = 0
+                for line in islice(f, start, None):
+                    line = line.strip().rstrip(",")
+                    if line and line != "]":
+                        yield line
+            else:
+                for chunk in islice(json.load(f), start, None):
+                    yield json.dumps(chunk)
+
+
+def _is_line_per_chunk(f):
+    """Peeks at the start of an open chunks file and rewinds it to where iteration should begin."""
+    first = f.readline()
+    if first.strip() != "[":
+        f.seek(0)
+        return False
+    position = f.tell()
+    second = f.readline().strip().rstrip(",")
+    if second == "]" or (second.startswith("{") and second.endswith("}")):
+        f.seek(position)
+        return True
+    f.seek(0)
+    return False
+
+
+def find_tail_marker(path, marker, block_size=64 * 1024):
+    """
+    Byte offset of the first occurrence of `marker` among the trailing lines of a file, found
+    by reading backwards from the end. Used to locate where the last chunk's rows start in the
+    per-chunk text artifacts. Returns None if the marker isn't there.
+    """
+    size = os.path.getsize(path)
+    tail_size = block_size
+    with open(path, "rb") as f:
+        while True:
+            start = max(0, size - tail_size)
+            f.seek(start)
+            tail = f.read()
+            found = tail.find(marker)
+            # Only trust the hit if a complete line precedes it in the window; otherwise earlier
+            # occurrences may have been cut off by the window start
+            if found >= 0 and (start == 0 or b"\n" in tail[:found]):
+                return start + found
+            if start == 0:
+                return None
+            tail_size *= 2
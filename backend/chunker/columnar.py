@@ -0,0 +1,258 @@
+import math
+from array import array
+from datetime import datetime, timedelta
+
+import numpy as np
+
+"""
+Typed column buffers used by the chunker to hold one chunk's rows.
+
+Numeric columns are parsed once into int64/float64 buffers and bitfield registers into
+uint16 buffers, instead of keeping every value as a Python string. Serialization gives back
+the strings the values were read from; values whose spelling can't be rebuilt from the
+typed buffer are kept verbatim in a small side table.
+"""
+
+NUMERIC_COLUMNS = {"Volt", "Curr", "Temp", "Perc", "SOH"}
+
+BITFIELD_COLUMNS = {
+    "BattStatus", "ChgrStatus", "OperationalStatus", "GaugeStatus",
+    "PFStatus", "PFAlert", "SafetyStatus", "SafetyAlert",
+}
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class ColumnData:
+    """Base class for a per-chunk column buffer."""
+
+    def __init__(self):
+        # Row index -> raw string for values that couldn't be stored in the typed buffer
+        self.raw_exceptions = {}
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def append(self, raw):
+        raise NotImplementedError
+
+    def value_at(self, index):
+        raise NotImplementedError
+
+    def to_list(self):
+        return [self.value_at(i) for i in range(len(self))]
+
+    def is_constant(self):
+        return len(set(self.to_list())) == 1
+
+
+class TextColumn(ColumnData):
+    def __init__(self):
+        super().__init__()
+        self.values = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def append(self, raw):
+        self.values.append(raw)
+
+    def value_at(self, index):
+        return self.values[index]
+
+    def to_list(self):
+        return list(self.values)
+
+
+class NumericColumn(ColumnData):
+    """
+    Stores integers in an int64 buffer, switching to float64 the first time a
+    non-integral value shows up. Values are serialized as the strings they were read from:
+    integers as str(value), floats with the number of decimals they were written with
+    (e.g. "3.80"). Spellings that can't be rebuilt that way ("007", "1e3") are kept in
+    raw_exceptions, still holding their parsed value in the buffer; unparseable values are
+    kept there too, with NaN in the buffer.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.buffer = array("q")
+        # Per row decimals in float64 mode, None while the column holds integers
+        self.decimals = None
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def append(self, raw):
+        index = len(self.buffer)
+        if self.decimals is None:
+            try:
+                value = int(raw)
+                self.buffer.append(value)
+            except (ValueError, OverflowError):
+                self._to_float()
+            else:
+                if str(value) != raw:
+                    self.raw_exceptions[index] = raw
+                return
+        try:
+            value = float(raw)
+            if not math.isfinite(value):
+                raise ValueError(raw)
+        except ValueError:
+            self.raw_exceptions[index] = raw
+            self.buffer.append(float("nan"))
+            self.decimals.append(0)
+            return
+        point = raw.find(".")
+        decimals = len(raw) - point - 1 if point >= 0 else 0
+        if decimals > 255 or f"{value:.{decimals}f}" != raw:
+            self.raw_exceptions[index] = raw
+            decimals = 0
+        self.buffer.append(value)
+        self.decimals.append(decimals)
+
+    def _to_float(self):
+        for index, value in enumerate(self.buffer):
+            # Beyond 2**53 float64 no longer holds every integer exactly
+            if abs(value) > 2 ** 53 and index not in self.raw_exceptions:
+                self.raw_exceptions[index] = str(value)
+        self.buffer = array("d", self.buffer)
+        self.decimals = array("B", bytes(len(self.buffer)))
+
+    def value_at(self, index):
+        if index in self.raw_exceptions:
+            return self.raw_exceptions[index]
+        if self.decimals is None:
+            return str(self.buffer[index])
+        return f"{self.buffer[index]:.{self.decimals[index]}f}"
+
+    def to_list(self):
+        if self.decimals is None:
+            values = list(map(str, self.buffer))
+        else:
+            values = [f"{value:.{decimals}f}" for value, decimals in zip(self.buffer, self.decimals)]
+        for index, raw in self.raw_exceptions.items():
+            values[index] = raw
+        return values
+
+    def to_numpy(self):
+        """Float64 view of the column with unparseable entries as NaN."""
+        values = np.frombuffer(self.buffer, dtype=np.int64 if self.decimals is None else np.float64)
+        return values.astype(np.float64)
+
+
+class BitfieldColumn(ColumnData):
+    """
+    Stores 16-bit status registers as uint16. The first spelling seen for each register
+    value (e.g. "0x0080") is remembered so serialized output matches the log.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.buffer = array("H")
+        self.spellings = {}
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def append(self, raw):
+        try:
+            value = int(raw, 16)
+            if not 0 <= value <= 0xFFFF:
+                raise ValueError(raw)
+        except ValueError:
+            self.raw_exceptions[len(self.buffer)] = raw
+            self.buffer.append(0)
+            return
+        self.spellings.setdefault(value, raw)
+        self.buffer.append(value)
+
+    def value_at(self, index):
+        if index in self.raw_exceptions:
+            return self.raw_exceptions[index]
+        return self.spellings[self.buffer[index]]
+
+    def to_list(self):
+        spellings = self.spellings
+        if not self.raw_exceptions:
+            return [spellings[v] for v in self.buffer]
+        # Exception rows hold a placeholder 0, which may have no spelling of its own
+        values = [spellings.get(v) for v in self.buffer]
+        for index, raw in self.raw_exceptions.items():
+            values[index] = raw
+        return values
+
+    def to_numpy(self):
+        return np.frombuffer(self.buffer, dtype=np.uint16)
+
+    def valid_mask(self):
+        mask = np.ones(len(self.buffer), dtype=bool)
+        if self.raw_exceptions:
+            mask[list(self.raw_exceptions)] = False
+        return mask
+
+    def unique_raw(self):
+        """Distinct values in order of first appearance, as they were spelled in the log."""
+        if not self.raw_exceptions:
+            # spellings is filled in order of first appearance, one spelling per value
+            return list(self.spellings.values())
+        return list(dict.fromkeys(self.to_list()))
+
+    def is_constant(self):
+        if self.raw_exceptions:
+            return super().is_constant()
+        return len(self.buffer) > 0 and len(self.spellings) == 1
+
+
+class TimeSeries:
+    """Per-row timestamps of a chunk, stored as int64 seconds since the Unix epoch."""
+
+    def __init__(self):
+        self.seconds = array("q")
+
+    def __len__(self):
+        return len(self.seconds)
+
+    def append(self, dt):
+        self.seconds.append(int((dt - EPOCH).total_seconds()))
+
+    def to_numpy(self):
+        return np.frombuffer(self.seconds, dtype=np.int64)
+
+    def to_strings(self, fmt="%Y-%m-%d %H:%M:%S"):
+        # Consecutive rows usually share or step by one second, so format each distinct value once
+        formatted = {}
+        result = []
+        for s in self.seconds:
+            text = formatted.get(s)
+            if text is None:
+                text = (EPOCH + timedelta(seconds=s)).strftime(fmt)
+                formatted[s] = text
+            result.append(text)
+        return result
+
+
+class PercTimeSeries:
+    """Lazy Perc_Time_Series view pairing the Perc column with the row timestamps."""
+
+    def __init__(self, perc_column, times):
+        self.perc_column = perc_column
+        self.times = times
+
+    def __len__(self):
+        return len(self.times)
+
+    def to_list(self):
+        return [
+            {"value": value, "time": time}
+            for value, time in zip(self.perc_column.to_list(), self.times.to_strings())
+        ]
+
+
+def make_column(name):
+    if name in NUMERIC_COLUMNS:
+        return NumericColumn()
+    if name in BITFIELD_COLUMNS:
+        return BitfieldColumn()
+    return TextColumn()
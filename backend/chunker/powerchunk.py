@@ -2,6 +2,9 @@ import os, csv
 import uuid
 import json
 from datetime import datetime
+from .columnar import ColumnData, PercTimeSeries, TimeSeries, make_column
+from .timestamps import parse_powerlog_timestamp
+from .chunk_store import write_chunk_index
 
 # --- Config ---
 
@@ -14,20 +17,30 @@ class PowerLogChunker:
         self.powerlog_file = powerlog_file
         self.device_name = device_name
         self.columns = columns
+        # Positions of the per-row columns inside a parsed line; PowerSrc/BattPres are chunk-level
+        self._row_columns = [(i, col) for i, col in enumerate(columns) if col not in ["PowerSrc", "BattPres"]]
+        self._battpres_index = columns.index("BattPresent") if "BattPresent" in columns else None
+        self._powersrc_index = columns.index("PowerSrc") if "PowerSrc" in columns else None
+        self.lines_processed = 0
+        # ChunkID and row count of the chunk closed by flush(), i.e. still open at the end of the input
+        self.flushed_chunk = None
+        # (datetime, values) of the last line fed, or None if it wasn't a data line
+        self.last_row = None
+        self.reset()
 
     def is_valid_data_line(self, line):
         parts = line.strip().split(",")
         if len(parts) < 10:
             return False
         try:
-            datetime.strptime(parts[0], "%m/%d/%Y %H:%M:%S")
+            parse_powerlog_timestamp(parts[0])
             return True
         except:
             return False
 
     def parse_line(self, line):
         parts = line.strip().split(",")
-        dt = datetime.strptime(parts[0], "%m/%d/%Y %H:%M:%S")
+        dt = parse_powerlog_timestamp(parts[0])
         values = parts[1:] + [""] * (len(self.columns) - len(parts[2:]))
         data = dict(zip(self.columns, values))
         data["datetime"] = dt
@@ -35,178 +48,365 @@ class PowerLogChunker:
         data["PowerSrc"] = data.get("PowerSrc", "")
         return data
 
+    def _parse_values(self, line):
+        """
+        Positional variant of parse_line used by the chunker. Validates and parses the line in
+        one pass and returns (datetime, values), or None if it isn't a data line.
+        """
+        parts = line.strip().split(",")
+        if len(parts) < 10:
+            return None
+        try:
+            dt = parse_powerlog_timestamp(parts[0])
+        except Exception:
+            return None
+        values = parts[1:]
+        if len(values) < len(self.columns):
+            values += [""] * (len(self.columns) - len(values))
+        return dt, values
+
     def simplify_chunk_fields(self, chunk):
         simplified = {}
         for key, value in chunk.items():
-            if isinstance(value, list):
-                if key == "Perc_Time_Series": # Do not simplify Perc_Time_Series
-                    simplified[key] = value
-                else:
-                    unique_values = set(value)
-                    simplified[key] = value[0] if len(unique_values) == 1 else value
+            if key == "Perc_Time_Series": # Do not simplify Perc_Time_Series
+                simplified[key] = value
+            elif isinstance(value, ColumnData):
+                simplified[key] = value.value_at(0) if value.is_constant() else value
+            elif isinstance(value, list):
+                unique_values = set(value)
+                simplified[key] = value[0] if len(unique_values) == 1 else value
             else:
                 simplified[key] = value
         return simplified
 
-    def serialize_chunks(self, chunks):
-        def serialize_chunk(chunk):
-            new_chunk = {}
-            for k, v in chunk.items():
-                if isinstance(v, datetime):
-                    new_chunk[k] = v.strftime("%Y-%m-%d %H:%M:%S")
-                elif isinstance(v, list):
-                    if k == "Perc_Time_Series":
-                        new_chunk[k] = [
-                            {"value": item["value"], "time": item["time"].strftime("%Y-%m-%d %H:%M:%S")}
-                            for item in v
-                        ]
-                    else:
-                        new_chunk[k] = [
-                            x.strftime("%Y-%m-%d %H:%M:%S") if isinstance(x, datetime) else x
-                            for x in v
-                        ]
+    def serialize_chunk(self, chunk):
+        new_chunk = {}
+        for k, v in chunk.items():
+            if isinstance(v, datetime):
+                new_chunk[k] = v.strftime("%Y-%m-%d %H:%M:%S")
+            elif isinstance(v, (ColumnData, PercTimeSeries)):
+                new_chunk[k] = v.to_list()
+            elif isinstance(v, list):
+                if k == "Perc_Time_Series":
+                    new_chunk[k] = [
+                        {"value": item["value"], "time": item["time"].strftime("%Y-%m-%d %H:%M:%S")}
+                        for item in v
+                    ]
                 else:
-                    new_chunk[k] = v
-            return new_chunk
-        return [serialize_chunk(chunk) for chunk in chunks]
+                    new_chunk[k] = [
+                        x.strftime("%Y-%m-%d %H:%M:%S") if isinstance(x, datetime) else x
+                        for x in v
+                    ]
+            else:
+                new_chunk[k] = v
+        return new_chunk
 
-    def chunk_logs(self, lines):
-        chunks = []
-        current_chunk = None
-        start_time = None
-        prev_battpres = None
-        prev_powersrc = None
+    def serialize_chunks(self, chunks):
+        return [self.serialize_chunk(chunk) for chunk in chunks]
 
-        for line in lines:
-            if not self.is_valid_data_line(line):
-                if current_chunk:
-                    end_time = current_chunk["_last_time"]
-                    current_chunk["EndDate"] = end_time.strftime("%m/%d/%Y")
-                    current_chunk["EndTime"] = end_time.strftime("%H:%M:%S")
-                    current_chunk["TotalTime"] = str(end_time - start_time)
-                    del current_chunk["_last_time"]
-                    chunks.append(self.simplify_chunk_fields(current_chunk))
-                    current_chunk = None
-                    prev_battpres = None
-                    prev_powersrc = None
-                continue
-
-            record = self.parse_line(line)
-            batt_pres = record["BattPres"]
-            power_src = record["PowerSrc"]
-
-            if current_chunk is None:
-                start_time = record["datetime"]
-                current_chunk = {
-                    "ChunkID": str(uuid.uuid4()),
-                    "StartDate": start_time.strftime("%m/%d/%Y"),
-                    "StartTime": start_time.strftime("%H:%M:%S"),
-                    "BattPres": batt_pres,
-                    "PowerSrc": power_src,
-                    "_last_time": record["datetime"],
-                    "Perc_Time_Series": [] # Always initialize Perc_Time_Series
-                }
-                for col in self.columns:
-                    if col not in ["PowerSrc", "BattPres"]:
-                        current_chunk[col] = [record.get(col, "")]
-                # Store Perc with its timestamp
-                if "Perc" in self.columns:
-                    current_chunk["Perc_Time_Series"].append({"value": record.get("Perc", ""), "time": record["datetime"]})
-                prev_battpres = batt_pres
-                prev_powersrc = power_src
-                continue
+    def reset(self):
+        self._current_chunk = None
+        self._start_time = None
+        self._prev_battpres = None
+        self._prev_powersrc = None
+
+    def _new_chunk(self, start_time, batt_pres, power_src):
+        chunk = {
+            "ChunkID": str(uuid.uuid4()),
+            "StartDate": start_time.strftime("%m/%d/%Y"),
+            "StartTime": start_time.strftime("%H:%M:%S"),
+            "BattPres": batt_pres,
+            "PowerSrc": power_src,
+            "_last_time": start_time,
+            "_times": TimeSeries(),
+            "Perc_Time_Series": [] # Always initialize Perc_Time_Series
+        }
+        for _, col in self._row_columns:
+            chunk[col] = make_column(col)
+        # Perc values are stored once and paired with the row timestamps on serialization
+        if "Perc" in self.columns:
+            chunk["Perc_Time_Series"] = PercTimeSeries(chunk["Perc"], chunk["_times"])
+        return chunk
+
+    def _append_values(self, chunk, dt, values):
+        for i, col in self._row_columns:
+            chunk[col].append(values[i])
+        chunk["_times"].append(dt)
+        chunk["_last_time"] = dt
+
+    def _close_chunk(self):
+        chunk = self._current_chunk
+        end_time = chunk.pop("_last_time")
+        chunk.pop("_times")
+        chunk["EndDate"] = end_time.strftime("%m/%d/%Y")
+        chunk["EndTime"] = end_time.strftime("%H:%M:%S")
+        chunk["TotalTime"] = str(end_time - self._start_time)
+        self.reset()
+        return self.simplify_chunk_fields(chunk)
+
+    def feed_line(self, line):
+        """
+        Pushes one raw log line through the chunking state machine.
+        Returns the chunk finalized by this line, or None while the current chunk is still open.
+        """
+        self.lines_processed += 1
+        parsed = self._parse_values(line)
+        self.last_row = parsed
+        if parsed is None:
+            return self._close_chunk() if self._current_chunk else None
+
+        dt, values = parsed
+        batt_pres = values[self._battpres_index] if self._battpres_index is not None else ""
+        power_src = values[self._powersrc_index] if self._powersrc_index is not None else ""
+        finished = None
 
+        if self._current_chunk is not None:
             state_changed = (
-                (batt_pres != prev_battpres) or
-                (power_src != prev_powersrc) or
-                (record["datetime"].date() != start_time.date())
+                (batt_pres != self._prev_battpres) or
+                (power_src != self._prev_powersrc) or
+                (dt.date() != self._start_time.date())
             )
-
             if state_changed:
-                end_time = current_chunk["_last_time"]
-                current_chunk["EndDate"] = end_time.strftime("%m/%d/%Y")
-                current_chunk["EndTime"] = end_time.strftime("%H:%M:%S")
-                current_chunk["TotalTime"] = str(end_time - start_time)
-                del current_chunk["_last_time"]
-                chunks.append(self.simplify_chunk_fields(current_chunk))
-
-                start_time = record["datetime"]
-                current_chunk = {
-                    "ChunkID": str(uuid.uuid4()),
-                    "StartDate": start_time.strftime("%m/%d/%Y"),
-                    "StartTime": start_time.strftime("%H:%M:%S"),
-                    "BattPres": batt_pres,
-                    "PowerSrc": power_src,
-                    "_last_time": record["datetime"],
-                }
-                for col in self.columns:
-                    if col not in ["PowerSrc", "BattPres"]:
-                        current_chunk[col] = [record.get(col, "")]
-                prev_battpres = batt_pres
-                prev_powersrc = power_src
-            else:
-                for col in self.columns:
-                    if col not in ["PowerSrc", "BattPres"]:
-                        current_chunk[col].append(record.get(col, ""))
-                # Ensure Perc_Time_Series exists before appending
-                current_chunk.setdefault("Perc_Time_Series", [])
-                # Store Perc with its timestamp
-                if "Perc" in self.columns:
-                    current_chunk["Perc_Time_Series"].append({"value": record.get("Perc", ""), "time": record["datetime"]})
-                current_chunk["_last_time"] = record["datetime"]
-
-        if current_chunk:
-            end_time = current_chunk["_last_time"]
-            current_chunk["EndDate"] = end_time.strftime("%m/%d/%Y")
-            current_chunk["EndTime"] = end_time.strftime("%H:%M:%S")
-            current_chunk["TotalTime"] = str(end_time - start_time)
-            del current_chunk["_last_time"]
-            chunks.append(self.simplify_chunk_fields(current_chunk))
-
-        return chunks
+                finished = self._close_chunk()
+
+        if self._current_chunk is None:
+            self._start_time = dt
+            self._current_chunk = self._new_chunk(dt, batt_pres, power_src)
+            self._prev_battpres = batt_pres
+            self._prev_powersrc = power_src
+
+        self._append_values(self._current_chunk, dt, values)
+        return finished
+
+    @property
+    def current_chunk(self):
+        """The chunk being built (unserialized), or None between chunks."""
+        return self._current_chunk
+
+    @property
+    def current_chunk_id(self):
+        return self._current_chunk["ChunkID"] if self._current_chunk else None
+
+    def flush(self):
+        """Finalizes and returns the open chunk, if any."""
+        if not self._current_chunk:
+            return None
+        self.flushed_chunk = {
+            "ChunkID": self._current_chunk["ChunkID"],
+            "rows": len(self._current_chunk["_times"]),
+        }
+        return self._close_chunk()
+
+    def resume_chunk(self, serialized, rows):
+        """
+        Reopens a chunk written by serialize_chunk (e.g. read back from the chunks file) as the
+        open chunk, so lines appended to the log continue it exactly as if it had never been
+        flushed. rows: the chunk's row count, needed for columns stored as a single value.
+        """
+        start_time = datetime.strptime(f"{serialized['StartDate']} {serialized['StartTime']}", "%m/%d/%Y %H:%M:%S")
+        end_time = datetime.strptime(f"{serialized['EndDate']} {serialized['EndTime']}", "%m/%d/%Y %H:%M:%S")
+        chunk = self._new_chunk(start_time, serialized["BattPres"], serialized["PowerSrc"])
+        chunk["ChunkID"] = serialized["ChunkID"]
+
+        series = serialized.get("Perc_Time_Series") or []
+        if len(series) == rows:
+            times = [datetime.strptime(item["time"], "%Y-%m-%d %H:%M:%S") for item in series]
+        else:
+            # Row times are only kept alongside Perc; without it they are never serialized
+            times = [start_time] * rows
+
+        for _, col in self._row_columns:
+            value = serialized.get(col, "")
+            values = value if isinstance(value, list) else [value] * rows
+            if len(values) != rows:
+                raise ValueError(f"Chunk {serialized['ChunkID']}: {col} has {len(values)} values, expected {rows}")
+            column = chunk[col]
+            for v in values:
+                column.append(v if isinstance(v, str) else str(v))
+        for dt in times:
+            chunk["_times"].append(dt)
+
+        chunk["_last_time"] = end_time
+        self._current_chunk = chunk
+        self._start_time = start_time
+        self._prev_battpres = serialized["BattPres"]
+        self._prev_powersrc = serialized["PowerSrc"]
+
+    def iter_chunks(self, lines, resume=False):
+        """
+        Lazily chunks an iterable of lines (e.g. an open file), yielding each chunk as soon as
+        it is finalized so only the chunk being built is held in memory.
+        resume: continue the chunk reopened with resume_chunk() instead of starting afresh.
+        """
+        if not resume:
+            self.reset()
+        self.lines_processed = 0
+        self.flushed_chunk = None
+        for line in lines:
+            chunk = self.feed_line(line)
+            if chunk is not None:
+                yield chunk
+        chunk = self.flush()
+        if chunk is not None:
+            yield chunk
+
+    def chunk_logs(self, lines):
+        return list(self.iter_chunks(lines))
+
+    def summary_file_path(self, output_dir):
+        return os.path.join(output_dir, f"chunk_summary_{self.device_name}.csv")
+
+    def json_file_path(self, output_dir):
+        return os.path.join(output_dir, f"chunks_{self.device_name}.json")
 
     def save_chunk_summary_table(self, chunks, output_dir):
-        summary_file = os.path.join(output_dir, f"chunk_summary_{self.device_name}.csv")
-        with open(summary_file, "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                "ChunkID", "StartDate", "StartTime", "EndDate", "EndTime", 
-                "TotalTime", "BattPres", "PowerSrc"
-            ])
+        summary_file = self.summary_file_path(output_dir)
+        with ChunkSummaryWriter(summary_file) as writer:
             for chunk in chunks:
-                writer.writerow([
-                    chunk.get("ChunkID"),
-                    chunk.get("StartDate"),
-                    chunk.get("StartTime"),
-                    chunk.get("EndDate"),
-                    chunk.get("EndTime"),
-                    chunk.get("TotalTime"),
-                    chunk.get("BattPres"),
-                    chunk.get("PowerSrc"),
-                ])
+                writer.write(chunk)
         print(f" Summary table saved to {summary_file}")
 
 
     def save_chunks_to_json(self, chunks, output_dir):
-        filename = os.path.join(output_dir, f"chunks_{self.device_name}.json")
-        serializable_chunks = self.serialize_chunks(chunks)
-        with open(filename, "w") as f:
-            json.dump(serializable_chunks, f, indent=2)
-        print(f"{len(chunks)} chunks saved to {filename}")
+        filename = self.json_file_path(output_dir)
+        with ChunkJSONWriter(filename, self) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+        print(f"{writer.count} chunks saved to {filename}")
         return filename
 
-def generate_chunks(powerlog_file_path, output_dir, device_name):
+
+SUMMARY_FIELDS = [
+    "ChunkID", "StartDate", "StartTime", "EndDate", "EndTime",
+    "TotalTime", "BattPres", "PowerSrc"
+]
+
+
+class ChunkSummaryWriter:
+    """Writes one chunk_summary CSV row per chunk as chunks are produced."""
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self.append = append
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def __enter__(self):
+        self._file = open(self.path, "a" if self.append else "w", newline="")
+        self._writer = csv.writer(self._file)
+        if not self.append:
+            self._writer.writerow(SUMMARY_FIELDS)
+        return self
+
+    def write(self, chunk):
+        self._writer.writerow([chunk.get(field) for field in SUMMARY_FIELDS])
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        return False
+
+
+class ChunkJSONWriter:
+    """
+    Streams chunks into a JSON array, one serialized chunk per line, so the file never has
+    to be assembled in memory. The result is a regular JSON list readable with json.load.
+    Each chunk's byte span is recorded in a sidecar index for random access by ChunkID.
+
+    existing_offsets: append to a chunks file that has been cut back to end right after its
+    last chunk (see incremental_analysis.py); maps the ChunkIDs it holds to their spans.
+    """
+
+    def __init__(self, path, chunker, existing_offsets=None):
+        self.path = path
+        self.chunker = chunker
+        self.existing_offsets = existing_offsets
+        self.count = 0
+        self.offsets = {}
+        self._position = 0
+        self._file = None
+
+    def _write(self, text):
+        # json.dumps output is ASCII, so characters written == bytes written
+        self._file.write(text)
+        self._position += len(text)
+
+    def __enter__(self):
+        if self.existing_offsets is not None:
+            self.offsets = dict(self.existing_offsets)
+            self.count = len(self.offsets)
+            self._position = os.path.getsize(self.path)
+            self._file = open(self.path, "a", newline="")
+            return self
+        self._file = open(self.path, "w", newline="")
+        self._write("[\n")
+        return self
+
+    def write(self, chunk):
+        if self.count:
+            self._write(",\n")
+        serialized = json.dumps(self.chunker.serialize_chunk(chunk))
+        self.offsets[chunk["ChunkID"]] = (self._position, len(serialized))
+        self._write(serialized)
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, tb):
+        self._write("\n]\n")
+        self._file.close()
+        write_chunk_index(self.path, self.offsets, self._position)
+        return False
+
+
+# Lines read between progress reports, so a chunk spanning a long stretch of the log can't hold up cancellation
+PROGRESS_EVERY_LINES = 10000
+
+
+def _reporting_lines(lines, chunker, json_writer, progress):
+    for i, line in enumerate(lines, 1):
+        if i % PROGRESS_EVERY_LINES == 0:
+            progress(chunker.lines_processed, json_writer.count)
+        yield line
+
+
+def generate_chunks_from_lines(lines, output_dir, device_name, progress=None, chunker=None, existing_offsets=None):
+    """
+    Chunks an iterable of log lines and streams the result to the chunks JSON and summary CSV.
+    Returns the chunks JSON path.
+
+    progress: optional callback progress(lines_processed, chunks_emitted), called after every
+    chunk and every PROGRESS_EVERY_LINES lines. Exceptions it raises (e.g. cancellation) abort
+    chunking.
+    chunker / existing_offsets: incremental mode. The given chunker continues the chunk it
+    has reopened and both files are appended to (see incremental_analysis.py).
+    """
+    resume = existing_offsets is not None
+    chunker = chunker or PowerLogChunker(None, device_name, COLUMNS)
+    json_file_path = chunker.json_file_path(output_dir)
+    summary_file = chunker.summary_file_path(output_dir)
+
+    # Hand each finished chunk straight to the writers, so peak memory is bounded
+    # by the largest chunk rather than the size of the input.
+    with ChunkJSONWriter(json_file_path, chunker, existing_offsets) as json_writer, \
+            ChunkSummaryWriter(summary_file, append=resume) as summary_writer:
+        if progress:
+            lines = _reporting_lines(lines, chunker, json_writer, progress)
+        for chunk in chunker.iter_chunks(lines, resume=resume):
+            json_writer.write(chunk)
+            summary_writer.write(chunk)
+            if progress:
+                progress(chunker.lines_processed, json_writer.count)
+
+    if progress:
+        progress(chunker.lines_processed, json_writer.count)
+    print(f"{json_writer.count} chunks saved to {json_file_path}")
+    print(f" Summary table saved to {summary_file}")
+    return json_file_path
+
+def generate_chunks(powerlog_file_path, output_dir, device_name, progress=None):
     if not os.path.exists(powerlog_file_path):
         print(f"File '{powerlog_file_path}' not found.")
         return None
 
-    chunker = PowerLogChunker(powerlog_file_path, device_name, COLUMNS)
-
     with open(powerlog_file_path, "r") as f:
-        lines = f.readlines()
-
-    chunks = chunker.chunk_logs(lines)
-    json_file_path = chunker.save_chunks_to_json(chunks, output_dir)
-    chunker.save_chunk_summary_table(chunks, output_dir)
-    
-    return json_file_path
\ No newline at end of file
+        return generate_chunks_from_lines(f, output_dir, device_name, progress)
@@ -0,0 +1,98 @@
+import re
+from collections import OrderedDict
+from datetime import datetime
+
+"""
+Fixed-layout timestamp parsing shared by the powerlog chunker and the messages filter.
+
+datetime.strptime is slow and both log formats use a fixed layout, so timestamps are
+sliced and converted directly. Log lines arrive many times per second, so parsed values
+are memoized per distinct second (messages milliseconds are applied to the memoized value);
+anything that doesn't fit the fast layout falls back to strptime, which keeps the accepted
+formats identical.
+"""
+
+POWERLOG_TIMESTAMP_FORMAT = "%m/%d/%Y %H:%M:%S"
+MESSAGES_TIMESTAMP_FORMAT = "%Y %b %d %H:%M:%S"
+
+# "Jul  9 12:34:56.789" at the start of a messages line
+MESSAGES_TIMESTAMP_RE = re.compile(r'(\w{3})\s+(\d{1,2})\s+(\d{2}):(\d{2}):(\d{2})\.(\d{3})')
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+_CACHE_LIMIT = 4096
+
+
+class TimestampCache:
+    """Small LRU memo of recently parsed timestamps."""
+
+    def __init__(self, limit=_CACHE_LIMIT):
+        self.limit = limit
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        if len(self.entries) > self.limit:
+            self.entries.popitem(last=False)
+
+
+_powerlog_cache = TimestampCache()
+_messages_cache = TimestampCache()
+
+
+def parse_powerlog_timestamp(text):
+    """
+    Parses "MM/DD/YYYY HH:MM:SS". Raises ValueError for anything strptime would reject.
+    """
+    dt = _powerlog_cache.get(text)
+    if dt is not None:
+        return dt
+
+    if (len(text) == 19 and text[2] == "/" and text[5] == "/" and text[10] == " "
+            and text[13] == ":" and text[16] == ":"
+            and (text[0:2] + text[3:5] + text[6:10] + text[11:13] + text[14:16] + text[17:19]).isdigit()):
+        dt = datetime(
+            int(text[6:10]), int(text[0:2]), int(text[3:5]),
+            int(text[11:13]), int(text[14:16]), int(text[17:19]),
+        )
+    else:
+        dt = datetime.strptime(text, POWERLOG_TIMESTAMP_FORMAT)
+
+    _powerlog_cache.put(text, dt)
+    return dt
+
+
+def parse_messages_timestamp(line, year):
+    """
+    Parses the "Mon DD HH:MM:SS.mmm" prefix of a messages line, using the given year.
+
+    Returns None when the line doesn't start with a timestamp (a continuation line) and
+    raises ValueError when it does but the date itself is invalid.
+    """
+    match = MESSAGES_TIMESTAMP_RE.match(line)
+    if not match:
+        return None
+
+    month_name, day, hour, minute, second, millis = match.groups()
+    # Lines within the same second share an entry
+    key = (year, month_name, day, hour, minute, second)
+    dt = _messages_cache.get(key)
+    if dt is None:
+        month = MONTHS.get(month_name.lower())
+        if month is None:
+            # Let strptime decide on locale-specific month names
+            dt = datetime.strptime(f"{year} {month_name} {day} {hour}:{minute}:{second}", MESSAGES_TIMESTAMP_FORMAT)
+        else:
+            dt = datetime(year, month, int(day), int(hour), int(minute), int(second))
+        _messages_cache.put(key, dt)
+
+    return dt.replace(microsecond=int(millis) * 1000)
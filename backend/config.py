@@ -4,10 +4,70 @@ import os
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 
 # API Keys
-OPENAI_API_KEY = "Your_API_Key_Here"
-OPENAI_BASE_URL = "https://openrouter.ai/api/v1"
+OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', "Your_API_Key_Here")
+# Point at a local OpenAI-compatible server (e.g. chatbot/fake_openai_server.py) for testing
+OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL', "https://openrouter.ai/api/v1")
 
 # Folder Paths
 UPLOAD_FOLDER = os.path.join(PROJECT_ROOT, 'dataset', 'uploaded_files')
 DATASET_FOLDER = os.path.join(PROJECT_ROOT, 'dataset')
 RAG_DATA_FOLDER = os.path.join(PROJECT_ROOT, 'RAG_DATA')
+
+# Analysis
+# Keep a merged copy of the raw PowerlogFile in each issue folder (served by /get_powerlog_file)
+KEEP_RAW_POWERLOG = True
+
+# Content-addressed cache of analysis results, shared across issues with identical input logs
+ANALYSIS_CACHE_FOLDER = os.path.join(DATASET_FOLDER, '.analysis_cache')
+ANALYSIS_CACHE_MAX_BYTES = 5 * 1024 ** 3
+
+# Re-analysing an issue only reads log lines added since its last analysis, when the logs allow it
+INCREMENTAL_ANALYSIS = True
+
+# Background analysis jobs: concurrent analyses (each holds at most one chunk in memory) and queue depth
+ANALYSIS_MAX_CONCURRENT_JOBS = 2
+ANALYSIS_MAX_QUEUED_JOBS = 8
+
+# Worker processes used to analyse the chunks of one log (1 = in-process), shared out between concurrent jobs
+ANALYSIS_WORKERS = max(1, (os.cpu_count() or 1) // ANALYSIS_MAX_CONCURRENT_JOBS)
+
+# Live power log stream: rolling stats window (rows) and how often they are sent (every N rows)
+LIVE_STATS_WINDOW = 60
+LIVE_STATS_EVERY = 10
+# Replay this log file instead of connecting to the device over SSH (e.g. for testing), paced per line
+LIVE_LOG_REPLAY_FILE = os.environ.get('LIVE_LOG_REPLAY_FILE')
+LIVE_LOG_REPLAY_INTERVAL = float(os.environ.get('LIVE_LOG_REPLAY_INTERVAL', '0.1'))
+# Clients watching the same device share one upstream connection: recent frames replayed to new
+# clients, frames a slow client may lag behind before the oldest are dropped, seconds the upstream
+# stays open after the last client left, and seconds of silence before a keepalive is sent
+LIVE_STREAM_BUFFER_FRAMES = 200
+LIVE_STREAM_CLIENT_QUEUE = 1000
+LIVE_STREAM_IDLE_SECONDS = 30
+LIVE_STREAM_HEARTBEAT_SECONDS = 15
+
+# Requirement ingestion: texts per embedding forward pass, records per bulk database write
+# (one Lance fragment each), and processes converting PDFs in parallel
+EMBED_BATCH_SIZE = 64
+INGEST_BATCH_SIZE = 512
+INGEST_EXTRACT_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+# Embedding model, loaded on first use. EMBED_BACKEND "onnx" runs it through ONNX Runtime (needs
+# sentence-transformers[onnx]) from EMBED_ONNX_FILE, e.g. a quantized "onnx/model_qint8_avx512.onnx"
+EMBED_MODEL_NAME = os.environ.get('EMBED_MODEL_NAME', 'all-MiniLM-L6-v2')
+EMBED_BACKEND = os.environ.get('EMBED_BACKEND', 'torch')
+EMBED_ONNX_FILE = os.environ.get('EMBED_ONNX_FILE')
+# Load the model in the background when the chatbot starts, instead of on the first question
+EMBED_WARM_UP = False
+# Embeddings kept in memory (LRU), and an optional SQLite file persisting them across restarts
+EMBED_CACHE_SIZE = 4096
+EMBED_CACHE_PATH = os.environ.get('EMBED_CACHE_PATH')
+# Requirement records given to the chatbot per question (exact id matches, else hybrid search)
+REQUIREMENT_TOP_K = 3
+
+# Chat LLM, and the cache of its responses: answers kept in memory (LRU), seconds an answer is
+# reused (0 = only coalesce concurrent identical questions), optional SQLite file persisting them
+CHAT_MODEL = "deepseek/deepseek-r1-0528-qwen3-8b:free"
+CHAT_TEMPERATURE = 0.7
+CHAT_CACHE_SIZE = 512
+CHAT_CACHE_TTL_SECONDS = 3600
+CHAT_CACHE_PATH = os.environ.get('CHAT_CACHE_PATH')
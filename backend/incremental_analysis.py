@@ -0,0 +1,339 @@
+import os
+import json
+import shutil
+import hashlib
+from chunker.powerchunk import COLUMNS, PowerLogChunker, generate_chunks_from_lines
+from chunker.chunk_store import ChunkStore, chunk_index_path, find_tail_marker
+from log_processor import TrackedLogLines, open_log_file
+from PowerLogAnalyser import powerLogAnalysis
+from analysis_cache import compute_cache_key
+
+"""
+Incremental re-analysis of an issue whose device logs have grown since it was analysed.
+
+After every path analysis, ingest_state.json in the issue folder records, for each powerlog
+source file, a fingerprint of its first FINGERPRINT_BYTES decompressed bytes and how many
+bytes of it were consumed, plus the chunk that was still open when the input ended. Files
+are matched by fingerprint rather than name, so a PowerlogFile that has since been rotated
+(renamed and gzipped) is still recognised.
+
+When the sources line up with the recorded ones, only the new bytes are read. The open chunk
+is read back from the chunks file and reopened; the chunker closes it again straight away if
+the new lines' BattPres/PowerSrc/date don't continue it. The chunks file, chunk summary CSV,
+analysis summary and stats CSV are cut back to just before that chunk and appended to, so the
+result matches a full rebuild (chunks closed earlier keep their ChunkIDs). Anything that
+doesn't line up falls back to a full rebuild. An update that is cancelled or fails puts the
+cut-off tails, the raw log's length and the state back, so the previous report survives.
+"""
+
+STATE_FILE = "ingest_state.json"
+STATE_VERSION = 1
+FINGERPRINT_BYTES = 4096
+
+
+def state_path(issue_dir):
+    return os.path.join(issue_dir, STATE_FILE)
+
+
+def fingerprint(file_path, length=FINGERPRINT_BYTES):
+    """(bytes hashed, sha256) of the first `length` decompressed bytes of a log file."""
+    with open_log_file(file_path) as f:
+        head = f.read(length)
+    return len(head), hashlib.sha256(head).hexdigest()
+
+
+def _matches(entry, file_path, heads):
+    length = entry["head_bytes"]
+    key = (file_path, length)
+    if key not in heads:
+        heads[key] = fingerprint(file_path, length)
+    return heads[key] == (length, entry["head_sha256"])
+
+
+def _has_at_least(file_path, size):
+    """Whether the decompressed content of a log file is at least `size` bytes long."""
+    if not file_path.endswith('.gz'):
+        return os.path.getsize(file_path) >= size
+    remaining = size
+    with open_log_file(file_path) as f:
+        while remaining > 0:
+            block = f.read(min(remaining, 1024 * 1024))
+            if not block:
+                return False
+            remaining -= len(block)
+    return True
+
+
+def _artifact_paths(issue_dir, issue_name):
+    return {
+        "json": os.path.join(issue_dir, f"chunks_{issue_name}.json"),
+        "index": chunk_index_path(os.path.join(issue_dir, f"chunks_{issue_name}.json")),
+        "csv": os.path.join(issue_dir, f"chunk_summary_{issue_name}.csv"),
+        "summary": os.path.join(issue_dir, "powerchunk_analysis_summary.txt"),
+        "stats": os.path.join(issue_dir, powerLogAnalysis.STATS_FILE_NAME),
+        "raw": os.path.join(issue_dir, "PowerlogFile.txt"),
+    }
+
+
+def _definitions_key():
+    # Same inputs as the analysis cache key minus the logs: a change means every chunk's analysis changes
+    return compute_cache_key([])
+
+
+def save_ingest_state(issue_dir, source_files, consumed, flushed_chunk, chunk_count, last_timestamp):
+    """Records what has been ingested for the next incremental run."""
+    sources = []
+    for file_path in source_files:
+        offset = consumed.get(file_path, 0)
+        if not offset:
+            continue
+        head_bytes, head_sha256 = fingerprint(file_path)
+        sources.append({
+            "name": os.path.basename(file_path),
+            "head_bytes": head_bytes,
+            "head_sha256": head_sha256,
+            "offset": offset,
+        })
+    state = {
+        "version": STATE_VERSION,
+        "definitions": _definitions_key(),
+        "sources": sources,
+        "chunks": chunk_count,
+        "open_chunk": flushed_chunk,
+        "last_timestamp": last_timestamp,
+    }
+    tmp_path = state_path(issue_dir) + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, state_path(issue_dir))
+
+
+def load_ingest_state(issue_dir):
+    try:
+        with open(state_path(issue_dir)) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if state.get("version") == STATE_VERSION else None
+
+
+def last_chunk_timestamp(chunk):
+    return f"{chunk['EndDate']} {chunk['EndTime']}"
+
+
+class IncrementalPlan:
+    """What an incremental run will read and where it will cut the existing artifacts."""
+
+    def __init__(self, issue_dir, issue_name, state, sources, source_files, artifacts):
+        self.issue_dir = issue_dir
+        self.issue_name = issue_name
+        self.state = state
+        self.sources = sources            # [(file_path, start_offset)] still to read
+        self.source_files = source_files  # every current source, for the next state
+        self.consumed = {}                # bytes already consumed of the current sources
+        self.artifacts = artifacts
+        self.cuts = {}                    # artifact -> byte offset to truncate at
+        self.open_chunk = None            # serialized chunk to reopen
+        self.existing_offsets = None      # chunk index entries kept
+        self.first_chunk = 0              # index of the first chunk to (re)analyse
+
+    @property
+    def up_to_date(self):
+        return not self.sources
+
+
+def plan_incremental(issue_dir, issue_name, powerlog_files):
+    """
+    Works out whether the issue can be brought up to date incrementally. Returns an
+    IncrementalPlan, or None (with the reason printed) if a full rebuild is needed.
+    """
+    def full_rebuild(reason):
+        print(f"Incremental analysis of '{issue_name}' not possible ({reason}); rebuilding.")
+        return None
+
+    state = load_ingest_state(issue_dir)
+    if state is None:
+        return None
+    if state["definitions"] != _definitions_key():
+        return full_rebuild("analysis definitions changed")
+
+    artifacts = _artifact_paths(issue_dir, issue_name)
+    for name in ("json", "csv", "summary", "stats"):
+        if not os.path.exists(artifacts[name]):
+            return full_rebuild(f"{os.path.basename(artifacts[name])} is missing")
+    store = ChunkStore(artifacts["json"])
+    if not store.is_line_per_chunk():
+        return full_rebuild("chunks file predates the streaming format")
+    index = store.index()
+    if index is None or len(index["chunks"]) != state["chunks"]:
+        return full_rebuild("chunks file doesn't match the recorded state")
+
+    # Match the current files against the recorded ones: everything before the file that was
+    # last read from must be already-consumed history, everything after it is new
+    files = [f for f in powerlog_files if fingerprint(f, 1)[0]]
+    recorded = state["sources"]
+    if not recorded:
+        return full_rebuild("nothing was recorded")
+    heads = {}
+    consumed = {}
+    next_recorded = 0
+    resume_index = None
+    for i, file_path in enumerate(files):
+        match = next((k for k in range(next_recorded, len(recorded))
+                      if _matches(recorded[k], file_path, heads)), None)
+        if match is None:
+            return full_rebuild(f"{os.path.basename(file_path)} doesn't continue the analysed logs")
+        next_recorded = match + 1
+        consumed[file_path] = recorded[match]["offset"]
+        if match == len(recorded) - 1:
+            resume_index = i
+            break
+        if not file_path.endswith('.gz') and os.path.getsize(file_path) != recorded[match]["offset"]:
+            return full_rebuild(f"{os.path.basename(file_path)} changed after it was analysed")
+    if resume_index is None:
+        return full_rebuild("the last analysed log file is gone")
+
+    resume_file = files[resume_index]
+    offset = recorded[-1]["offset"]
+    if not _has_at_least(resume_file, offset):
+        return full_rebuild(f"{os.path.basename(resume_file)} is shorter than when it was analysed")
+
+    new_files = files[resume_index + 1:]
+    for file_path in new_files:
+        if any(_matches(entry, file_path, heads) for entry in recorded):
+            return full_rebuild(f"{os.path.basename(file_path)} was already analysed but is out of order")
+    if not new_files and not _has_at_least(resume_file, offset + 1):
+        plan = IncrementalPlan(issue_dir, issue_name, state, [], files, artifacts)
+        plan.consumed = consumed
+        return plan
+
+    plan = IncrementalPlan(
+        issue_dir, issue_name, state,
+        [(resume_file, offset)] + [(f, 0) for f in new_files],
+        files, artifacts,
+    )
+    plan.consumed = consumed
+
+    # Find where the open chunk starts in every artifact before anything is modified
+    kept = dict(index["chunks"])
+    open_chunk = state["open_chunk"]
+    if open_chunk is not None:
+        chunk_id = open_chunk["ChunkID"]
+        if list(kept)[-1:] != [chunk_id]:
+            return full_rebuild("the open chunk isn't the last one in the chunks file")
+        chunk_offset = kept.pop(chunk_id)[0]
+        # Drop the ",\n" separating it from the previous chunk
+        plan.cuts["json"] = chunk_offset - 2 if kept else chunk_offset
+        for name, marker in (("csv", f"\n{chunk_id},"), ("stats", f"\n{chunk_id},"),
+                             ("summary", f"🧩 ChunkID: {chunk_id}")):
+            position = find_tail_marker(artifacts[name], marker.encode("utf-8"))
+            if position is None:
+                return full_rebuild(f"chunk {chunk_id} not found in {os.path.basename(artifacts[name])}")
+            # The CSV markers include the newline ending the previous row
+            plan.cuts[name] = position + 1 if marker.startswith("\n") else position
+        plan.open_chunk = store.get(chunk_id)
+        if plan.open_chunk is None:
+            return full_rebuild(f"chunk {chunk_id} can't be read back")
+    else:
+        # Strip the closing "\n]\n" so new chunks can follow the last one
+        plan.cuts["json"] = index["source_size"] - 3
+    plan.existing_offsets = kept
+    plan.first_chunk = len(kept)
+    return plan
+
+
+def _detach(path):
+    """Replaces a hard-linked file (e.g. shared with the analysis cache) by a private copy."""
+    if os.path.exists(path) and os.stat(path).st_nlink > 1:
+        tmp_path = path + ".detach"
+        shutil.copy2(path, tmp_path)
+        os.replace(tmp_path, path)
+
+
+def _truncate(path, size):
+    with open(path, "r+b") as f:
+        f.truncate(size)
+
+
+def _snapshot(artifacts, cuts):
+    """
+    What run_incremental is about to change: each artifact's size and the tail it cuts off
+    (the whole file for the chunk index, which is rewritten). The raw log is only appended to.
+    """
+    snapshot = {}
+    for name, path in artifacts.items():
+        if not os.path.exists(path):
+            continue
+        start = 0 if name == "index" else cuts.get(name, os.path.getsize(path))
+        with open(path, "rb") as f:
+            f.seek(start)
+            snapshot[name] = (start, f.read())
+    return snapshot
+
+
+def _restore(artifacts, snapshot):
+    """Puts the artifacts back as they were when _snapshot was taken."""
+    for name, path in artifacts.items():
+        if name not in snapshot:
+            if os.path.exists(path):
+                os.remove(path)
+            continue
+        start, tail = snapshot[name]
+        with open(path, "r+b") as f:
+            f.truncate(start)
+            f.seek(start)
+            f.write(tail)
+
+
+def run_incremental(plan, keep_raw=True, progress=None):
+    """
+    Appends the new log lines to an issue's artifacts as laid out by plan_incremental.
+    Returns the number of new lines read.
+    """
+    if plan.up_to_date:
+        print(f"'{plan.issue_name}' is already up to date.")
+        return 0
+
+    artifacts = plan.artifacts
+    # Invalidate the state first: if this run is interrupted, the next one rebuilds from scratch
+    with open(state_path(plan.issue_dir), "rb") as f:
+        saved_state = f.read()
+    os.remove(state_path(plan.issue_dir))
+    for path in artifacts.values():
+        _detach(path)
+    # A cancelled or failed run puts the previous report back instead
+    snapshot = _snapshot(artifacts, plan.cuts)
+    for name, size in plan.cuts.items():
+        _truncate(artifacts[name], size)
+
+    chunker = PowerLogChunker(None, plan.issue_name, COLUMNS)
+    if plan.open_chunk is not None:
+        chunker.resume_chunk(plan.open_chunk, plan.state["open_chunk"]["rows"])
+
+    tee_path = artifacts["raw"] if keep_raw and os.path.exists(artifacts["raw"]) else None
+    lines = TrackedLogLines(plan.sources, tee_path=tee_path, tee_append=True, hold_partial=True)
+    try:
+        chunks_json_path = generate_chunks_from_lines(
+            lines, plan.issue_dir, plan.issue_name, progress,
+            chunker=chunker, existing_offsets=plan.existing_offsets,
+        )
+        powerLogAnalysis.analyze_power_log(chunks_json_path, first_chunk=plan.first_chunk, progress=progress)
+    except Exception:
+        lines.close()  # closes the raw tee file before it is restored
+        _restore(artifacts, snapshot)
+        with open(state_path(plan.issue_dir), "wb") as f:
+            f.write(saved_state)
+        raise
+
+    store = ChunkStore(chunks_json_path)
+    chunk_ids = store.chunk_ids()
+    last_timestamp = plan.state["last_timestamp"]
+    if chunk_ids:
+        last_timestamp = last_chunk_timestamp(store.get(chunk_ids[-1]))
+    consumed = dict(plan.consumed)
+    consumed.update(lines.consumed)
+    save_ingest_state(plan.issue_dir, plan.source_files, consumed, chunker.flushed_chunk,
+                      len(chunk_ids), last_timestamp)
+    print(f"Incremental analysis of '{plan.issue_name}': {chunker.lines_processed} new lines, "
+          f"{len(chunk_ids) - plan.first_chunk} chunks added or updated.")
+    return chunker.lines_processed
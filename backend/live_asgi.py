@@ -0,0 +1,310 @@
+import os, sys
+import asyncio
+from urllib.parse import parse_qs, unquote
+
+# Add the project root to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from log_processor import open_log_file
+from services.live_log_service import ssh_command, new_monitor, line_frames, end_frames, error_frame
+from services.live_stream_hub import KEEPALIVE_FRAME, SubscriberQueue, UpstreamState
+from config import LIVE_LOG_REPLAY_FILE, LIVE_LOG_REPLAY_INTERVAL
+from config import LIVE_STREAM_BUFFER_FRAMES, LIVE_STREAM_CLIENT_QUEUE, LIVE_STREAM_IDLE_SECONDS, LIVE_STREAM_HEARTBEAT_SECONDS
+
+"""
+asyncio server for /live_power_log/<pump_ip>, as a plain ASGI app.
+
+The Flask route holds a WSGI worker thread for as long as a client watches a device. Here a
+stream is a coroutine: upstream commands run through asyncio.create_subprocess_exec, their
+stdout and stderr are read concurrently (stderr lines are sent as "data: ERROR:" frames as they
+arrive, so a full stderr pipe can never stall the stream), and clients watching the same device
+share one upstream. The replay buffer, lag handling and idle bookkeeping are LiveStreamHub's
+(UpstreamState, SubscriberQueue); only the waiting is done with asyncio here.
+The frames are the same as the Flask route's.
+
+Run it next to the Flask app, from the backend folder:
+    uvicorn live_asgi:app --port 5001
+and point the frontend at it with window.LIVE_LOG_BASE_URL = 'http://127.0.0.1:5001'.
+"""
+
+ROUTE_PREFIX = "/live_power_log/"
+# Longest line read from an upstream command
+MAX_LINE_BYTES = 1024 * 1024
+
+
+class AsyncCommandLogSource:
+    """Runs a local command and yields ("out" | "err", line) as it writes either stream."""
+
+    def __init__(self, command):
+        self.command = command
+        self.process = None
+
+    async def read(self):
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=MAX_LINE_BYTES,
+        )
+        queue = asyncio.Queue(maxsize=1000)
+
+        async def pump(stream, name):
+            try:
+                async for raw in stream:
+                    await queue.put((name, raw.decode("utf-8", errors="replace")))
+            finally:
+                await queue.put((name, None))
+
+        readers = [
+            asyncio.create_task(pump(self.process.stdout, "out")),
+            asyncio.create_task(pump(self.process.stderr, "err")),
+        ]
+        try:
+            open_streams = len(readers)
+            while open_streams:
+                name, line = await queue.get()
+                if line is None:
+                    open_streams -= 1
+                    continue
+                yield name, line
+        finally:
+            for reader in readers:
+                reader.cancel()
+
+    async def close(self):
+        if self.process is not None and self.process.returncode is None:
+            print(f"Terminating subprocess {self.command[0]} (pid {self.process.pid}).")
+            self.process.terminate()
+            await self.process.wait()
+
+
+class AsyncSSHLogSource(AsyncCommandLogSource):
+    def __init__(self, pump_ip, command_builder=ssh_command):
+        self.pump_ip = pump_ip
+        super().__init__(command_builder(pump_ip))
+
+
+class AsyncReplayFileSource:
+    """Async counterpart of ReplayFileSource."""
+
+    def __init__(self, path, interval=0.0):
+        self.path = path
+        self.interval = interval
+
+    async def read(self):
+        with open_log_file(self.path) as f:
+            for i, raw in enumerate(f):
+                if self.interval:
+                    await asyncio.sleep(self.interval)
+                elif i % 100 == 0:
+                    await asyncio.sleep(0)
+                yield "out", raw.decode("utf-8", errors="replace")
+
+    async def close(self):
+        pass
+
+
+class _AsyncUpstream(UpstreamState):
+    def __init__(self, hub, key):
+        super().__init__(key, hub.buffer_size)
+        self.hub = hub
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        source = None
+        try:
+            source = self.hub.source_factory(self.key)
+            monitor = new_monitor(self.key) if self.hub.analytics else None
+            async for stream, line in source.read():
+                self.publish(line_frames(line, monitor) if stream == "out" else [error_frame(line)])
+            self.publish(end_frames(monitor))
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"An error occurred while streaming logs from {self.key}: {e}")
+            self.publish([error_frame(str(e))])
+        finally:
+            if source is not None:
+                await source.close()
+            self.done = True
+            for subscriber in self.subscribers:
+                subscriber.wake.set()
+            self.hub._discard(self)
+
+    def remove(self, subscriber):
+        if super().remove(subscriber):
+            self.idle_timer = asyncio.get_running_loop().call_later(self.hub.idle_timeout, self._stop_if_idle)
+
+    def _stop_if_idle(self):
+        if not self.is_idle():
+            return
+        print(f"No more clients for {self.key}. Closing the upstream stream.")
+        self.closing = True
+        self.hub._discard(self)
+        self._task.cancel()
+
+
+class AsyncSubscription(SubscriberQueue):
+    def __init__(self, upstream, queue_size, heartbeat):
+        super().__init__(queue_size)
+        self.upstream = upstream
+        self.heartbeat = heartbeat
+        self.wake = asyncio.Event()
+
+    def push(self, frames):
+        super().push(frames)
+        self.wake.set()
+
+    async def batches(self):
+        """Yields lists of frames: everything queued since the previous batch."""
+        while True:
+            if not self.frames:
+                if self.upstream.done:
+                    return
+                self.wake.clear()
+                try:
+                    await asyncio.wait_for(self.wake.wait(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    # Lets the server notice disconnected clients while the device is quiet
+                    yield [KEEPALIVE_FRAME]
+                    continue
+            batch = self.take()
+            if batch:
+                yield batch
+
+    def close(self):
+        self.upstream.remove(self)
+
+
+class AsyncLiveStreamHub:
+    """LiveStreamHub for the event loop: one upstream task per device, fanned out to clients."""
+
+    def __init__(self, source_factory, analytics=True, buffer_size=200, queue_size=1000,
+                 idle_timeout=30, heartbeat=15):
+        self.source_factory = source_factory
+        self.analytics = analytics
+        self.buffer_size = buffer_size
+        self.queue_size = queue_size
+        self.idle_timeout = idle_timeout
+        self.heartbeat = heartbeat
+        self._upstreams = {}
+
+    def subscribe(self, key):
+        upstream = self._upstreams.get(key)
+        if upstream is None or upstream.done or upstream.closing:
+            upstream = _AsyncUpstream(self, key)
+            self._upstreams[key] = upstream
+        subscription = AsyncSubscription(upstream, self.queue_size, self.heartbeat)
+        upstream.add(subscription)
+        return subscription
+
+    def active_streams(self):
+        return {key: len(upstream.subscribers) for key, upstream in self._upstreams.items()}
+
+    async def close(self):
+        upstreams = list(self._upstreams.values())
+        self._upstreams.clear()
+        for upstream in upstreams:
+            upstream.closing = True
+            upstream._task.cancel()
+        await asyncio.gather(*(upstream._task for upstream in upstreams), return_exceptions=True)
+
+    def _discard(self, upstream):
+        if self._upstreams.get(upstream.key) is upstream:
+            del self._upstreams[upstream.key]
+
+
+class LiveLogASGI:
+    def __init__(self, hub):
+        self.hub = hub
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        path = scope["path"]
+        if scope["method"] != "GET" or not path.startswith(ROUTE_PREFIX) or len(path) == len(ROUTE_PREFIX):
+            await self._respond(send, 404, b"Not Found")
+            return
+
+        pump_ip = unquote(path[len(ROUTE_PREFIX):])
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        # ?analytics=0 relays the raw lines only, as on the Flask route
+        analytics = query.get("analytics", ["1"])[0] != "0"
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"access-control-allow-origin", b"*"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        })
+
+        subscription = self.hub.subscribe(pump_ip)
+        streaming = asyncio.create_task(self._stream(subscription, analytics, send))
+        disconnect = asyncio.create_task(self._wait_for_disconnect(receive))
+        try:
+            await asyncio.wait({streaming, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            streaming.cancel()
+            disconnect.cancel()
+            subscription.close()
+        if disconnect.done() and not disconnect.cancelled():
+            print(f"Client disconnected from {pump_ip}.")
+
+    async def _stream(self, subscription, analytics, send):
+        async for batch in subscription.batches():
+            if not analytics:
+                batch = [f for f in batch if not f.startswith("event: ") or f.startswith("event: lag")]
+                if not batch:
+                    continue
+            await send({"type": "http.response.body", "body": "".join(batch).encode("utf-8"), "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    @staticmethod
+    async def _wait_for_disconnect(receive):
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+
+    @staticmethod
+    async def _respond(send, status, body):
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.hub.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def create_app(source_factory=None, analytics=True):
+    """source_factory: device address -> async line source (defaults to SSH, or the replay file)."""
+    if source_factory is None:
+        if LIVE_LOG_REPLAY_FILE:
+            source_factory = lambda pump_ip: AsyncReplayFileSource(LIVE_LOG_REPLAY_FILE, LIVE_LOG_REPLAY_INTERVAL)
+        else:
+            source_factory = AsyncSSHLogSource
+    hub = AsyncLiveStreamHub(
+        source_factory,
+        analytics=analytics,
+        buffer_size=LIVE_STREAM_BUFFER_FRAMES,
+        queue_size=LIVE_STREAM_CLIENT_QUEUE,
+        idle_timeout=LIVE_STREAM_IDLE_SECONDS,
+        heartbeat=LIVE_STREAM_HEARTBEAT_SECONDS,
+    )
+    return LiveLogASGI(hub)
+
+
+app = create_app()
@@ -3,6 +3,8 @@ import glob
 import gzip
 import shutil
 import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 def sort_log_files(files):
@@ -23,25 +25,105 @@ def sort_log_files(files):
     files.sort(key=get_key, reverse=False)
     return files
 
-def decompress_and_merge(files, output_path):
+def _decompress_to_file(gz_path, output_path):
+    """Worker for the process pool: decompresses a single .gz file to output_path."""
+    with gzip.open(gz_path, 'rb') as f_in, open(output_path, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+    return output_path
+
+def decompress_and_merge(files, output_path, pool=None):
     """
     Decompresses .gz files and merges them with plain text files into a single file.
     The input 'files' are assumed to be sorted from oldest to newest.
+
+    When a process pool is given, the .gz files are decompressed in parallel into
+    per-file temporaries and then concatenated in the given order.
     """
-    with open(output_path, 'wb') as f_out:
-        for file_path in files:
+    if pool is None:
+        with open(output_path, 'wb') as f_out:
+            for file_path in files:
+                if file_path.endswith('.gz'):
+                    with gzip.open(file_path, 'rb') as f_in:
+                        shutil.copyfileobj(f_in, f_out)
+                else:
+                    with open(file_path, 'rb') as f_in:
+                        shutil.copyfileobj(f_in, f_out)
+        return
+
+    temp_dir = tempfile.mkdtemp(prefix='decompress_', dir=os.path.dirname(output_path))
+    try:
+        pending = {}
+        for i, file_path in enumerate(files):
             if file_path.endswith('.gz'):
-                with gzip.open(file_path, 'rb') as f_in:
-                    shutil.copyfileobj(f_in, f_out)
-            else:
-                with open(file_path, 'rb') as f_in:
-                    shutil.copyfileobj(f_in, f_out)
+                temp_path = os.path.join(temp_dir, f'{i}.part')
+                pending[file_path] = pool.submit(_decompress_to_file, file_path, temp_path)
+
+        with open(output_path, 'wb') as f_out:
+            for file_path in files:
+                source = pending[file_path].result() if file_path in pending else file_path
+                with open(source, 'rb') as f_in:
+                    shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+                if file_path in pending:
+                    os.remove(source)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
 
-def process_logs_from_path(log_path, dataset_folder):
+def open_log_file(file_path):
+    """Opens a rotated log file for binary reading, decompressing .gz files on the fly."""
+    return gzip.open(file_path, 'rb') if file_path.endswith('.gz') else open(file_path, 'rb')
+
+class TrackedLogLines:
     """
-    Finds, decompresses, sorts, and merges PowerlogFile and messages files
-    from a given directory path.
-    Returns the paths to the two final merged files.
+    Iterates the lines of several (possibly gzipped) log files as one stream, starting each
+    file at a given byte offset of its decompressed content, and records how far into each
+    file the stream has been consumed.
+
+    sources: [(file_path, start_offset)], oldest first.
+    tee_path / tee_append: optionally write the consumed raw bytes to tee_path as well.
+    hold_partial: hold back a final line without a newline in the last file instead of
+                  yielding it, since the file may still be being written. Only wanted when
+                  the consumed offsets are recorded for a later incremental run.
+    """
+
+    def __init__(self, sources, tee_path=None, tee_append=False, hold_partial=False):
+        self.sources = sources
+        self.tee_path = tee_path
+        self.tee_append = tee_append
+        self.hold_partial = hold_partial
+        self.consumed = {path: offset for path, offset in sources}
+        self._lines = self._iter_lines()
+
+    def __iter__(self):
+        return self._lines
+
+    def close(self):
+        self._lines.close()
+
+    def _iter_lines(self):
+        tee = open(self.tee_path, 'ab' if self.tee_append else 'wb') if self.tee_path else None
+        try:
+            for i, (file_path, offset) in enumerate(self.sources):
+                last_file = i == len(self.sources) - 1
+                with open_log_file(file_path) as f_in:
+                    if offset:
+                        f_in.seek(offset)
+                    position = offset
+                    for raw in f_in:
+                        if self.hold_partial and last_file and not raw.endswith(b'\n'):
+                            break
+                        position += len(raw)
+                        if tee:
+                            tee.write(raw)
+                        self.consumed[file_path] = position
+                        yield raw.decode('utf-8', errors='replace')
+        finally:
+            if tee:
+                tee.close()
+
+def collect_log_files(log_path):
+    """
+    Finds the rotated PowerlogFile and messages files in a directory, drops .gz files that
+    have an uncompressed counterpart, and returns both lists sorted oldest to newest.
     """
     message_files_raw = glob.glob(os.path.join(log_path, 'messages*'))
     powerlog_files_raw = glob.glob(os.path.join(log_path, 'PowerlogFile*'))
@@ -80,16 +162,14 @@ def process_logs_from_path(log_path, dataset_folder):
 
     sorted_message_files = sort_log_files(list(final_message_files_to_process))
     sorted_powerlog_files = sort_log_files(list(final_powerlog_files_to_process))
+    return sorted_powerlog_files, sorted_message_files
 
-    # Create a temporary directory for the merged files within the dataset_folder
-    temp_dir = os.path.join(dataset_folder, 'temp_merged_logs')
-    os.makedirs(temp_dir, exist_ok=True)
-
-    merged_messages_path = os.path.join(temp_dir, 'messages')
-    merged_powerlog_path = os.path.join(temp_dir, 'PowerlogFile.txt')
-
-    # Decompress and merge the sorted files
-    decompress_and_merge(sorted_message_files, merged_messages_path)
-    decompress_and_merge(sorted_powerlog_files, merged_powerlog_path)
-
-    return merged_powerlog_path, merged_messages_path
\ No newline at end of file
+def merge_log_files(files, output_path, workers=None):
+    """decompress_and_merge with its own process pool when there is more than one .gz file."""
+    workers = workers or os.cpu_count() or 1
+    gz_count = sum(1 for f in files if f.endswith('.gz'))
+    if workers == 1 or gz_count < 2:
+        decompress_and_merge(files, output_path)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, gz_count)) as pool:
+        decompress_and_merge(files, output_path, pool)
@@ -0,0 +1,180 @@
+import os
+import json
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from chunker.timestamps import MESSAGES_TIMESTAMP_RE, parse_messages_timestamp
+
+"""
+Sidecar time index for merged messages files.
+
+The file is split into blocks of roughly SAMPLE_EVERY lines, each starting on a
+timestamped line. For every block the index stores its byte offset and the min/max
+timestamp of its lines, so a time-window lookup only reads the blocks that can overlap
+the window instead of scanning the whole file.
+
+messages lines carry no year, so index keys are seconds since Jan 1 of a leap reference
+year. The final filtering still runs per line with the requested year, exactly like the
+full scan did.
+"""
+
+INDEX_VERSION = 1
+SAMPLE_EVERY = 1000
+_KEY_YEAR = 2000  # leap year, so Feb 29 lines get a key too
+_KEY_ORIGIN = datetime(_KEY_YEAR, 1, 1)
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def index_path_for(message_file_path):
+    return message_file_path + ".idx.json"
+
+
+def _key_for(dt):
+    return int((dt.replace(year=_KEY_YEAR) - _KEY_ORIGIN).total_seconds())
+
+
+def _line_key(line):
+    try:
+        dt = parse_messages_timestamp(line, _KEY_YEAR)
+    except ValueError:
+        return None
+    return None if dt is None else _key_for(dt)
+
+
+def build_message_index(message_file_path, sample_every=SAMPLE_EVERY):
+    """Scans the messages file once and writes its block index next to it."""
+    blocks = []
+    offset = 0
+    lines_in_block = 0
+    block = [0, None, None]
+
+    with open(message_file_path, "rb") as f:
+        for raw in f:
+            key = _line_key(raw.decode("utf-8", errors="ignore"))
+            if key is not None:
+                if lines_in_block >= sample_every:
+                    blocks.append(block)
+                    block = [offset, None, None]
+                    lines_in_block = 0
+                block[1] = key if block[1] is None else min(block[1], key)
+                block[2] = key if block[2] is None else max(block[2], key)
+            lines_in_block += 1
+            offset += len(raw)
+    blocks.append(block)
+
+    index = {
+        "version": INDEX_VERSION,
+        "source_size": offset,
+        "sample_every": sample_every,
+        "blocks": blocks,
+    }
+    tmp_path = index_path_for(message_file_path) + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, index_path_for(message_file_path))
+    return index
+
+
+def _is_stale(message_file_path, index_path):
+    if not os.path.exists(index_path):
+        return True
+    return os.path.getmtime(message_file_path) > os.path.getmtime(index_path)
+
+
+class MessageIndex:
+    def __init__(self, data):
+        self.source_size = data["source_size"]
+        blocks = data["blocks"]
+        self.offsets = [b[0] for b in blocks]
+        # Running max / reverse running min make both bounds bisectable even if
+        # syslog lines are slightly out of order.
+        self.prefix_max = []
+        running = float("-inf")
+        for b in blocks:
+            if b[2] is not None:
+                running = max(running, b[2])
+            self.prefix_max.append(running)
+        self.suffix_min = [0] * len(blocks)
+        running = float("inf")
+        for i in range(len(blocks) - 1, -1, -1):
+            if blocks[i][1] is not None:
+                running = min(running, blocks[i][1])
+            self.suffix_min[i] = running
+
+    def byte_range(self, start_key, end_key):
+        """Returns (start_offset, end_offset) covering every block that may hold keys in the window."""
+        first = bisect_left(self.prefix_max, start_key)
+        last = bisect_right(self.suffix_min, end_key) - 1
+        if first >= len(self.offsets) or last < first:
+            return None
+        end_offset = self.offsets[last + 1] if last + 1 < len(self.offsets) else self.source_size
+        return self.offsets[first], end_offset
+
+
+def load_message_index(message_file_path):
+    """Returns the index for a messages file, rebuilding it when the file is newer than the index."""
+    index_path = index_path_for(message_file_path)
+    with _loaded_lock:
+        if _is_stale(message_file_path, index_path):
+            build_message_index(message_file_path)
+            _loaded.pop(index_path, None)
+
+        mtime = os.path.getmtime(index_path)
+        cached = _loaded.get(index_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        with open(index_path) as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION or data["source_size"] != os.path.getsize(message_file_path):
+            data = build_message_index(message_file_path)
+            mtime = os.path.getmtime(index_path)
+        index = MessageIndex(data)
+        _loaded[index_path] = (mtime, index)
+        return index
+
+
+def read_message_window(message_file_path, start_dt, end_dt):
+    """
+    Returns the messages lines between start_dt and end_dt (inclusive), plus continuation
+    lines that follow a matching line. Only the indexed blocks overlapping the window are read.
+    """
+    if end_dt < start_dt:
+        return []
+
+    start_key = _key_for(start_dt)
+    # Log timestamps are compared using the start year, so a window reaching into the next year
+    # has no upper bound within it.
+    end_key = _key_for(end_dt) if end_dt.year == start_dt.year else float("inf")
+
+    index = load_message_index(message_file_path)
+    window = index.byte_range(start_key, end_key)
+    if window is None:
+        return []
+    start_offset, end_offset = window
+
+    # Lines carry milliseconds; all of the end second is inside the window
+    last_dt = end_dt.replace(microsecond=999999)
+    filtered_logs = []
+    with open(message_file_path, "rb") as f:
+        f.seek(start_offset)
+        position = start_offset
+        while position < end_offset:
+            raw = f.readline()
+            if not raw:
+                break
+            position += len(raw)
+            line = raw.decode("utf-8", errors="ignore")
+            try:
+                log_dt = parse_messages_timestamp(line, start_dt.year)
+                if log_dt is not None:
+                    if start_dt <= log_dt <= last_dt:
+                        filtered_logs.append(line.strip())
+                else:
+                    if filtered_logs and not MESSAGES_TIMESTAMP_RE.match(line.strip()):
+                        filtered_logs.append(line.strip())
+            except ValueError:
+                pass
+    return filtered_logs
@@ -1,6 +1,62 @@
-from sentence_transformers import SentenceTransformer
+import threading
+import numpy as np
+from backend.config import EMBED_BATCH_SIZE, EMBED_MODEL_NAME, EMBED_BACKEND, EMBED_ONNX_FILE
+from backend.config import EMBED_CACHE_SIZE, EMBED_CACHE_PATH
+from backend.requirement_embedder.embedding_cache import EmbeddingCache
+
+# The model is loaded on first use (or by warm_up), not at import, so processes that import
+# this module but never embed anything don't pay for it
+_model = None
+_model_lock = threading.Lock()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _load_model():
+    from sentence_transformers import SentenceTransformer
+
+    if EMBED_BACKEND == "onnx":
+        try:
+            model_kwargs = {"file_name": EMBED_ONNX_FILE} if EMBED_ONNX_FILE else None
+            return SentenceTransformer(EMBED_MODEL_NAME, backend="onnx", model_kwargs=model_kwargs)
+        except Exception as e:
+            print(f"Could not load the ONNX embedding model ({e}); using the default backend.")
+    return SentenceTransformer(EMBED_MODEL_NAME)
+
+
+def get_model():
+    """The shared embedding model, loaded by the first caller."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = _load_model()
+    return _model
+
+
+def warm_up(background: bool = True):
+    """Loads the model (and runs one encode) ahead of the first query."""
+    def run():
+        get_model().encode("warm up")
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+def get_cache() -> EmbeddingCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                # ONNX (and quantized) vectors differ slightly from torch ones, so don't mix them
+                model_key = f"{EMBED_MODEL_NAME}|{EMBED_BACKEND}|{EMBED_ONNX_FILE or ''}"
+                _cache = EmbeddingCache(model_key, maxsize=EMBED_CACHE_SIZE, path=EMBED_CACHE_PATH)
+    return _cache
 
-model = SentenceTransformer("all-MiniLM-L6-v2")  # Or any other small embedding model
 
 def build_embed_input(chunk_text: str, metadata: dict) -> str:
     """
@@ -14,4 +70,30 @@ def get_embedding(text: str) -> list[float]:
     """
     Generate embedding vector for a given string.
     """
-    return model.encode(text).tolist()
+    return get_embeddings([text])[0].tolist()
+
+
+def get_embeddings(texts: list[str], batch_size: int = EMBED_BATCH_SIZE) -> np.ndarray:
+    """
+    Generate embedding vectors for many strings at once, as a float32 array of shape
+    (len(texts), dim). Texts already in the embedding cache aren't encoded again; the rest
+    are encoded `batch_size` per forward pass, each distinct text once.
+    """
+    cache = get_cache()
+    vectors = cache.get_many(texts)
+    # Cache key -> positions of the texts not in the cache; each distinct one is encoded once
+    missing = {}
+    for i, vector in enumerate(vectors):
+        if vector is None:
+            missing.setdefault(cache.key(texts[i]), []).append(i)
+    if missing:
+        new_texts = [texts[indices[0]] for indices in missing.values()]
+        encoded = get_model().encode(new_texts, batch_size=batch_size, convert_to_numpy=True)
+        encoded = encoded.astype(np.float32, copy=False)
+        cache.put_many(new_texts, encoded)
+        for indices, vector in zip(missing.values(), encoded):
+            for i in indices:
+                vectors[i] = vector
+    if not vectors:
+        return np.empty((0, get_model().get_sentence_embedding_dimension()), dtype=np.float32)
+    return np.stack(vectors)
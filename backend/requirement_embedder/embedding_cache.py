@@ -0,0 +1,98 @@
+import os
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+
+"""
+LRU cache of embedding vectors, keyed on the normalized embedding input and the model that
+produced it, with an optional SQLite file behind it so embeddings survive restarts and are
+shared between worker processes.
+"""
+
+
+def normalize_text(text: str) -> str:
+    # Runs of whitespace don't change the tokens the model sees
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    def __init__(self, model_key: str, maxsize: int = 4096, path: str = None):
+        """
+        model_key: identifies the model and backend; vectors from another model never match.
+        maxsize: vectors kept in memory.
+        path: SQLite file to persist vectors in, or None for memory only.
+        """
+        self.model_key = model_key
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            self._db.commit()
+
+    def key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.model_key}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts):
+        """Cached vectors for the texts, as a list with None for every miss."""
+        keys = [self.key(t) for t in texts]
+        found = [None] * len(keys)
+        disk_lookups = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[i] = vector
+                elif self._db is not None:
+                    disk_lookups.setdefault(key, []).append(i)
+            if disk_lookups:
+                for key, vector in self._load(list(disk_lookups)):
+                    self._remember(key, vector)
+                    for i in disk_lookups[key]:
+                        found[i] = vector
+            hits = sum(v is not None for v in found)
+            self.hits += hits
+            self.misses += len(found) - hits
+        return found
+
+    def put_many(self, texts, vectors):
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = self.key(text)
+                vector = np.asarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                rows.append((key, vector.tobytes()))
+            if self._db is not None and rows:
+                self._db.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._memory)}
+
+    def _remember(self, key, vector):
+        # Stored vectors are shared between callers; keep them read-only
+        vector.flags.writeable = False
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def _load(self, keys):
+        # SQLite limits the number of bound parameters per statement
+        for start in range(0, len(keys), 500):
+            part = keys[start:start + 500]
+            placeholders = ", ".join("?" * len(part))
+            for key, blob in self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part):
+                yield key, np.frombuffer(blob, dtype=np.float32)
@@ -4,7 +4,10 @@ sys.path.append(str(Path(__file__).resolve().parents[2]))
 import os
 import json, requests, random
 from pathlib import Path
-from backend.requirement_embedder.embedder import get_embedding, build_embed_input
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from backend.requirement_embedder.embedder import get_embeddings, build_embed_input
+from backend.config import INGEST_BATCH_SIZE, INGEST_EXTRACT_WORKERS
 from db.lancedb_manager import RequirementDatabase
 from langchain_docling import DoclingLoader
 from docling.document_converter import *
@@ -37,13 +40,46 @@ def parse_markdown_table(md_text: str) -> dict:
 
     
 
+_converter = None
+
+def get_converter() -> DocumentConverter:
+    # Building a converter loads docling's layout models; do it once per process
+    global _converter
+    if _converter is None:
+        _converter = DocumentConverter()
+    return _converter
+
+
 def extract_pdf_to_text(pdf_path: str, output_path: str):
-    converter = DocumentConverter()
+    converter = get_converter()
     documents = converter.convert(pdf_path)
     markdown_pages = documents.document.export_to_markdown()  # list of markdown strings
 
-    with open(output_path, "w", encoding="utf-8") as f:
+    # Written under a temporary name so an interrupted run doesn't leave a partial text
+    # file that would be taken as already extracted
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
         f.write(markdown_pages)
+    os.replace(tmp_path, output_path)
+
+
+def _extract_job(job):
+    pdf_path, text_path = job
+    extract_pdf_to_text(pdf_path, text_path)
+    return job
+
+
+def extract_pdfs(jobs, workers: int = INGEST_EXTRACT_WORKERS):
+    """
+    Converts [(pdf_path, text_path)] to text, across `workers` processes. Yields each job
+    as it is done, in the given order, so the caller can work on the results meanwhile.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield _extract_job(job)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        yield from pool.map(_extract_job, jobs)
 
 
 
@@ -64,13 +100,93 @@ def process_text_file(text_path: str) -> dict:
             "metadata": {}
         }
     
+    # IDs must be the same every time a document is ingested, or re-ingesting it adds rows
     return {
         "text": rows.get("Name") or rows.get("Description") or "",
-        "requirement_id": rows.get("Name", f"REQ_{random.randint(0, 1000)}"),
+        "requirement_id": rows.get("Name", f"REQ_{Path(text_path).stem}"),
+        "chunk_id": 0,
         "title": rows.get("Name", ""),
         "metadata": {k: v for k, v in rows.items() if k in ["Name", "Display Message", "Status", "Button Bar", "Display Title", "Log Message","Set"]},
     }
 
+
+def _batches(items, size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def ingest_pdfs(pdf_files, extracted_text_dir, db: RequirementDatabase,
+                batch_size: int = INGEST_BATCH_SIZE, workers: int = INGEST_EXTRACT_WORKERS) -> int:
+    """
+    Extracts, embeds and stores requirement PDFs in bulk. PDFs without an extracted text
+    file are converted in parallel; records are then embedded and upserted `batch_size` at a
+    time (one encode call and one database write per batch). Each document's rows are
+    replaced, so ingesting a PDF again doesn't duplicate them. Returns the records written.
+    """
+    extracted_text_dir = Path(extracted_text_dir)
+    pending = []
+    ready = []
+    for pdf_file in pdf_files:
+        text_path = extracted_text_dir / f"{Path(pdf_file).stem}.txt"
+        if text_path.exists():
+            ready.append((str(pdf_file), str(text_path)))
+        else:
+            pending.append((str(pdf_file), str(text_path)))
+    print(f" {len(ready)} PDFs already extracted, {len(pending)} to extract")
+
+    def extracted():
+        yield from ready
+        for pdf_path, text_path in extract_pdfs(pending, workers):
+            print(f" Extracted text: {Path(pdf_path).name}")
+            yield pdf_path, text_path
+
+    written = 0
+    for batch in _batches(extracted(), batch_size):
+        records = []
+        for pdf_path, text_path in batch:
+            record = process_text_file(text_path)
+            records.append({
+                "requirement_id": record["requirement_id"],
+                "document_id": Path(pdf_path).stem,
+                "chunk_id": record["chunk_id"],
+                "text": record["text"],
+                "metadata": record["metadata"],
+            })
+        embeddings = get_embeddings([build_embed_input(r["text"], r["metadata"]) for r in records])
+        db.upsert_requirements(records, embeddings, replace_documents=True)
+        written += len(records)
+        print(f" Inserted {written} requirement records")
+    return written
+
+def sync_requirement_pdfs(raw_pdf_dir, extracted_text_dir, db: RequirementDatabase, only_new: bool = False) -> dict:
+    """
+    Brings the requirement database in line with the PDFs in raw_pdf_dir: ingests them
+    (only those never extracted before if only_new), deletes the rows of PDFs that are
+    gone, then updates the vector index and compacts the table. Returns the number of records written and documents removed.
+    """
+    raw_pdf_dir = Path(raw_pdf_dir)
+    extracted_text_dir = Path(extracted_text_dir)
+    pdf_files = sorted(raw_pdf_dir.glob("*.pdf"))
+    if only_new:
+        pdf_files = [p for p in pdf_files if not (extracted_text_dir / f"{p.stem}.txt").exists()]
+
+    written = ingest_pdfs(pdf_files, extracted_text_dir, db) if pdf_files else 0
+
+    removed = db.document_ids() - {p.stem for p in raw_pdf_dir.glob("*.pdf")}
+    if removed:
+        print(f" Removing {len(removed)} documents no longer in {raw_pdf_dir}")
+        db.delete_documents(removed)
+
+    if written or removed:
+        # Rebuild the vector index if the new rows would fall outside it, then compact
+        db.ensure_index()
+        db.optimize()
+    return {"written": written, "removed": len(removed)}
+
 '''
 Here we are checking if the pdf is converted to markdown using docling and saved as a text. This step
 also helps in understanding if the pdf is already converted or not. If yes ignored
@@ -83,30 +199,7 @@ def main():
     extracted_text_dir.mkdir(parents=True, exist_ok=True)
 
     db = RequirementDatabase()
-
-    for pdf_file in raw_pdf_dir.glob("*.pdf"):
-        text_path = extracted_text_dir / f"{pdf_file.stem}.txt"
-
-        if not text_path.exists():
-            print(f" Extracting text: {pdf_file.name}")
-            extract_pdf_to_text(str(pdf_file), str(text_path))
-        else:
-            print(f" Skipping extraction (already done): {pdf_file.name}")
-
-        record = process_text_file(str(text_path))
-        embed_input = build_embed_input(record["text"], record["metadata"])
-    # ... rest of your code using dict access instead of list indices
-        embedding = get_embedding(embed_input)
-        db.upsert_requirement(
-            requirement_id=record["requirement_id"],
-            document_id=pdf_file.stem,
-            chunk_id=random.randint(0,999),
-            text=record["text"],
-            metadata=record["metadata"],
-            embedding=embedding,
-        )
-
-        print(f" Inserted {len(record)} chunks from {pdf_file.name}\n")
+    sync_requirement_pdfs(raw_pdf_dir, extracted_text_dir, db)
 
 if __name__ == "__main__":
    main()
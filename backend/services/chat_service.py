@@ -1,4 +1,6 @@
+import traceback
 from chatbot.query_handler import QueryHandler
+from services.live_log_service import sse_event
 
 class ChatService:
     def __init__(self, rag_data_folder):
@@ -7,3 +9,28 @@ class ChatService:
     def handle_chat_query(self, user_query):
         response = self.query_handler.handle_query(user_query)
         return {'response': response}
+
+    def stream_chat_query(self, user_query):
+        """
+        The answer to a chat query as server-sent events: "token" events ({"text": ...}) as
+        the LLM produces the answer, "reasoning" events while a reasoning model thinks, then
+        one "done" event with the whole response ({"response": ...}, as /chat returns it), or
+        an "error" event.
+        """
+        parts = []
+        try:
+            for kind, text in self.query_handler.handle_query_stream(user_query):
+                if kind == "error":
+                    yield sse_event("error", {"response": text})
+                    return
+                if kind == "token":
+                    parts.append(text)
+                yield sse_event(kind, {"text": text})
+        except Exception as e:
+            traceback.print_exc()
+            yield sse_event("error", {"error": 'An unexpected error occurred in the chat endpoint.', "details": str(e)})
+            return
+        yield sse_event("done", {"response": "".join(parts).strip()})
+
+    def cache_stats(self):
+        return self.query_handler.response_cache.stats()
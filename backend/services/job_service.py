@@ -0,0 +1,126 @@
+import time
+import uuid
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AnalysisCancelled(Exception):
+    """Raised from a job's progress callback once the job has been cancelled."""
+
+
+class JobQueueFull(Exception):
+    """Raised when too many analysis jobs are already waiting."""
+
+
+TERMINAL_STATES = ('completed', 'failed', 'cancelled')
+
+
+class Job:
+    def __init__(self, kind, description):
+        self.job_id = uuid.uuid4().hex
+        self.kind = kind
+        self.description = description
+        self.status = 'queued'
+        self.progress = {'lines_processed': 0, 'chunks_emitted': 0, 'chunks_analysed': 0}
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._cancel_event = threading.Event()
+
+    def report(self, lines_processed=None, chunks_emitted=None, chunks_analysed=None):
+        """Progress callback handed to the analysis code; also the cancellation point."""
+        if lines_processed is not None:
+            self.progress['lines_processed'] = lines_processed
+        if chunks_emitted is not None:
+            self.progress['chunks_emitted'] = chunks_emitted
+        if chunks_analysed is not None:
+            self.progress['chunks_analysed'] = chunks_analysed
+        if self._cancel_event.is_set():
+            raise AnalysisCancelled(f"Job {self.job_id} was cancelled")
+
+    @property
+    def done(self):
+        return self.status in TERMINAL_STATES
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'kind': self.kind,
+            'description': self.description,
+            'status': self.status,
+            'progress': dict(self.progress),
+            'result': self.result,
+            'error': self.error,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+        }
+
+
+# Summary: Runs long analyses (chunking + power log analysis) on a bounded worker pool so
+# HTTP requests can return immediately. Jobs report progress, can be cancelled, and are
+# polled by ID.
+class JobService:
+    def __init__(self, max_workers=2, max_queued=8, keep_finished=200):
+        self.max_queued = max_queued
+        self.keep_finished = keep_finished
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis-job')
+
+    def submit(self, kind, description, func, *args, **kwargs):
+        """
+        Queues func(*args, progress=job.report, **kwargs). Raises JobQueueFull when too many
+        jobs are already waiting for a worker.
+        """
+        job = Job(kind, description)
+        with self._lock:
+            queued = sum(1 for j in self.jobs.values() if j.status == 'queued')
+            if queued >= self.max_queued:
+                raise JobQueueFull(f"{queued} analysis jobs are already queued. Please try again later.")
+            self.jobs[job.job_id] = job
+            self._prune()
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def _run(self, job, func, args, kwargs):
+        if job._cancel_event.is_set():
+            job.status = 'cancelled'
+            job.finished = time.time()
+            return
+        job.status = 'running'
+        job.started = time.time()
+        try:
+            job.result = func(*args, progress=job.report, **kwargs)
+            job.status = 'completed'
+        except AnalysisCancelled:
+            job.status = 'cancelled'
+        except Exception as e:
+            traceback.print_exc()
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished = time.time()
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Requests cancellation; queued jobs never start, running ones stop at their next progress report."""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if not job.done:
+            job._cancel_event.set()
+            if job.status == 'queued':
+                job.status = 'cancelled'
+                job.finished = time.time()
+        return job
+
+    def _prune(self):
+        finished = sorted((j for j in self.jobs.values() if j.done), key=lambda j: j.finished)
+        for job in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self.jobs[job.job_id]
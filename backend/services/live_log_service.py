@@ -1,52 +1,184 @@
 import subprocess
-import select
+import threading
+import json
+import time
+from collections import deque
+from chunker.powerchunk import COLUMNS
+from PowerLogAnalyser.powerLogAnalysis import parameter_definitions
+from PowerLogAnalyser.live_monitor import LiveLogMonitor
+from log_processor import open_log_file
+from services.live_stream_hub import LiveStreamHub
+from config import LIVE_STATS_WINDOW, LIVE_STATS_EVERY
+from config import LIVE_STREAM_BUFFER_FRAMES, LIVE_STREAM_CLIENT_QUEUE, LIVE_STREAM_IDLE_SECONDS, LIVE_STREAM_HEARTBEAT_SECONDS
 
 
 # Paths and code logics are hidden due to confidentiality...
 #Summary: This code defines a service to stream logs from a device over SSH. It uses a generator to yield log lines in real-time, allowing for efficient streaming of log data.
-class LiveLogService:
-    def __init__(self):
-        pass
+# Every line is relayed as a plain SSE "data:" frame and, with analytics on, also fed through
+# LiveLogMonitor, whose chunk/stats/alert results are sent as named SSE events. One upstream
+# connection per device is shared by all the clients watching it.
 
-    def stream_log_for_ip(self, pump_ip):
-        """
-        Establishes an SSH connection to the given IP and streams the content
-        of the PowerlogFile.txt using a generator.
 
-        This method assumes that passwordless SSH (e.g., using public keys)
-        is configured for the target device.
-        """
-        # Command to stream the log file via SSH.
-        # -o StrictHostKeyChecking=no bypasses the host key verification prompt.
-        ssh_command = [
-            "ssh",
-            "-o", "StrictHostKeyChecking=no",
-            f"root@{pump_ip}",
-            # path jhidden due to confidentiality...
-        ]
-        
-        process = subprocess.Popen(
-            ssh_command,
+def ssh_command(pump_ip):
+    # Command to stream the log file via SSH.
+    # -o StrictHostKeyChecking=no bypasses the host key verification prompt.
+    return [
+        "ssh",
+        "-o", "StrictHostKeyChecking=no",
+        f"root@{pump_ip}",
+        # path jhidden due to confidentiality...
+    ]
+
+
+# stderr lines kept per command (the last ones win)
+MAX_ERROR_LINES = 100
+
+
+class CommandLogSource:
+    """Streams the stdout of a local command, line by line."""
+
+    def __init__(self, command):
+        self.command = command
+        self.process = subprocess.Popen(
+            command,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
             text=True,
             bufsize=1
         )
+        # stderr is drained while stdout is being read, so a chatty command can't fill the
+        # stderr pipe and block before closing stdout
+        self._errors = deque(maxlen=MAX_ERROR_LINES)
+        self._stderr_reader = threading.Thread(target=self._errors.extend, args=(self.process.stderr,), daemon=True)
+        self._stderr_reader.start()
 
-        try:
-            # Read line by line from stdout
-            for line in process.stdout:
-                yield f"data: {line.strip()}\n\n"
-            # After stdout closes, check stderr for any remaining output
-            for line in process.stderr:
-                yield f"data: ERROR: {line.strip()}\n\n"
+    def lines(self):
+        return iter(self.process.stdout)
+
+    def errors(self):
+        # Only called once stdout has closed
+        self._stderr_reader.join()
+        return iter(self._errors)
+
+    def close(self):
+        print(f"Terminating subprocess {self.command[0]} (pid {self.process.pid}).")
+        self.process.terminate()
+        self.process.wait()
+
+
+class SSHLogSource(CommandLogSource):
+    """Streams the PowerlogFile.txt of a device over SSH."""
+
+    def __init__(self, pump_ip, command_builder=ssh_command):
+        self.pump_ip = pump_ip
+        super().__init__(command_builder(pump_ip))
+
+
+class ReplayFileSource:
+    """
+    Stands in for SSHLogSource by replaying a (possibly gzipped) log file, optionally paced
+    at `interval` seconds per line. Used for tests and for running without a device.
+    """
+
+    def __init__(self, path, interval=0.0):
+        self.path = path
+        self.interval = interval
+        self._file = open_log_file(path)
+
+    def lines(self):
+        for raw in self._file:
+            if self.interval:
+                time.sleep(self.interval)
+            yield raw.decode('utf-8', errors='replace')
+
+    def errors(self):
+        return iter(())
+
+    def close(self):
+        self._file.close()
+
+
+def new_monitor(pump_ip):
+    return LiveLogMonitor(parameter_definitions, COLUMNS, device_name=pump_ip,
+                          window=LIVE_STATS_WINDOW, stats_every=LIVE_STATS_EVERY)
 
+
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def line_frames(line, monitor=None):
+    """The SSE frames for one log line: the line itself plus the monitor's events for it."""
+    frames = [f"data: {line.strip()}\n\n"]
+    if monitor is not None:
+        frames.extend(sse_event(event, payload) for event, payload in monitor.feed_line(line))
+    return frames
+
+
+def end_frames(monitor=None):
+    if monitor is None:
+        return []
+    return [sse_event(event, payload) for event, payload in monitor.flush()]
+
+
+def error_frame(line):
+    return f"data: ERROR: {line.strip()}\n\n"
+
+
+def log_frames(source, monitor=None):
+    """
+    The SSE frames of a live log: every line as a plain "data:" frame, followed by any
+    "chunk", "stats" and "alert" events the monitor produced for it.
+    """
+    # Read line by line from stdout
+    for line in source.lines():
+        yield from line_frames(line, monitor)
+    yield from end_frames(monitor)
+    # After stdout closes, report what the command wrote to stderr
+    for line in source.errors():
+        yield error_frame(line)
+
+
+class LiveLogService:
+    def __init__(self, source_factory=SSHLogSource, analytics=True):
+        """
+        source_factory: called with the device address, returns the line source to stream from.
+        analytics: run the online chunking/range-check pipeline alongside the raw lines.
+
+        Clients watching the same device share one upstream source (see LiveStreamHub), so
+        the analytics run once per device, not once per client.
+        """
+        self.source_factory = source_factory
+        self.analytics = analytics
+        self.hub = LiveStreamHub(
+            self._open_stream,
+            buffer_size=LIVE_STREAM_BUFFER_FRAMES,
+            queue_size=LIVE_STREAM_CLIENT_QUEUE,
+            idle_timeout=LIVE_STREAM_IDLE_SECONDS,
+            heartbeat=LIVE_STREAM_HEARTBEAT_SECONDS,
+        )
+
+    def _open_stream(self, pump_ip):
+        source = self.source_factory(pump_ip)
+        monitor = new_monitor(pump_ip) if self.analytics else None
+        return log_frames(source, monitor), source.close
+
+    def stream_log_for_ip(self, pump_ip, analytics=None):
+        """
+        Streams the content of the device's PowerlogFile.txt as server-sent events, starting
+        with the most recent buffered frames. analytics=False leaves out the named events.
+
+        With SSH, this assumes that passwordless SSH (e.g., using public keys)
+        is configured for the target device.
+        """
+        analytics = self.analytics if analytics is None else analytics
+        subscription = self.hub.subscribe(pump_ip)
+        try:
+            for frame in subscription:
+                if not analytics and frame.startswith("event: ") and not frame.startswith("event: lag"):
+                    continue
+                yield frame
         except GeneratorExit:
-            print(f"Client disconnected from {pump_ip}. Closing SSH connection.")
-        except Exception as e:
-            print(f"An error occurred while streaming logs from {pump_ip}: {e}")
-            yield f"data: ERROR: {str(e)}\n\n"
+            print(f"Client disconnected from {pump_ip}.")
         finally:
-            print(f"Terminating subprocess for {pump_ip}.")
-            process.terminate()
-            process.wait()
+            subscription.close()
@@ -0,0 +1,219 @@
+import threading
+from collections import deque
+
+
+# Summary: Shares one upstream stream per key (device address) between any number of
+# subscribers. A reader thread pulls frames from the upstream and fans them out; each
+# subscriber gets the recently buffered frames first, then live ones. Slow subscribers
+# never block the reader: their queue is bounded and the oldest frames are dropped, which
+# the subscriber is told about. The upstream is closed once its last subscriber has been
+# gone for `idle_timeout` seconds.
+
+LAG_FRAME = 'event: lag\ndata: {{"dropped": {}}}\n\n'
+KEEPALIVE_FRAME = ": keepalive\n\n"
+
+
+class UpstreamState:
+    """
+    The bookkeeping of one shared upstream, shared by LiveStreamHub and the asyncio hub in
+    live_asgi.py: the replay buffer, the subscribers and whether the upstream has gone idle.
+    No threads, I/O or locking; each hub adds its own around it.
+    """
+
+    def __init__(self, key, buffer_size):
+        self.key = key
+        self.recent = deque(maxlen=buffer_size)
+        self.subscribers = set()
+        self.done = False
+        self.closing = False
+        # Pending idle teardown: anything with cancel() (threading.Timer, asyncio.TimerHandle)
+        self.idle_timer = None
+
+    def publish(self, frames):
+        self.recent.extend(frames)
+        for subscriber in self.subscribers:
+            subscriber.push(frames)
+
+    def add(self, subscriber):
+        if self.idle_timer is not None:
+            self.idle_timer.cancel()
+            self.idle_timer = None
+        subscriber.push(self.recent)
+        self.subscribers.add(subscriber)
+
+    def remove(self, subscriber):
+        """Returns True if the upstream is now idle, i.e. the caller should start idle_timer."""
+        self.subscribers.discard(subscriber)
+        return self.is_idle()
+
+    def is_idle(self):
+        return not self.subscribers and not self.done
+
+
+class SubscriberQueue:
+    """A subscriber's bounded queue of frames; once it is full the oldest are dropped and counted."""
+
+    def __init__(self, queue_size):
+        self.frames = deque()
+        self.queue_size = queue_size
+        self.dropped = 0
+
+    def push(self, frames):
+        self.frames.extend(frames)
+        overflow = len(self.frames) - self.queue_size
+        if overflow > 0:
+            for _ in range(overflow):
+                self.frames.popleft()
+            self.dropped += overflow
+
+    def take(self):
+        """Everything queued since the last take, after a lag frame if frames were dropped."""
+        frames = list(self.frames)
+        self.frames.clear()
+        if self.dropped:
+            frames.insert(0, LAG_FRAME.format(self.dropped))
+            self.dropped = 0
+        return frames
+
+
+class _Upstream(UpstreamState):
+    def __init__(self, hub, key, buffer_size):
+        super().__init__(key, buffer_size)
+        self.hub = hub
+        self.cond = threading.Condition()
+        self._close = None
+
+    def start(self, open_stream):
+        self._thread = threading.Thread(target=self._run, args=(open_stream,), daemon=True,
+                                        name=f"live-stream-{self.key}")
+        self._thread.start()
+
+    def _run(self, open_stream):
+        try:
+            frames, self._close = open_stream(self.key)
+            if self.closing:
+                # Torn down while connecting
+                self._close()
+                return
+            for frame in frames:
+                self.publish((frame,))
+        except Exception as e:
+            if not self.closing:
+                print(f"An error occurred while streaming logs from {self.key}: {e}")
+                self.publish((f"data: ERROR: {str(e)}\n\n",))
+        finally:
+            self.finish()
+
+    def publish(self, frames):
+        with self.cond:
+            super().publish(frames)
+            self.cond.notify_all()
+
+    def finish(self):
+        with self.cond:
+            self.done = True
+            self.cond.notify_all()
+        self.hub._discard(self)
+
+    def stop(self):
+        """Closes the upstream; the reader thread ends once the source stops yielding."""
+        self.closing = True
+        if self._close is not None:
+            self._close()
+
+    def add(self, subscriber):
+        with self.cond:
+            super().add(subscriber)
+
+    def remove(self, subscriber):
+        with self.cond:
+            if super().remove(subscriber):
+                self.idle_timer = threading.Timer(self.hub.idle_timeout, self._stop_if_idle)
+                self.idle_timer.daemon = True
+                self.idle_timer.start()
+
+    def _stop_if_idle(self):
+        with self.hub._lock, self.cond:
+            if not self.is_idle():
+                return
+            self.closing = True
+            # New subscribers for this key start a fresh upstream from now on
+            if self.hub._upstreams.get(self.key) is self:
+                del self.hub._upstreams[self.key]
+        print(f"No more clients for {self.key}. Closing the upstream stream.")
+        self.stop()
+
+
+class Subscription(SubscriberQueue):
+    """Iterates the frames of one subscriber; close() when the client goes away."""
+
+    def __init__(self, upstream, queue_size, heartbeat):
+        super().__init__(queue_size)
+        self.upstream = upstream
+        self.heartbeat = heartbeat
+        self._closed = False
+
+    def __iter__(self):
+        cond = self.upstream.cond
+        while not self._closed:
+            with cond:
+                if not self.frames and not self.upstream.done:
+                    cond.wait(self.heartbeat)
+                if not self.frames and self.upstream.done:
+                    return
+                frames = self.take()
+            if not frames:
+                # Lets the server notice disconnected clients while the device is quiet
+                yield KEEPALIVE_FRAME
+            yield from frames
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self.upstream.remove(self)
+
+
+class LiveStreamHub:
+    def __init__(self, open_stream, buffer_size=200, queue_size=1000, idle_timeout=30, heartbeat=15):
+        """
+        open_stream: called with a key, returns (iterable of frames, close function).
+        buffer_size: recent frames replayed to new subscribers.
+        queue_size: frames a subscriber may fall behind by before the oldest are dropped.
+        idle_timeout: seconds an upstream is kept open after its last subscriber left.
+        heartbeat: seconds of upstream silence after which subscribers get a keepalive frame.
+        """
+        self.open_stream = open_stream
+        self.buffer_size = buffer_size
+        self.queue_size = queue_size
+        self.idle_timeout = idle_timeout
+        self.heartbeat = heartbeat
+        self._upstreams = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, key):
+        with self._lock:
+            upstream = self._upstreams.get(key)
+            if upstream is None or upstream.done or upstream.closing:
+                upstream = _Upstream(self, key, self.buffer_size)
+                self._upstreams[key] = upstream
+                upstream.start(self.open_stream)
+            subscription = Subscription(upstream, self.queue_size, self.heartbeat)
+            upstream.add(subscription)
+        return subscription
+
+    def active_streams(self):
+        """Key -> number of subscribers of each open upstream."""
+        with self._lock:
+            return {key: len(upstream.subscribers) for key, upstream in self._upstreams.items()}
+
+    def close(self):
+        with self._lock:
+            upstreams = list(self._upstreams.values())
+            self._upstreams.clear()
+        for upstream in upstreams:
+            upstream.stop()
+
+    def _discard(self, upstream):
+        with self._lock:
+            if self._upstreams.get(upstream.key) is upstream:
+                del self._upstreams[upstream.key]
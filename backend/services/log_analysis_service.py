@@ -2,10 +2,16 @@ import os
 import shutil
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 from PowerLogAnalyser import powerLogAnalysis
-from chunker.powerchunk import generate_chunks
-from log_processor import process_logs_from_path
-from config import UPLOAD_FOLDER, DATASET_FOLDER
+from chunker.powerchunk import COLUMNS, PowerLogChunker, generate_chunks, generate_chunks_from_lines
+from chunker.chunk_store import ChunkStore
+from log_processor import collect_log_files, merge_log_files, TrackedLogLines
+from message_index import build_message_index
+from analysis_cache import ARTIFACTS, AnalysisCache, compute_cache_key, release_artifacts
+from incremental_analysis import plan_incremental, run_incremental, save_ingest_state, last_chunk_timestamp
+from services.job_service import AnalysisCancelled
+from config import UPLOAD_FOLDER, DATASET_FOLDER, KEEP_RAW_POWERLOG, INCREMENTAL_ANALYSIS
 
 
 # Summary: This service handles the analysis of log files, including merging logs from a 
@@ -15,6 +21,7 @@ class LogAnalysisService:
     def __init__(self, dataset_folder):
         self.dataset_folder = dataset_folder
         self.pending_analysis = {}
+        self.analysis_cache = AnalysisCache()
 
     def is_awaiting_issue_name(self, session_id):
         return self.pending_analysis.get(session_id, {}).get('status') == 'awaiting_name'
@@ -32,36 +39,53 @@ class LogAnalysisService:
             expected_path_suffix = os.path.join("var", "log")
             return {'error': f'Invalid /analyze command. The provided path must end with \'{expected_path_suffix}\'.'}
         
-        merged_powerlog_path, merged_messages_path = process_logs_from_path(log_path, self.dataset_folder)
+        powerlog_files, message_files = collect_log_files(log_path)
+        if not powerlog_files:
+            return {'error': 'No PowerlogFile logs were found in the provided path.'}
+
+        # The rotated files are streamed into the chunker once the issue is named,
+        # so nothing is decompressed or copied up front.
         self.pending_analysis[session_id] = {
-            'powerlog_path': merged_powerlog_path,
-            'message_path': merged_messages_path,
+            'powerlog_files': powerlog_files,
+            'message_files': message_files,
             'status': 'awaiting_name'
         }
-        return {'response': "Analysis of the logs is complete. Please provide a name for this issue."}
+        return {'response': f"Found {len(powerlog_files)} PowerlogFile and {len(message_files)} messages files. Please provide a name for this issue."}
+
+    def get_pending_analysis(self, session_id):
+        """The pending /analyze request for a session, left in place."""
+        return self.pending_analysis[session_id]
+
+    def pop_pending_analysis(self, session_id):
+        """Takes the pending /analyze request for a session so the issue name isn't asked for twice."""
+        return self.pending_analysis.pop(session_id)
+
+    def finalize_analysis(self, session_id, issue_name, progress=None):
+        analysis_data = self.pop_pending_analysis(session_id)
+        return self.run_path_analysis(analysis_data, issue_name, progress)
 
-    def finalize_analysis(self, session_id, issue_name):
-        analysis_data = self.pending_analysis.pop(session_id)
-        powerlog_path = analysis_data['powerlog_path']
-        message_path = analysis_data['message_path']
+    def run_path_analysis(self, analysis_data, issue_name, progress=None):
+        powerlog_files = analysis_data['powerlog_files']
+        message_files = analysis_data['message_files']
 
         issue_dir = os.path.join(self.dataset_folder, issue_name)
         os.makedirs(issue_dir, exist_ok=True)
 
-        final_powerlog_path = os.path.join(issue_dir, 'PowerlogFile.txt')
         final_message_path = os.path.join(issue_dir, 'messages')
-        shutil.copy(powerlog_path, final_powerlog_path)
-        shutil.copy(message_path, final_message_path)
 
-        chunks_json_path = generate_chunks(final_powerlog_path, issue_dir, issue_name)
-        if chunks_json_path is None:
-            raise Exception("Failed to generate chunks.")
+        # messages are merged in the background while the powerlog stream is chunked
+        with ThreadPoolExecutor(max_workers=1) as background:
+            messages_merge = background.submit(merge_log_files, message_files, final_message_path)
 
-        powerLogAnalysis.analyze_power_log(chunks_json_path)
-        
-        temp_merged_logs_dir = os.path.dirname(powerlog_path)
-        if os.path.exists(temp_merged_logs_dir):
-            shutil.rmtree(temp_merged_logs_dir)
+            # An issue analysed before only needs the lines its logs have gained since
+            plan = plan_incremental(issue_dir, issue_name, powerlog_files) if INCREMENTAL_ANALYSIS else None
+            if plan is not None:
+                run_incremental(plan, keep_raw=KEEP_RAW_POWERLOG, progress=progress)
+            else:
+                self._run_full_path_analysis(powerlog_files, issue_dir, issue_name, progress)
+
+            messages_merge.result()
+        build_message_index(final_message_path)
 
         return {
             'response': f'Analysis complete. Report \'{issue_name}\' is ready.',
@@ -69,34 +93,77 @@ class LogAnalysisService:
             'issue_name': issue_name
         }
 
-    def analyze_uploaded_logs(self, powerlog_file, message_file, issue_name):
-        temp_upload_dir = os.path.join(UPLOAD_FOLDER, 'temp_upload_' + str(os.getpid()))
-        os.makedirs(temp_upload_dir, exist_ok=True)
-
-        temp_powerlog_path = os.path.join(temp_upload_dir, 'PowerlogFile.txt')
-        powerlog_file.save(temp_powerlog_path)
-
-        temp_message_path = None
-        if message_file and message_file.filename != '':
-            temp_message_path = os.path.join(temp_upload_dir, 'messages')
-            message_file.save(temp_message_path)
+    def _run_full_path_analysis(self, powerlog_files, issue_dir, issue_name, progress=None):
+        final_powerlog_path = os.path.join(issue_dir, 'PowerlogFile.txt')
 
+        # Artifacts may be hard links into the analysis cache; never rewrite them in place
+        release_artifacts(issue_dir, issue_name)
+        # With incremental analysis on, an unterminated last line is left for the next run, so
+        # the result differs from a run that reads it
+        cache_key = compute_cache_key(powerlog_files, variant='incremental' if INCREMENTAL_ANALYSIS else '')
+
+        if self.analysis_cache.restore(cache_key, issue_dir, issue_name):
+            if KEEP_RAW_POWERLOG and not os.path.exists(final_powerlog_path):
+                merge_log_files(powerlog_files, final_powerlog_path)
+            return
+
+        lines = TrackedLogLines([(f, 0) for f in powerlog_files],
+                                tee_path=final_powerlog_path if KEEP_RAW_POWERLOG else None,
+                                hold_partial=INCREMENTAL_ANALYSIS)
+        chunker = PowerLogChunker(None, issue_name, COLUMNS)
+        try:
+            chunks_json_path = generate_chunks_from_lines(lines, issue_dir, issue_name, progress, chunker=chunker)
+            powerLogAnalysis.analyze_power_log(chunks_json_path, progress=progress)
+        except AnalysisCancelled:
+            lines.close()  # closes the raw tee file before it is removed
+            release_artifacts(issue_dir, issue_name)
+            raise
+
+        store = ChunkStore(chunks_json_path)
+        chunk_ids = store.chunk_ids()
+        last_timestamp = last_chunk_timestamp(store.get(chunk_ids[-1])) if chunk_ids else None
+        if INCREMENTAL_ANALYSIS:
+            save_ingest_state(issue_dir, powerlog_files, lines.consumed, chunker.flushed_chunk,
+                              len(chunk_ids), last_timestamp)
+        self.analysis_cache.store(cache_key, issue_dir, issue_name)
+
+    def analyze_uploaded_logs(self, powerlog_file, message_file, issue_name, progress=None):
+        self.save_uploaded_logs(powerlog_file, message_file, issue_name)
+        return self.analyze_saved_upload(issue_name, progress)
+
+    def save_uploaded_logs(self, powerlog_file, message_file, issue_name):
+        """Saves the uploaded files; has to run inside the request that carries them."""
         issue_dir = os.path.join(self.dataset_folder, issue_name)
         os.makedirs(issue_dir, exist_ok=True)
 
+        # Uploads are saved straight into the issue folder; no temporary copy is needed.
+        # Existing artifacts may be hard links into the analysis cache, so unlink them first.
+        release_artifacts(issue_dir, issue_name)
         final_powerlog_path = os.path.join(issue_dir, 'PowerlogFile.txt')
         final_message_path = os.path.join(issue_dir, 'messages')
-        shutil.copy(temp_powerlog_path, final_powerlog_path)
-        if temp_message_path:
-            shutil.copy(temp_message_path, final_message_path)
-
-        chunks_json_path = generate_chunks(final_powerlog_path, issue_dir, issue_name)
-        if chunks_json_path is None:
-            raise Exception("Failed to generate chunks.")
+        powerlog_file.save(final_powerlog_path)
+        if message_file and message_file.filename != '':
+            message_file.save(final_message_path)
+            build_message_index(final_message_path)
 
-        powerLogAnalysis.analyze_power_log(chunks_json_path)
-        
-        if os.path.exists(temp_upload_dir):
-            shutil.rmtree(temp_upload_dir)
+    def analyze_saved_upload(self, issue_name, progress=None):
+        issue_dir = os.path.join(self.dataset_folder, issue_name)
+        final_powerlog_path = os.path.join(issue_dir, 'PowerlogFile.txt')
 
-        return {'message': 'Analysis complete', 'issue_name': issue_name}
\ No newline at end of file
+        cache_key = compute_cache_key([final_powerlog_path])
+        if not self.analysis_cache.restore(cache_key, issue_dir, issue_name):
+            try:
+                chunks_json_path = generate_chunks(final_powerlog_path, issue_dir, issue_name, progress)
+                if chunks_json_path is None:
+                    raise Exception("Failed to generate chunks.")
+                powerLogAnalysis.analyze_power_log(chunks_json_path, progress=progress)
+            except AnalysisCancelled:
+                # Keep the uploaded PowerlogFile.txt so the analysis can be retried
+                for template in ARTIFACTS.values():
+                    path = os.path.join(issue_dir, template.format(issue=issue_name))
+                    if os.path.exists(path):
+                        os.remove(path)
+                raise
+            self.analysis_cache.store(cache_key, issue_dir, issue_name)
+
+        return {'message': 'Analysis complete', 'issue_name': issue_name}
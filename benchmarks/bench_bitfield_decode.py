@@ -0,0 +1,114 @@
+"""
+Microbenchmark: status register decoding, comparing the previous per-bit loop in
+BatteryStatusSummarizer.decode_hex_status with the lookup tables in
+backend/PowerLogAnalyser/bitfield_decoder.py, plus the vectorized column path.
+
+Also checks that both decoders agree on all 65,536 register values for every BitsDef file.
+
+Run from the project root:  python benchmarks/bench_bitfield_decode.py
+"""
+import os
+import sys
+import time
+import random
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from PowerLogAnalyser.bitfield_decoder import BitfieldDecoder
+
+BITSDEF_FOLDER = os.path.join(ROOT, 'RAG_DATA', 'BitsDef')
+N_ROWS = 500_000
+N_DISTINCT = 64
+
+
+def load_all_bit_defs():
+    defs = {}
+    for name in sorted(os.listdir(BITSDEF_FOLDER)):
+        namespace = {}
+        with open(os.path.join(BITSDEF_FOLDER, name)) as f:
+            exec(f.read(), {}, namespace)
+        defs[name] = next(v for v in namespace.values() if isinstance(v, dict))
+    return defs
+
+
+def old_decode_hex_status(hex_status, bit_defs):
+    # Previous implementation, kept verbatim for comparison
+    if not hex_status:
+        return ["Empty value"]
+
+    decoded = []
+    hex_parts = hex_status.strip().split()
+
+    for part in hex_parts:
+        try:
+            val = int(part, 16)
+        except ValueError:
+            decoded.append(f"Invalid hex: {part}")
+            continue
+
+        active_bits = []
+        for bit in range(15, 4, -1):
+            if ((val >> bit) & 1) == 1:
+                bit_info = bit_defs.get(bit)
+                if bit_info:
+                    active_bits.append(f"Bit {bit} ({bit_info['name']}): {bit_info['description']}")
+
+        error_code_val = val & 0x0F
+        error_desc = bit_defs.get("error_code", {}).get(error_code_val, "Unknown error code")
+        active_bits.append(f"Bits 3-0 (Error Code): 0x{error_code_val:01X} → {error_desc}")
+
+        if active_bits:
+            decoded.append(f"{part} → " + " | ".join(active_bits))
+        else:
+            decoded.append(f"{part} → No active bits")
+
+    return decoded
+
+
+def timed(label, func, count):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<34} {elapsed * 1000:9.1f} ms  ({count / elapsed:,.0f} values/sec)")
+    return elapsed
+
+
+def main():
+    all_defs = load_all_bit_defs()
+
+    print("Checking all 65,536 values per register definition...")
+    for name, bit_defs in all_defs.items():
+        decoder = BitfieldDecoder(bit_defs)
+        for value in range(1 << 16):
+            hex_val = f"0x{value:04X}"
+            assert decoder.decode_hex_status(hex_val) == old_decode_hex_status(hex_val, bit_defs), (name, hex_val)
+        for odd in ["", "  ", "zz", "0x0080 0x0001", "0x1FFFF", "-1"]:
+            assert decoder.decode_hex_status(odd) == old_decode_hex_status(odd, bit_defs), (name, odd)
+    print(f"  {len(all_defs)} definitions match\n")
+
+    bit_defs = all_defs['BatteryStatus.txt']
+    rng = random.Random(0)
+    distinct = [rng.randrange(1 << 16) for _ in range(N_DISTINCT)]
+    column = np.array([rng.choice(distinct) for _ in range(N_ROWS)], dtype=np.uint16)
+    hex_values = [f"0x{v:04X}" for v in column.tolist()]
+
+    print(f"Decoding {N_ROWS:,} register values ({N_DISTINCT} distinct):")
+    old = timed("previous decode_hex_status", lambda: [old_decode_hex_status(h, bit_defs) for h in hex_values], N_ROWS)
+
+    start = time.perf_counter()
+    decoder = BitfieldDecoder(bit_defs)
+    build = time.perf_counter() - start
+    print(f"  {'table build (once per definition)':<34} {build * 1000:9.1f} ms")
+
+    new = timed("table decode_hex_status", lambda: [decoder.decode_hex_status(h) for h in hex_values], N_ROWS)
+    vec = timed("vectorized decode_column", lambda: decoder.decode_column(column), N_ROWS)
+
+    assert list(decoder.decode_column(column[:1000])) == [decoder.describe(int(v)) for v in column[:1000]]
+    print(f"\nSpeedup: {old / new:.1f}x per value, {old / vec:.1f}x vectorized")
+
+
+if __name__ == "__main__":
+    main()
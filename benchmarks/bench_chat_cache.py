@@ -0,0 +1,77 @@
+"""
+Benchmark: the chat LLM response cache against the local fake OpenAI server
+(backend/chatbot/fake_openai_server.py), which answers after a fixed delay. Measures a cold
+question, a repeated one, concurrent identical questions (coalesced into one upstream call),
+concurrent distinct ones, and a cache reopened from its SQLite file; counts the upstream
+requests each time and prints the cache metrics.
+
+Needs the openai package.
+Run from the project root:  python benchmarks/bench_chat_cache.py [delay_seconds] [clients]
+"""
+import os
+import sys
+import time
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from openai import OpenAI
+from backend.chatbot.fake_openai_server import FakeOpenAIServer
+from backend.chatbot.llm_client import ChatLLM
+from backend.chatbot.response_cache import ResponseCache
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    delay = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    server = FakeOpenAIServer(delay=delay).start()
+    client = OpenAI(api_key="test", base_url=server.base_url, max_retries=0)
+    cache_path = os.path.join(tempfile.mkdtemp(), "chat_cache.sqlite")
+    llm = ChatLLM(client, cache=ResponseCache(path=cache_path))
+
+    def upstream(label, before, elapsed):
+        print(f"{label:<34} {elapsed * 1000:8.1f} ms   upstream calls: {server.requests - before}")
+
+    before = server.requests
+    answer, elapsed = timed(llm.complete, "what is SOH?")
+    upstream("cold question", before, elapsed)
+    assert answer == "Echo: what is SOH?"
+
+    before = server.requests
+    _, elapsed = timed(llm.complete, "what is SOH?")
+    upstream("same question again", before, elapsed)
+
+    with ThreadPoolExecutor(clients) as pool:
+        before = server.requests
+        answers, elapsed = timed(lambda: list(pool.map(llm.complete, ["what is SOC?"] * clients)))
+        upstream(f"{clients} concurrent identical", before, elapsed)
+        assert set(answers) == {"Echo: what is SOC?"}
+
+        before = server.requests
+        _, elapsed = timed(lambda: list(pool.map(llm.complete, [f"question {i}" for i in range(clients)])))
+        upstream(f"{clients} concurrent distinct", before, elapsed)
+
+    reopened = ChatLLM(client, cache=ResponseCache(path=cache_path))
+    before = server.requests
+    _, elapsed = timed(reopened.complete, "what is SOH?")
+    upstream("reopened from disk", before, elapsed)
+
+    uncached = ChatLLM(client)
+    before = server.requests
+    _, elapsed = timed(uncached.complete, "what is SOH?")
+    upstream("without cache", before, elapsed)
+
+    print("metrics:", llm.cache.stats())
+    server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: time to first token of the streamed chat answer against the non-streamed one, using
+the local fake OpenAI server (backend/chatbot/fake_openai_server.py) set up like a reasoning
+model: a delay before the first chunk, then reasoning words and answer words a fixed interval
+apart. Also replays the question from the response cache, and abandons a stream halfway to check
+the upstream call is closed.
+
+Needs the openai package.
+Run from the project root:  python benchmarks/bench_chat_ttft.py [delay_seconds] [token_delay] [answer_words]
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from openai import OpenAI
+from backend.chatbot.fake_openai_server import FakeOpenAIServer
+from backend.chatbot.llm_client import ChatLLM
+from backend.chatbot.response_cache import ResponseCache
+
+REASONING_WORDS = 40
+
+
+def measure_stream(llm, prompt):
+    """(seconds to the first event, to the first answer token, to the end, answer)"""
+    start = time.perf_counter()
+    first_event = first_token = None
+    parts = []
+    for kind, text in llm.stream(prompt):
+        now = time.perf_counter() - start
+        if first_event is None:
+            first_event = now
+        if kind == "token":
+            if first_token is None:
+                first_token = now
+            parts.append(text)
+    return first_event, first_token, time.perf_counter() - start, "".join(parts)
+
+
+def main():
+    delay = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    token_delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+    words = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    prompt = " ".join(f"word{i}" for i in range(words - 1))
+    server = FakeOpenAIServer(delay=delay, token_delay=token_delay, reasoning_words=REASONING_WORDS).start()
+    client = OpenAI(api_key="test", base_url=server.base_url, max_retries=0)
+
+    uncached = ChatLLM(client)
+    start = time.perf_counter()
+    answer = uncached.complete(prompt)
+    blocking = time.perf_counter() - start
+    print(f"complete():   answer after {blocking * 1000:8.1f} ms")
+
+    llm = ChatLLM(client, cache=ResponseCache())
+    first_event, first_token, total, streamed = measure_stream(llm, prompt)
+    assert streamed.strip() == answer, "streamed answer differs from the complete() one"
+    print(f"stream():     first event {first_event * 1000:8.1f} ms, first answer token {first_token * 1000:8.1f} ms, "
+          f"end {total * 1000:8.1f} ms")
+
+    first_event, _, total, streamed = measure_stream(llm, prompt)
+    assert streamed == answer
+    print(f"cached:       first event {first_event * 1000:8.1f} ms, end {total * 1000:8.1f} ms")
+
+    before = server.requests
+    stream = llm.stream(prompt + " abandoned")
+    next(stream)
+    start = time.perf_counter()
+    stream.close()
+    print(f"abandoned:    closed in {(time.perf_counter() - start) * 1000:.1f} ms, upstream calls {server.requests - before}, "
+          f"cached: {llm.cache.get(llm.cache.key(llm.model, llm.messages(prompt + ' abandoned'), llm.temperature)) is not None}")
+    server.close()
+
+
+if __name__ == "__main__":
+    main()
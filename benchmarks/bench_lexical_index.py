@@ -0,0 +1,87 @@
+"""
+Benchmark: the in-process lexical index of the requirement database (db/lexical_index.py) on
+synthetic requirement rows. Times building it, exact identifier lookups (the queries answered
+without an embedding), BM25 searches, and the per-batch cost of keeping it in sync on upsert.
+
+Needs no model or database.
+Run from the project root:  python benchmarks/bench_lexical_index.py [rows] [queries]
+"""
+import os
+import sys
+import json
+import time
+import random
+import statistics
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from db.lexical_index import LexicalIndex
+
+WORDS = ("pump battery alarm occlusion rate infusion display message power charge low high "
+         "door sensor pressure flow bolus limit status error button bar title log set").split()
+STATUSES = ["Approved", "Draft", "Obsolete"]
+UPSERT_BATCH = 512
+
+
+def make_rows(n, rng):
+    rows = []
+    for i in range(n):
+        name = " ".join(rng.choices(WORDS, k=3)).title()
+        metadata = {
+            "Name": f"{name} {i}",
+            "Log Message": f"E{i:06d}_{rng.choice(WORDS).upper()}",
+            "Display Message": " ".join(rng.choices(WORDS, k=6)),
+            "Status": rng.choice(STATUSES),
+        }
+        document_id = f"AG-UIC-SW-{i:06d}"
+        row = {"requirement_id": metadata["Name"], "document_id": document_id, "chunk_id": 0,
+               "metadata": json.dumps(metadata), "status": metadata["Status"]}
+        rows.append(((row["requirement_id"], document_id, 0), row, metadata["Name"]))
+    return rows
+
+
+def timed(fn, queries):
+    times = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), sorted(times)[int(len(times) * 0.95)]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    q = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(0)
+    rows = make_rows(n, rng)
+
+    index = LexicalIndex()
+    start = time.perf_counter()
+    for key, row, text in rows:
+        index.add(key, row, text)
+    print(f"build: {n:,} rows in {time.perf_counter() - start:.2f}s")
+
+    picks = rng.sample(rows, q)
+    id_queries = [f"show requirement {row['document_id']}" for _, row, _ in picks]
+    log_queries = [f"what raises \"{json.loads(row['metadata'])['Log Message']}\"" for _, row, _ in picks]
+    fuzzy_queries = [" ".join(rng.choices(WORDS, k=4)) for _ in range(q)]
+
+    hits = sum(index.exact(query)[:1] == [key] for query, (key, _, _) in zip(id_queries, picks))
+    median, p95 = timed(index.exact, id_queries)
+    print(f"exact document id: median {median:.3f} ms, p95 {p95:.3f} ms, found {hits}/{q}")
+    hits = sum(index.exact(query)[:1] == [key] for query, (key, _, _) in zip(log_queries, picks))
+    print(f"exact log message: median {timed(index.exact, log_queries)[0]:.3f} ms, found {hits}/{q}")
+    print(f"exact, no identifier: median {timed(index.exact, fuzzy_queries)[0]:.3f} ms")
+    median, p95 = timed(lambda query: index.search(query, 50), fuzzy_queries)
+    print(f"BM25 top 50: median {median:.1f} ms, p95 {p95:.1f} ms")
+
+    batch = rng.sample(rows, UPSERT_BATCH)
+    start = time.perf_counter()
+    for key, row, text in batch:
+        index.add(key, row, text)
+    print(f"re-index one upsert batch of {UPSERT_BATCH}: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Load test: many concurrent /live_power_log streams served by the asyncio app in live_asgi.py,
+in one process. Each stand-in device is a local Python process printing power log lines at a
+fixed rate; clients are spread evenly over the devices. The ASGI app is driven in-process (no
+HTTP server needed), and the test reports delivered frames, event loop lag, memory, and
+checks that every upstream process is gone once the clients disconnect.
+
+Run from the project root:  python benchmarks/bench_live_asgi.py [streams] [devices] [seconds]
+"""
+import os
+import sys
+import time
+import asyncio
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from chunker import powerchunk
+import live_asgi
+
+LINES_PER_SECOND = 20
+
+# The shipped column list is confidential; use a stand-in so the live analytics have work to do
+powerchunk.COLUMNS[:] = ["BattPresent", "PowerSrc", "Volt", "Curr", "Temp", "Perc", "SOH",
+                         "BattStatus", "ChgrStatus", "SafetyAlert", "Spare"]
+
+STAND_IN = f"""
+import sys, time, random
+from datetime import datetime, timedelta
+t = datetime(2025, 7, 1)
+while True:
+    t += timedelta(seconds=1)
+    sys.stdout.write(",".join([t.strftime("%m/%d/%Y %H:%M:%S"), "1", random.choice(["AC", "AC", "DC"]),
+        str(random.randint(11000, 12600)), str(random.randint(-2000, 2000)), "25.0",
+        str(random.randint(0, 100)), str(random.randint(75, 100)), "0x0080", "0x0000", "0x0000", "0"]) + "\\n")
+    sys.stdout.flush()
+    if random.random() < 0.01:
+        sys.stderr.write("warning: stand-in device hiccup\\n"); sys.stderr.flush()
+    time.sleep({1 / LINES_PER_SECOND})
+"""
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+class Client:
+    def __init__(self, app, device):
+        self.app = app
+        self.device = device
+        self.disconnected = asyncio.Event()
+        self.frames = 0
+        self.events = 0
+        self.first_byte = None
+        self.started = None
+
+    async def receive(self):
+        await self.disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            if self.first_byte is None:
+                self.first_byte = time.perf_counter() - self.started
+            body = message["body"]
+            self.frames += body.count(b"\n\n")
+            self.events += body.count(b"event: ")
+
+    async def run(self):
+        self.started = time.perf_counter()
+        scope = {"type": "http", "method": "GET", "path": f"/live_power_log/{self.device}", "query_string": b""}
+        await self.app(scope, self.receive, self.send)
+
+
+async def measure_loop_lag(stop, interval=0.05):
+    worst = 0.0
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        worst = max(worst, loop.time() - start - interval)
+    return worst
+
+
+async def main(streams, devices, seconds):
+    app = live_asgi.create_app(
+        lambda device: live_asgi.AsyncCommandLogSource([sys.executable, "-u", "-c", STAND_IN]))
+    app.hub.idle_timeout = 1
+
+    stop = asyncio.Event()
+    lag = asyncio.create_task(measure_loop_lag(stop))
+    clients = [Client(app, f"10.0.0.{i % devices}") for i in range(streams)]
+    tasks = [asyncio.create_task(c.run()) for c in clients]
+    await asyncio.sleep(seconds)
+    processes = [u for u in app.hub._upstreams.values()]
+    memory = rss_mb()
+
+    for c in clients:
+        c.disconnected.set()
+    await asyncio.gather(*tasks)
+    stop.set()
+    worst_lag = await lag
+
+    await asyncio.sleep(app.hub.idle_timeout + 0.5)
+    left = app.hub.active_streams()
+
+    frames = sum(c.frames for c in clients)
+    first_bytes = sorted(c.first_byte for c in clients if c.first_byte is not None)
+    starved = sum(1 for c in clients if c.frames == 0)
+    print(f"{streams} streams over {devices} devices ({LINES_PER_SECOND} lines/s each), {seconds} s")
+    print(f"  upstream processes:   {len(processes)}")
+    print(f"  frames delivered:     {frames:,} ({frames / seconds:,.0f}/s), "
+          f"{sum(c.events for c in clients):,} analytics events")
+    print(f"  clients with no data: {starved}")
+    print(f"  first byte p50/max:   {first_bytes[len(first_bytes) // 2] * 1000:.0f} / {first_bytes[-1] * 1000:.0f} ms")
+    print(f"  worst event loop lag: {worst_lag * 1000:.1f} ms (includes stand-in start-up)")
+    print(f"  RSS:                  {memory:.0f} MB")
+    print(f"  upstreams left after idle timeout: {len(left)}")
+    assert not left, "upstreams were not torn down"
+    assert starved == 0, "some clients received nothing"
+
+
+if __name__ == "__main__":
+    streams = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    devices = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 10
+    asyncio.run(main(streams, devices, seconds))
@@ -0,0 +1,104 @@
+"""
+Benchmark: analyze_power_log on a synthetic 10k-chunk log, in-process and across
+process pools of increasing size. Checks that every run writes the same summary and
+stats files as the in-process run.
+
+Run from the project root:  python benchmarks/bench_parallel_analysis.py [max_workers]
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from PowerLogAnalyser import powerLogAnalysis
+
+N_CHUNKS = 10_000
+ROWS_PER_CHUNK = 60
+BITFIELDS = ["ChgrStatus", "GaugeStatus", "PFStatus", "PFAlert", "SafetyStatus", "SafetyAlert"]
+
+# The shipped parameter table is partial; add the other numeric columns so the benchmark
+# exercises a realistic amount of work per chunk
+powerLogAnalysis.parameter_definitions.update({
+    "Curr": {"min": -5000, "max": 5000, "unit": "mA"},
+    "Temp": {"min": 0, "max": 45, "unit": "°C"},
+    "Perc": {"min": 10, "max": 100, "unit": "%"},
+})
+
+
+def write_chunks(path):
+    rng = random.Random(0)
+    start = datetime(2025, 7, 1)
+    with open(path, "w", newline="") as f:
+        f.write("[\n")
+        for i in range(N_CHUNKS):
+            times = [(start + timedelta(seconds=i * ROWS_PER_CHUNK + r)).strftime("%Y-%m-%d %H:%M:%S")
+                     for r in range(ROWS_PER_CHUNK)]
+            perc = [rng.randint(0, 100) for _ in range(ROWS_PER_CHUNK)]
+            chunk = {
+                "ChunkID": f"chunk-{i:05d}",
+                "StartDate": times[0][:10], "StartTime": times[0][11:],
+                "BattPres": "1", "PowerSrc": rng.choice(["AC", "BATT"]),
+                "Perc_Time_Series": [{"value": p, "time": t} for p, t in zip(perc, times)],
+                "Volt": [rng.randint(11000, 12600) for _ in range(ROWS_PER_CHUNK)],
+                "Curr": [rng.randint(-2000, 2000) for _ in range(ROWS_PER_CHUNK)],
+                "Temp": [round(rng.uniform(20, 50), 1) for _ in range(ROWS_PER_CHUNK)],
+                "Perc": perc,
+                "SOH": rng.randint(80, 100),
+            }
+            for name in BITFIELDS:
+                chunk[name] = [f"0x{rng.choice([0, 0x80, 0x4, 0x8001]):04X}" for _ in range(ROWS_PER_CHUNK)]
+            chunk["EndDate"], chunk["EndTime"] = times[-1][:10], times[-1][11:]
+            f.write(("" if i == 0 else ",\n") + json.dumps(chunk))
+        f.write("\n]\n")
+
+
+def read_outputs(directory):
+    with open(os.path.join(directory, "powerchunk_analysis_summary.txt"), encoding="utf-8") as f:
+        summary = f.read()
+    with open(os.path.join(directory, powerLogAnalysis.STATS_FILE_NAME), encoding="utf-8") as f:
+        stats = f.read()
+    return summary, stats
+
+
+def main():
+    max_workers = int(sys.argv[1]) if len(sys.argv) > 1 else (os.cpu_count() or 1)
+    work_dir = tempfile.mkdtemp(prefix="bench_analysis_")
+    try:
+        chunks_path = os.path.join(work_dir, "chunks_bench.json")
+        write_chunks(chunks_path)
+        print(f"{N_CHUNKS:,} chunks x {ROWS_PER_CHUNK} rows, {os.path.getsize(chunks_path) / 1e6:.0f} MB, "
+              f"{os.cpu_count()} CPUs\n")
+
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= max_workers:
+            worker_counts.append(worker_counts[-1] * 2)
+        if worker_counts[-1] != max_workers:
+            worker_counts.append(max_workers)
+
+        baseline = None
+        base_elapsed = None
+        for workers in worker_counts:
+            start = time.perf_counter()
+            powerLogAnalysis.analyze_power_log(chunks_path, workers=workers)
+            elapsed = time.perf_counter() - start
+
+            outputs = read_outputs(work_dir)
+            if baseline is None:
+                baseline, base_elapsed = outputs, elapsed
+            assert outputs == baseline, f"output with {workers} workers differs from the in-process run"
+            print(f"  workers={workers:<3} {elapsed:7.2f} s  {N_CHUNKS / elapsed:8,.0f} chunks/sec  "
+                  f"speedup {base_elapsed / elapsed:4.2f}x")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark: recall and latency of RequirementDatabase.query_similar on a synthetic 100k-row
+table, with a flat scan and with the IVF-PQ index at several nprobes/refine_factor settings,
+unfiltered and with a status + document_id pre-filter. Recall@k is measured against exact
+L2 neighbours computed with NumPy.
+
+Needs lancedb installed.
+Run from the project root:  python benchmarks/bench_requirement_index.py [rows] [queries]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import statistics
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from db.lancedb_manager import RequirementDatabase
+
+DIM = 384
+TOP_K = 10
+CLUSTERS = 500
+DOCUMENTS = 1000
+STATUSES = ["Approved", "Draft", "Obsolete"]
+SETTINGS = [(5, None), (10, None), (20, None), (20, 5), (50, 5), (50, 10)]
+
+
+def make_data(rows, rng):
+    centers = rng.normal(size=(CLUSTERS, DIM)).astype(np.float32)
+    vectors = centers[rng.integers(0, CLUSTERS, rows)] + 0.3 * rng.normal(size=(rows, DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    documents = rng.integers(0, DOCUMENTS, rows)
+    statuses = rng.integers(0, len(STATUSES), rows)
+    records = [
+        {"requirement_id": f"REQ-{i:06d}", "document_id": f"DOC-{documents[i]:04d}", "chunk_id": 0,
+         "text": "", "metadata": {"Status": STATUSES[statuses[i]]}}
+        for i in range(rows)
+    ]
+    return vectors, records, documents, statuses
+
+
+def exact_neighbours(vectors, queries, mask=None):
+    candidates = np.arange(len(vectors)) if mask is None else np.flatnonzero(mask)
+    subset = vectors[candidates]
+    # |v - q|^2 up to the per-query constant |q|^2
+    distances = (subset ** 2).sum(axis=1)[None, :] - 2 * queries @ subset.T
+    return candidates[np.argsort(distances, axis=1)[:, :TOP_K]]
+
+
+def run(db, queries, truth, records_ids, **filters):
+    timings, recalls = [], []
+    nprobes, refine = filters.pop("settings", (None, None))
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        results = db.query_similar(query, top_k=TOP_K, columns=["requirement_id"],
+                                   nprobes=nprobes, refine_factor=refine or 0, **filters)
+        timings.append((time.perf_counter() - start) * 1000)
+        found = {r["requirement_id"] for r in results}
+        recalls.append(len(found & {records_ids[i] for i in expected}) / TOP_K)
+    return statistics.mean(recalls), statistics.median(timings)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_queries = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    rng = np.random.default_rng(0)
+    vectors, records, documents, statuses = make_data(rows, rng)
+    ids = [r["requirement_id"] for r in records]
+    queries = vectors[rng.integers(0, rows, n_queries)] + 0.05 * rng.normal(size=(n_queries, DIM)).astype(np.float32)
+
+    filter_docs = [f"DOC-{d:04d}" for d in range(0, DOCUMENTS, 4)]
+    mask = np.isin(documents, np.arange(0, DOCUMENTS, 4)) & (statuses == 0)
+    truth = exact_neighbours(vectors, queries)
+    filtered_truth = exact_neighbours(vectors, queries, mask)
+    filtered = {"status": "Approved", "document_id": filter_docs}
+
+    work_dir = tempfile.mkdtemp(prefix="bench_index_")
+    try:
+        db = RequirementDatabase(db_path=work_dir, refine_factor=None)
+        for start in range(0, rows, 10_000):
+            db.add_requirements(records[start:start + 10_000], vectors[start:start + 10_000])
+        db.optimize()
+
+        print(f"{rows:,} rows, {n_queries} queries, recall@{TOP_K}\n")
+        print(f"  {'search':<28}{'recall':>8}{'p50 ms':>9}   {'filtered recall':>15}{'p50 ms':>9}")
+        recall, latency = run(db, queries, truth, ids)
+        f_recall, f_latency = run(db, queries, filtered_truth, ids, **filtered)
+        print(f"  {'flat':<28}{recall:8.3f}{latency:9.2f}   {f_recall:15.3f}{f_latency:9.2f}")
+
+        start = time.perf_counter()
+        db.ensure_index()
+        print(f"\n  index build: {time.perf_counter() - start:.1f} s\n")
+        for nprobes, refine in SETTINGS:
+            recall, latency = run(db, queries, truth, ids, settings=(nprobes, refine))
+            f_recall, f_latency = run(db, queries, filtered_truth, ids, settings=(nprobes, refine), **filtered)
+            label = f"IVF-PQ nprobes={nprobes} refine={refine or '-'}"
+            print(f"  {label:<28}{recall:8.3f}{latency:9.2f}   {f_recall:15.3f}{f_latency:9.2f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
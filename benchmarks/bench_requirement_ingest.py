@@ -0,0 +1,94 @@
+"""
+Benchmark: ingesting a synthetic 2,000-document requirement corpus into LanceDB, record by
+record (get_embedding + upsert_requirement, the old path) versus ingest_pdfs (batched encode,
+one bulk write per batch). Text extraction is skipped: every document already has its
+extracted text file, so only embedding and storage are measured. The per-record path is run
+on a sample and extrapolated.
+
+Needs the requirement stack installed (sentence-transformers, lancedb, docling).
+Run from the project root:  python benchmarks/bench_requirement_ingest.py [documents] [sample]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+from pathlib import Path
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from db.lancedb_manager import RequirementDatabase
+from backend.requirement_embedder.embedder import get_embedding, build_embed_input
+from backend.requirement_embedder.pdf_extractor import ingest_pdfs, process_text_file
+
+WORDS = ("pump infusion battery alarm occlusion rate volume display message status button "
+         "charger voltage current temperature screen title log set bolus limit").split()
+
+
+def write_corpus(directory, count):
+    rng = random.Random(0)
+    pdf_files = []
+    for i in range(count):
+        stem = f"REQ-{i:05d}"
+        rows = {
+            "Name": f"{stem} " + " ".join(rng.choices(WORDS, k=6)),
+            "Description": " ".join(rng.choices(WORDS, k=40)),
+            "Display Message": " ".join(rng.choices(WORDS, k=8)),
+            "Status": rng.choice(["Approved", "Draft"]),
+            "Log Message": " ".join(rng.choices(WORDS, k=5)),
+        }
+        table = "| Key | Value |\n|---|---|\n" + "\n".join(f"| {k} | {v} |" for k, v in rows.items())
+        (directory / f"{stem}.txt").write_text(table, encoding="utf-8")
+        pdf_files.append(directory / f"{stem}.pdf")  # never opened: the text already exists
+    return pdf_files
+
+
+def fragment_count(db_path):
+    return len(os.listdir(os.path.join(db_path, "requirements.lance", "data")))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    sample = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_ingest_"))
+    try:
+        texts = work_dir / "texts"
+        texts.mkdir()
+        pdf_files = write_corpus(texts, count)
+        get_embedding("warm up")  # model load is not part of either path
+
+        old_db_path = str(work_dir / "old")
+        db = RequirementDatabase(db_path=old_db_path)
+        start = time.perf_counter()
+        for pdf_file in pdf_files[:sample]:
+            record = process_text_file(str(texts / f"{pdf_file.stem}.txt"))
+            db.upsert_requirement(
+                requirement_id=record["requirement_id"],
+                document_id=pdf_file.stem,
+                chunk_id=random.randint(0, 999),
+                text=record["text"],
+                metadata=record["metadata"],
+                embedding=get_embedding(build_embed_input(record["text"], record["metadata"])),
+            )
+        old_elapsed = (time.perf_counter() - start) * count / sample
+        old_fragments = fragment_count(old_db_path) * count // sample
+
+        new_db_path = str(work_dir / "new")
+        db = RequirementDatabase(db_path=new_db_path)
+        start = time.perf_counter()
+        written = ingest_pdfs(pdf_files, texts, db)
+        new_elapsed = time.perf_counter() - start
+        assert written == count and db.dataset.count_rows() == count
+
+        print(f"\n{count:,} documents")
+        print(f"  per record (extrapolated from {sample}): {old_elapsed:8.1f} s, ~{old_fragments:,} fragments")
+        print(f"  ingest_pdfs:                        {new_elapsed:8.1f} s, {fragment_count(new_db_path):,} fragments")
+        print(f"  speedup: {old_elapsed / new_elapsed:.1f}x")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
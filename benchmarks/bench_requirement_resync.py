@@ -0,0 +1,83 @@
+"""
+Benchmark: requirement query latency across repeated re-syncs of the same corpus.
+
+"append" re-ingests every document with add_requirements, as upserting used to do, so each
+sync adds a full copy of the rows and new fragments. "upsert" runs sync_requirement_pdfs,
+which replaces each document's rows and compacts the table afterwards. After every sync the
+median latency of top-5 searches, the row count and the data file count are reported.
+
+Needs the requirement stack installed (sentence-transformers, lancedb, docling).
+Run from the project root:  python benchmarks/bench_requirement_resync.py [documents] [syncs]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import statistics
+from pathlib import Path
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from db.lancedb_manager import RequirementDatabase
+from backend.requirement_embedder.embedder import get_embeddings, build_embed_input
+from backend.requirement_embedder.pdf_extractor import process_text_file, sync_requirement_pdfs
+from bench_requirement_ingest import write_corpus, fragment_count
+
+QUERIES = 50
+
+
+def query_latency_ms(db, queries):
+    timings = []
+    for vector in queries:
+        start = time.perf_counter()
+        db.query_similar(vector.tolist(), top_k=5)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def append_sync(pdf_files, texts, db):
+    records = []
+    for pdf_file in pdf_files:
+        record = process_text_file(str(texts / f"{pdf_file.stem}.txt"))
+        records.append({
+            "requirement_id": record["requirement_id"], "document_id": pdf_file.stem,
+            "chunk_id": record["chunk_id"], "text": record["text"], "metadata": record["metadata"],
+        })
+    for i in range(0, len(records), 512):
+        batch = records[i:i + 512]
+        db.add_requirements(batch, get_embeddings([build_embed_input(r["text"], r["metadata"]) for r in batch]))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    syncs = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_resync_"))
+    try:
+        texts = work_dir / "corpus"
+        texts.mkdir()
+        pdf_files = write_corpus(texts, count)
+        for pdf_file in pdf_files:
+            pdf_file.touch()  # sync looks for the PDFs; their text is already extracted
+        queries = np.random.default_rng(0).normal(size=(QUERIES, 384)).astype(np.float32)
+
+        for mode in ("append", "upsert"):
+            db_path = str(work_dir / mode)
+            db = RequirementDatabase(db_path=db_path)
+            print(f"\n{mode}: {count:,} documents")
+            for sync in range(1, syncs + 1):
+                if mode == "append":
+                    append_sync(pdf_files, texts, db)
+                else:
+                    sync_requirement_pdfs(texts, texts, db)
+                print(f"  sync {sync:2d}: {db.dataset.count_rows():7,} rows, {fragment_count(db_path):4d} data files, "
+                      f"query p50 {query_latency_ms(db, queries):6.2f} ms")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
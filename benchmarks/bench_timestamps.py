@@ -0,0 +1,77 @@
+"""
+Microbenchmark: lines/sec for timestamp handling on powerlog and messages lines,
+comparing the previous strptime-based code with backend/chunker/timestamps.py.
+
+Run from the project root:  python benchmarks/bench_timestamps.py
+"""
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from chunker.timestamps import parse_messages_timestamp, parse_powerlog_timestamp
+
+N_LINES = 200_000
+
+
+def make_powerlog_lines(n):
+    start = datetime(2025, 7, 1, 8, 0, 0)
+    return [
+        f"{(start + timedelta(seconds=i)).strftime('%m/%d/%Y %H:%M:%S')},1,AC,12000,-150,31.2,87,95,0x0080,0x0000"
+        for i in range(n)
+    ]
+
+
+def make_messages_lines(n):
+    # Several messages per second, like a busy syslog
+    start = datetime(2025, 7, 1, 8, 0, 0)
+    return [
+        f"{(start + timedelta(milliseconds=250 * i)).strftime('%b %e %H:%M:%S')}.{(250 * i) % 1000:03d} pump daemon[42]: event {i}\n"
+        for i in range(n)
+    ]
+
+
+def old_powerlog(lines):
+    # is_valid_data_line + parse_line each ran strptime
+    for line in lines:
+        parts = line.strip().split(",")
+        datetime.strptime(parts[0], "%m/%d/%Y %H:%M:%S")
+        datetime.strptime(parts[0], "%m/%d/%Y %H:%M:%S")
+
+
+def new_powerlog(lines):
+    for line in lines:
+        parts = line.strip().split(",")
+        parse_powerlog_timestamp(parts[0])
+
+
+def old_messages(lines, year):
+    for line in lines:
+        match = re.match(r'(\w{3}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2})\.\d{3}', line)
+        if match:
+            datetime.strptime(f"{year} {match.group(1)}", '%Y %b %d %H:%M:%S')
+
+
+def new_messages(lines, year):
+    for line in lines:
+        parse_messages_timestamp(line, year)
+
+
+def measure(label, func, *args):
+    started = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {N_LINES / elapsed:>14,.0f} lines/sec")
+
+
+if __name__ == "__main__":
+    powerlog_lines = make_powerlog_lines(N_LINES)
+    messages_lines = make_messages_lines(N_LINES)
+
+    measure("powerlog  strptime x2", old_powerlog, powerlog_lines)
+    measure("powerlog  fixed-layout", new_powerlog, powerlog_lines)
+    measure("messages  re + strptime", old_messages, messages_lines, 2025)
+    measure("messages  fixed-layout", new_messages, messages_lines, 2025)
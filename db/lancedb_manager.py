@@ -1,12 +1,64 @@
+import numpy as np
 import pyarrow as pa
 import lancedb, json
-from typing import Optional, Dict, Any, List, Union
+import threading
+from datetime import timedelta
+from typing import Optional, Dict, Any, List, Union, Iterable
+from db.lexical_index import LexicalIndex, rrf_fuse
+
+# Rows are identified by these columns: upserting a record with the same key replaces it
+KEY_COLUMNS = ["requirement_id", "document_id", "chunk_id"]
+
+# Vector index: built once the table has INDEX_MIN_ROWS rows (below that a flat scan is fast
+# and exact), rebuilt when more than REINDEX_UNINDEXED_FRACTION of the rows aren't covered
+INDEX_MIN_ROWS = 5000
+REINDEX_UNINDEXED_FRACTION = 0.1
+INDEX_TYPE = "IVF_PQ"  # or "IVF_HNSW_SQ"
+# Search settings for an indexed table: IVF partitions probed per query, and how many times
+# top_k candidates are re-ranked with exact distances
+DEFAULT_NPROBES = 20
+DEFAULT_REFINE_FACTOR = 5
+
+# Columns query_similar returns by default
+RESULT_COLUMNS = ["requirement_id", "document_id", "metadata"]
+# Columns kept in the lexical index for each row (a lexical hit is returned without a table read)
+LEXICAL_COLUMNS = KEY_COLUMNS + ["metadata", "status"]
+# Candidates taken from each retriever before their rankings are fused
+HYBRID_CANDIDATES = 50
+
+
+def _sql_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _in_filter(column: str, values: Union[str, Iterable[str]]) -> str:
+    values = [values] if isinstance(values, str) else sorted(set(values))
+    return f"{column} IN ({', '.join(_sql_string(v) for v in values)})"
+
+
+def _metadata_json(metadata) -> str:
+    return json.dumps(metadata) if metadata else ""
+
+
+def _metadata_status(metadata) -> Optional[str]:
+    if isinstance(metadata, str):
+        try:
+            metadata = json.loads(metadata) if metadata else {}
+        except ValueError:
+            return None
+    return (metadata or {}).get("Status")
 
 
 class RequirementDatabase:
-    def __init__(self, db_path: str = "db/lancedb", embedding_dim: int = 384):
+    def __init__(self, db_path: str = "db/lancedb", embedding_dim: int = 384,
+                 nprobes: int = DEFAULT_NPROBES, refine_factor: Optional[int] = DEFAULT_REFINE_FACTOR,
+                 index_min_rows: int = INDEX_MIN_ROWS, index_type: str = INDEX_TYPE):
         self.db_path = db_path
         self.embedding_dim = embedding_dim or 384
+        self.nprobes = nprobes
+        self.refine_factor = refine_factor
+        self.index_min_rows = index_min_rows
+        self.index_type = index_type
         self.schema = self._create_schema()
         self.db = lancedb.connect(self.db_path)
         # Try open dataset, else create new
@@ -14,6 +66,21 @@ class RequirementDatabase:
             self.dataset = self.db.open_table("requirements")
         except Exception:
             self.dataset = self.db.create_table("requirements", schema=self.schema)
+        self._migrate()
+        # Built from the table on first use, then kept in step with this object's writes
+        self._lexical = None
+        self._lexical_version = None
+        self._lexical_lock = threading.Lock()
+
+    def _migrate(self):
+        """Tables created before the status column existed get it, filled from the metadata."""
+        if "status" in self.dataset.schema.names:
+            return
+        data = self.dataset.to_arrow()
+        statuses = [_metadata_status(m) for m in data.column("metadata").to_pylist()]
+        data = data.append_column(self.schema.field("status"), pa.array(statuses, pa.string()))
+        self.dataset = self.db.create_table("requirements", data.select(self.schema.names),
+                                            schema=self.schema, mode="overwrite")
 
     def _create_schema(self) -> pa.Schema:
         """
@@ -28,6 +95,8 @@ class RequirementDatabase:
             pa.field("metadata", pa.string()),
             # embedding vector (fixed length list of float32)
             pa.field("embedding", pa.list_(pa.float32(), self.embedding_dim), nullable=False),
+            # metadata["Status"], as a column so searches can filter on it
+            pa.field("status", pa.string(), nullable=True),
         ])
 
     def upsert_requirement(
@@ -43,9 +112,11 @@ class RequirementDatabase:
         Insert or update a requirement chunk.
 
         Args:
-            requirement_id: Primary key (string).
-            document_id: Source document id.
-            chunk_id: Chunk index.
+            requirement_id: Requirement id (string).
+            document_id: Source document id (stored as "" when None).
+            chunk_id: Chunk index within the document (stored as 0 when None). Together with
+                      requirement_id and document_id it identifies the row, so it must be
+                      deterministic.
             text: Raw chunk text.
             metadata: Dynamic key-value pairs.
             embedding: Embedding vector as list or numpy array.
@@ -75,19 +146,325 @@ class RequirementDatabase:
             "document_id": document_id,
             "chunk_id": chunk_id,
             "text": text,
-            "metadata": json.dumps(metadata) if metadata else "",
-            "embedding": embedding,
+            "metadata": metadata,
         }
-        # Note: LanceDB currently appends. Implement update logic if needed.
-        self.dataset.add([record])
+        self.upsert_requirements([record], [embedding])
+
+    def add_requirements(self, records: List[Dict[str, Any]], embeddings: Union[List[List[float]], Any]) -> None:
+        """
+        Bulk insert of requirement chunks: one Arrow table, written with a single add (one
+        Lance fragment) instead of one per record. Appends even if the keys already exist;
+        use upsert_requirements to replace existing rows.
+
+        Args:
+            records: Dicts with requirement_id, document_id, chunk_id, text and metadata
+                     (same meaning as the upsert_requirement arguments).
+            embeddings: One vector per record, as a (len(records), dim) array or list of lists.
+        """
+        if not records:
+            return
+        version = self.dataset.version
+        self.dataset.add(self._to_table(records, embeddings))
+        self._update_lexical(version, lambda index: self._index_records(index, records))
+
+    def upsert_requirements(self, records: List[Dict[str, Any]], embeddings: Union[List[List[float]], Any],
+                            replace_documents: bool = False) -> None:
+        """
+        Bulk insert or update keyed on (requirement_id, document_id, chunk_id), in one
+        merge_insert.
+
+        Args:
+            records, embeddings: As for add_requirements. If several records share a key,
+                                 the last one wins. A missing document_id or chunk_id is
+                                 stored as "" or 0, since NULL keys never match.
+            replace_documents: Also delete the existing rows of the records' documents that
+                               aren't in `records`, i.e. the records are the documents'
+                               complete new contents.
+        """
+        if not records:
+            return
+        if any(r.get("requirement_id") is None for r in records):
+            raise ValueError("upsert_requirements needs a requirement_id for every record")
+        records = [
+            {**r,
+             "document_id": "" if r.get("document_id") is None else r["document_id"],
+             "chunk_id": 0 if r.get("chunk_id") is None else r["chunk_id"]}
+            for r in records
+        ]
+        latest = {}
+        for i, record in enumerate(records):
+            latest[tuple(record.get(column) for column in KEY_COLUMNS)] = i
+        if len(latest) < len(records):
+            keep = sorted(latest.values())
+            records = [records[i] for i in keep]
+            embeddings = np.asarray(embeddings, dtype=np.float32)[keep]
+
+        merge = (
+            self.dataset.merge_insert(KEY_COLUMNS)
+            .when_matched_update_all()
+            .when_not_matched_insert_all()
+        )
+        document_ids = []
+        if replace_documents:
+            document_ids = sorted({r["document_id"] for r in records if r["document_id"]})
+            if document_ids:
+                merge = merge.when_not_matched_by_source_delete(self._documents_filter(document_ids))
+        version = self.dataset.version
+        merge.execute(self._to_table(records, embeddings))
+
+        def update(index):
+            index.remove_where("document_id", document_ids)
+            self._index_records(index, records)
+        self._update_lexical(version, update)
+
+    def document_ids(self) -> set:
+        """Ids of the documents that have rows in the table."""
+        rows = self.dataset.count_rows()
+        if not rows:
+            return set()
+        column = self.dataset.search().select(["document_id"]).limit(rows).to_arrow().column("document_id")
+        return {value for value in column.to_pylist() if value is not None}
+
+    def delete_documents(self, document_ids: Iterable[str]) -> None:
+        """Removes every row of the given documents (e.g. PDFs removed from raw_pdfs)."""
+        document_ids = sorted(set(document_ids))
+        if document_ids:
+            version = self.dataset.version
+            self.dataset.delete(self._documents_filter(document_ids))
+            self._update_lexical(version, lambda index: index.remove_where("document_id", document_ids))
+
+    def optimize(self, keep_versions_for: timedelta = timedelta(minutes=10)) -> None:
+        """
+        Maintenance: compacts the small fragments left by writes and deletes into larger
+        ones, and removes table versions older than `keep_versions_for` (readers still on
+        an older version keep working until then).
+        """
+        version = self.dataset.version
+        self.dataset.optimize(cleanup_older_than=keep_versions_for)
+        # Same rows, so the lexical index stays as it is
+        self._update_lexical(version, lambda index: None)
+
+    def vector_index(self):
+        """The index on the embedding column, or None."""
+        for index in self.dataset.list_indices():
+            if "embedding" in index.columns:
+                return index
+        return None
+
+    def ensure_index(self, force: bool = False) -> bool:
+        """
+        Index lifecycle, run after bulk writes: builds the vector index once the table has
+        index_min_rows rows, and rebuilds it (retraining the partitions and codebooks on all
+        rows) when too many rows have been added since. Returns whether it (re)built the index.
+        """
+        rows = self.dataset.count_rows()
+        if rows < self.index_min_rows and not force:
+            return False
+        index = self.vector_index()
+        if index is not None and not force:
+            stats = self.dataset.index_stats(index.name)
+            if stats is not None and stats.num_unindexed_rows <= rows * REINDEX_UNINDEXED_FRACTION:
+                return False
+
+        options = {
+            "metric": "l2",  # same metric as query_similar
+            "vector_column_name": "embedding",
+            "replace": True,
+            "index_type": self.index_type,
+            "num_partitions": max(1, int(rows ** 0.5)),
+        }
+        if self.index_type == "IVF_PQ":
+            # 8 dimensions per sub-vector
+            options["num_sub_vectors"] = max(1, self.embedding_dim // 8)
+        print(f" Building {self.index_type} index on {rows:,} requirement rows")
+        version = self.dataset.version
+        self.dataset.create_index(**options)
+        self._update_lexical(version, lambda index: None)
+        return True
+
+    def lexical_index(self) -> LexicalIndex:
+        """
+        The exact-match/BM25 index over the rows' text and metadata. Built from the table on
+        first use; writes made through this object update it in place, and it is rebuilt if
+        the table was changed some other way.
+        """
+        with self._lexical_lock:
+            version = self.dataset.version
+            if self._lexical is None or self._lexical_version != version:
+                index = LexicalIndex()
+                rows = self.dataset.count_rows()
+                if rows:
+                    data = self.dataset.search().select(LEXICAL_COLUMNS + ["text"]).limit(rows).to_arrow()
+                    for row in data.to_pylist():
+                        text = row.pop("text")
+                        index.add(tuple(row[c] for c in KEY_COLUMNS), row, text)
+                self._lexical = index
+                self._lexical_version = version
+            return self._lexical
+
+    def _update_lexical(self, version_before, update) -> None:
+        """Applies a write to the lexical index, if it is built and was current before the write."""
+        with self._lexical_lock:
+            if self._lexical is None:
+                return
+            if self._lexical_version != version_before:
+                self._lexical = None
+                return
+            update(self._lexical)
+            self._lexical_version = self.dataset.version
+
+    @staticmethod
+    def _index_records(index: LexicalIndex, records: List[Dict[str, Any]]) -> None:
+        for r in records:
+            row = {
+                "requirement_id": r["requirement_id"],
+                "document_id": r.get("document_id"),
+                "chunk_id": r.get("chunk_id"),
+                "metadata": _metadata_json(r.get("metadata")),
+                "status": r.get("status") or _metadata_status(r.get("metadata")),
+            }
+            index.add(tuple(row[c] for c in KEY_COLUMNS), row, r.get("text"))
+
+    @staticmethod
+    def _documents_filter(document_ids: List[str]) -> str:
+        return _in_filter("document_id", document_ids)
+
+    def _to_table(self, records: List[Dict[str, Any]], embeddings: Union[List[List[float]], Any]) -> pa.Table:
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[0] != len(records):
+            raise ValueError(f"Expected {len(records)} embeddings, got array of shape {vectors.shape}")
+        if vectors.shape[1] != self.embedding_dim:
+            raise ValueError(f"Embedding length {vectors.shape[1]} != expected {self.embedding_dim}")
+
+        table = pa.Table.from_arrays([
+            pa.array([r["requirement_id"] for r in records], pa.string()),
+            pa.array([r.get("document_id") for r in records], pa.string()),
+            pa.array([r.get("chunk_id") for r in records], pa.int64()),
+            pa.array([r.get("text") for r in records], pa.string()),
+            pa.array([_metadata_json(r.get("metadata")) for r in records], pa.string()),
+            pa.FixedSizeListArray.from_arrays(pa.array(vectors.reshape(-1)), self.embedding_dim),
+            pa.array([r.get("status") or _metadata_status(r.get("metadata")) for r in records], pa.string()),
+        ], schema=self.schema)
+        return table
 
     # lancedb_manager.py
-    def query_similar(self, query_embedding: list[float], top_k: int = 5):
-        results = self.dataset.search(query_embedding).limit(top_k).to_pandas()
-        # Only keep the fields you want
-        records = results[["requirement_id", "document_id", "metadata"]].to_dict(orient="records")
-        return records
-    
+    def query_similar(
+        self,
+        query_embedding: Union[List[float], Any],
+        top_k: int = 5,
+        document_id: Optional[Union[str, Iterable[str]]] = None,
+        status: Optional[Union[str, Iterable[str]]] = None,
+        where: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        nprobes: Optional[int] = None,
+        refine_factor: Optional[int] = None,
+        as_arrow: bool = False,
+    ):
+        """
+        Nearest requirement chunks to a query embedding.
+
+        Args:
+            document_id, status: Only search these documents / requirement statuses (one
+                                 value or several). Applied before the vector search, so
+                                 top_k results are returned whenever that many rows match.
+            where: Additional SQL filter, also applied before the search.
+            columns: Columns to return (default RESULT_COLUMNS); "_distance" is added if asked for.
+            nprobes, refine_factor: Override the index search settings for this query.
+            as_arrow: Return a pyarrow Table instead of a list of dicts.
+        """
+        columns = list(columns or RESULT_COLUMNS)
+        query = (
+            self.dataset.search(np.asarray(query_embedding, dtype=np.float32), vector_column_name="embedding")
+            .select([c for c in columns if c != "_distance"])
+            .limit(top_k)
+            .nprobes(nprobes or self.nprobes)
+        )
+        refine_factor = refine_factor if refine_factor is not None else self.refine_factor
+        if refine_factor:
+            query = query.refine_factor(refine_factor)
+
+        filters = []
+        if document_id is not None:
+            filters.append(_in_filter("document_id", document_id))
+        if status is not None:
+            filters.append(_in_filter("status", status))
+        if where:
+            filters.append(f"({where})")
+        if filters:
+            query = query.where(" AND ".join(filters), prefilter=True)
+
+        results = query.to_arrow()
+        if "_distance" not in columns and "_distance" in results.column_names:
+            results = results.drop_columns(["_distance"])
+        results = results.select(columns)
+        return results if as_arrow else results.to_pylist()
+
+    def exact_matches(self, query: str, top_k: int = 5, columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Rows an identifier in the query names exactly: a requirement or document id, or the
+        whole value of one of the Name / Log Message / Display fields (quoted or not). No
+        embedding is needed; an empty list means the query names none.
+        """
+        keys = self.lexical_index().exact(query)[:top_k]
+        return self._rows_for_keys(keys, columns)
+
+    def query_hybrid(
+        self,
+        query_text: str,
+        query_embedding: Union[List[float], Any],
+        top_k: int = 5,
+        document_id: Optional[Union[str, Iterable[str]]] = None,
+        status: Optional[Union[str, Iterable[str]]] = None,
+        columns: Optional[List[str]] = None,
+        candidates: int = HYBRID_CANDIDATES,
+    ) -> List[Dict[str, Any]]:
+        """
+        Lexical (BM25 over text and metadata) and vector search, with their rankings merged
+        by reciprocal rank fusion. Each retriever contributes its best `candidates` rows;
+        document_id and status filter both, as in query_similar.
+        """
+        index = self.lexical_index()
+        documents = None if document_id is None else {document_id} if isinstance(document_id, str) else set(document_id)
+        statuses = None if status is None else {status} if isinstance(status, str) else set(status)
+        lexical = []
+        for key, _ in index.search(query_text, top_k=len(index) if documents or statuses else candidates):
+            row = index.row(key)
+            if documents is not None and row["document_id"] not in documents:
+                continue
+            if statuses is not None and row["status"] not in statuses:
+                continue
+            lexical.append(key)
+            if len(lexical) == candidates:
+                break
+
+        vector = self.query_similar(query_embedding, top_k=candidates, document_id=document_id,
+                                    status=status, columns=KEY_COLUMNS)
+        vector = [tuple(row[c] for c in KEY_COLUMNS) for row in vector]
+        return self._rows_for_keys(rrf_fuse([lexical, vector], top_k), columns)
+
+    def _rows_for_keys(self, keys: List[tuple], columns: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """The rows with the given keys, in that order, with `columns` (default RESULT_COLUMNS)."""
+        columns = list(columns or RESULT_COLUMNS)
+        if not keys:
+            return []
+        if set(columns) <= set(LEXICAL_COLUMNS):
+            index = self.lexical_index()
+            rows = [index.row(key) for key in keys]
+            return [{c: row[c] for c in columns} for row in rows if row is not None]
+
+        # Columns the lexical index doesn't keep (text, embedding) are read from the table
+        ids = _in_filter("requirement_id", {key[0] for key in keys})
+        data = (
+            self.dataset.search()
+            .where(ids)
+            .select(list(dict.fromkeys(KEY_COLUMNS + columns)))
+            .limit(max(1, self.dataset.count_rows(ids)))
+            .to_arrow()
+            .to_pylist()
+        )
+        by_key = {tuple(row[c] for c in KEY_COLUMNS): row for row in data}
+        return [{c: by_key[key][c] for c in columns} for key in keys if key in by_key]
+
     def close(self):
         """
         Close the DB connection if needed.
@@ -0,0 +1,174 @@
+import re
+import math
+import heapq
+import json
+import threading
+from collections import Counter
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+"""
+In-process lexical index over the requirement rows, next to the vector search in
+RequirementDatabase:
+
+- an exact-match map from identifier fields (requirement id, document id, the Name and Log
+  Message metadata, ...) to the rows carrying them, so a question naming "AG-UIC-SW-964" is
+  answered with a dict lookup and no embedding;
+- a BM25 index over the text and every metadata value, whose ranking is fused with the vector
+  ranking (reciprocal rank fusion) for everything else.
+
+Rows are identified by the same key as in the table and carry the columns returned to the
+caller, so a lexical hit needs no database read.
+"""
+
+# Metadata fields whose whole value identifies a requirement
+EXACT_METADATA_FIELDS = ("Name", "Log Message", "Display Title", "Display Message")
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Reciprocal rank fusion constant: larger values flatten the difference between top ranks
+RRF_K = 60
+
+_WORD = re.compile(r"[0-9a-z]+")
+# Words joined by - _ . / (requirement ids, log codes, versions); also indexed as one token
+_COMPOUND = re.compile(r"[0-9a-z]+(?:[-_./][0-9a-z]+)+")
+_QUOTED = re.compile(r"\"([^\"]+)\"|'([^']+)'|`([^`]+)`")
+# Single words with a digit in them (REQ964, E42) are looked up as identifiers too
+_CODE = re.compile(r"\b[a-z_]*[0-9][0-9a-z_]*\b")
+
+
+def tokenize(text: str) -> List[str]:
+    text = text.lower()
+    return _WORD.findall(text) + _COMPOUND.findall(text)
+
+
+def normalize_exact(value: str) -> str:
+    return " ".join(value.split()).strip(" .,;:!?\"'`()[]").casefold()
+
+
+def exact_candidates(query: str) -> List[str]:
+    """
+    The parts of a query that may be a whole identifier: the query itself, quoted strings,
+    compound words and words containing a digit.
+    """
+    candidates = [query]
+    candidates.extend(next(g for g in match.groups() if g) for match in _QUOTED.finditer(query))
+    candidates.extend(_COMPOUND.findall(query.lower()))
+    candidates.extend(_CODE.findall(query.lower()))
+    return list(dict.fromkeys(c for c in map(normalize_exact, candidates) if c))
+
+
+def _metadata_dict(metadata) -> Dict[str, Any]:
+    if isinstance(metadata, str):
+        try:
+            metadata = json.loads(metadata) if metadata else {}
+        except ValueError:
+            return {}
+    return metadata if isinstance(metadata, dict) else {}
+
+
+def rrf_fuse(rankings: Iterable[List[Hashable]], top_k: int, k: int = RRF_K) -> List[Hashable]:
+    """Reciprocal rank fusion of several rankings of keys (best first)."""
+    scores = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)[:top_k]
+
+
+class LexicalIndex:
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self._rows = {}         # key -> row (the columns returned to callers)
+        self._lengths = {}      # key -> number of tokens
+        self._terms = {}        # key -> Counter of its tokens
+        self._postings = {}     # token -> {key: term frequency}
+        self._exact = {}        # normalized identifier -> set of keys
+        self._exact_values = {}  # key -> its normalized identifiers
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, key: Hashable, row: Dict[str, Any], text: Optional[str] = None) -> None:
+        """Adds or replaces a row. row holds the returned columns; its metadata is indexed too."""
+        metadata = _metadata_dict(row.get("metadata"))
+        fields = [text or "", row.get("requirement_id") or "", row.get("document_id") or ""]
+        fields.extend(str(v) for v in metadata.values() if v is not None)
+        terms = Counter(tokenize(" ".join(fields)))
+
+        identifiers = {row.get("requirement_id"), row.get("document_id")}
+        identifiers.update(metadata.get(field) for field in EXACT_METADATA_FIELDS)
+        identifiers = {normalize_exact(str(v)) for v in identifiers if v}
+        identifiers.discard("")
+
+        with self._lock:
+            self._remove(key)
+            self._rows[key] = row
+            self._terms[key] = terms
+            self._lengths[key] = sum(terms.values())
+            self._total_length += self._lengths[key]
+            for token, count in terms.items():
+                self._postings.setdefault(token, {})[key] = count
+            self._exact_values[key] = identifiers
+            for value in identifiers:
+                self._exact.setdefault(value, set()).add(key)
+
+    def remove(self, keys: Iterable[Hashable]) -> None:
+        with self._lock:
+            for key in keys:
+                self._remove(key)
+
+    def remove_where(self, column: str, values: Iterable[Any]) -> None:
+        """Removes the rows whose `column` is one of `values` (e.g. every row of some documents)."""
+        values = set(values)
+        with self._lock:
+            self.remove([key for key, row in self._rows.items() if row.get(column) in values])
+
+    def row(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        return self._rows.get(key)
+
+    def exact(self, query: str) -> List[Hashable]:
+        """Keys of the rows an identifier in the query names exactly, best candidate first."""
+        with self._lock:
+            found = []
+            for candidate in exact_candidates(query):
+                found.extend(sorted(self._exact.get(candidate, ()), key=str))
+            return list(dict.fromkeys(found))
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[Hashable, float]]:
+        """The top_k rows by BM25 score, as (key, score)."""
+        with self._lock:
+            n = len(self._rows)
+            if not n:
+                return []
+            average_length = self._total_length / n or 1.0
+            scores = {}
+            for token in set(tokenize(query)):
+                postings = self._postings.get(token)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[key] / average_length)
+                    scores[key] = scores.get(key, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+            return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+    def _remove(self, key):
+        terms = self._terms.pop(key, None)
+        if terms is None:
+            return
+        del self._rows[key]
+        self._total_length -= self._lengths.pop(key)
+        for token in terms:
+            postings = self._postings[token]
+            del postings[key]
+            if not postings:
+                del self._postings[token]
+        for value in self._exact_values.pop(key):
+            keys = self._exact[value]
+            keys.discard(key)
+            if not keys:
+                del self._exact[value]
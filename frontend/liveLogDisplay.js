@@ -21,6 +21,9 @@ let liveLogEventSource = null;
 let liveLogContainer = null;
 let liveLogHeader = null;
 let liveLogTableBody = null;
+let liveLogChunkInfo = null;
+let liveLogStatsInfo = null;
+let liveLogAlertList = null;
 
 export async function initLiveLogDisplay(pumpIp) {
     // Fetch definitions from backend
@@ -45,6 +48,17 @@ export async function initLiveLogDisplay(pumpIp) {
     liveLogHeader.textContent = `Streaming logs from ${pumpIp}`;
     liveLogContainer.innerHTML = ''; // Clear previous content
 
+    // Chunk, rolling stats and alerts are computed server-side and sent as named events
+    liveLogChunkInfo = document.createElement('div');
+    liveLogChunkInfo.classList.add('live-log-chunk');
+    liveLogStatsInfo = document.createElement('div');
+    liveLogStatsInfo.classList.add('live-log-stats');
+    liveLogAlertList = document.createElement('ul');
+    liveLogAlertList.classList.add('live-log-alerts');
+    liveLogContainer.appendChild(liveLogChunkInfo);
+    liveLogContainer.appendChild(liveLogStatsInfo);
+    liveLogContainer.appendChild(liveLogAlertList);
+
     // Create table header
     const table = document.createElement('table');
     table.classList.add('live-log-table');
@@ -63,7 +77,9 @@ export async function initLiveLogDisplay(pumpIp) {
     table.appendChild(liveLogTableBody);
     liveLogContainer.appendChild(table);
 
-    liveLogEventSource = new EventSource(`http://127.0.0.1:5000/live_power_log/${pumpIp}`);
+    // Streams can be served by the asyncio server (backend/live_asgi.py) instead of Flask
+    const liveLogBaseUrl = window.LIVE_LOG_BASE_URL || 'http://127.0.0.1:5000';
+    liveLogEventSource = new EventSource(`${liveLogBaseUrl}/live_power_log/${pumpIp}`);
 
     liveLogEventSource.onmessage = function(event) {
         const rawLogLine = event.data;
@@ -71,6 +87,15 @@ export async function initLiveLogDisplay(pumpIp) {
         addLogEntryToTable(parsedData);
     };
 
+    liveLogEventSource.addEventListener('chunk', event => showChunk(JSON.parse(event.data)));
+    liveLogEventSource.addEventListener('stats', event => showRollingStats(JSON.parse(event.data)));
+    liveLogEventSource.addEventListener('alert', event => addAlert(JSON.parse(event.data)));
+    // Sent when this client fell too far behind the shared stream and lines were skipped
+    liveLogEventSource.addEventListener('lag', event => {
+        const { dropped } = JSON.parse(event.data);
+        console.warn(`Live log display fell behind; ${dropped} lines skipped.`);
+    });
+
     liveLogEventSource.onerror = function(event) {
         console.error("EventSource failed:", event);
         const errorMsg = document.createElement('div');
@@ -184,6 +209,39 @@ function addLogEntryToTable(data) {
     }
 }
 
+function showChunk(chunk) {
+    if (chunk.state === 'open') {
+        liveLogChunkInfo.textContent = `Chunk since ${chunk.StartDate} ${chunk.StartTime} ` +
+            `(BattPres=${chunk.BattPres}, PowerSrc=${chunk.PowerSrc})`;
+    } else {
+        liveLogChunkInfo.textContent = `Chunk closed: ${chunk.StartTime}–${chunk.EndTime}, ` +
+            `${chunk.Rows} rows (${chunk.TotalTime})`;
+    }
+}
+
+function showRollingStats(stats) {
+    const parts = Object.entries(stats.parameters).map(([name, s]) =>
+        `${name}: min=${s.min} max=${s.max} avg=${s.mean} ${s.unit}`.trim());
+    liveLogStatsInfo.textContent = `Last ${Object.values(stats.parameters)[0]?.rows || 0} rows — ${parts.join(' | ')}`;
+}
+
+function addAlert(alert) {
+    const item = document.createElement('li');
+    const range = `${alert.min ?? '-∞'}–${alert.max ?? '∞'} ${alert.unit}`;
+    if (alert.state === 'raised') {
+        item.textContent = `⚠️ ${alert.time} ${alert.Parameter}=${alert.value} ${alert.unit} out of range (${range})`;
+        item.style.color = 'red';
+    } else {
+        item.textContent = `✅ ${alert.time} ${alert.Parameter} back in range (${alert.value} ${alert.unit})`;
+    }
+    liveLogAlertList.insertBefore(item, liveLogAlertList.firstChild);
+
+    const maxAlerts = 20;
+    while (liveLogAlertList.children.length > maxAlerts) {
+        liveLogAlertList.removeChild(liveLogAlertList.lastChild);
+    }
+}
+
 function decodeBitfield(hexValue, bitfieldDef) {
     const intValue = parseInt(hexValue, 16);
     const decodedMeanings = [];
@@ -348,6 +348,14 @@ Let’s get started!`, 'bot');
         }, 5); // Adjust typing speed here less means more faster....
     }
 
+    // Basic Markdown to HTML conversion
+    function markdownToHtml(text) {
+        let html = text.replace(/\*\*([^\*]+)\*\*/g, '<strong>$1</strong>'); // Bold
+        html = html.replace(/\*([^\*]+)\*/g, '<em>$1</em>'); // Italics
+        html = html.replace(/\n/g, '<br>'); // Newlines
+        return html;
+    }
+
     function appendMessage(text, sender) {
         const messageDiv = document.createElement('div');
         messageDiv.classList.add('chat-message', `${sender}-message`);
@@ -355,10 +363,7 @@ Let’s get started!`, 'bot');
         messageDiv.appendChild(p);
         chatBox.appendChild(messageDiv);
 
-        // Basic Markdown to HTML conversion
-        let html = text.replace(/\*\*([^\*]+)\*\*/g, '<strong>$1</strong>'); // Bold
-        html = html.replace(/\*([^\*]+)\*/g, '<em>$1</em>'); // Italics
-        html = html.replace(/\n/g, '<br>'); // Newlines
+        const html = markdownToHtml(text);
 
         if (sender === 'bot') {
             typeMessage(p, html);
@@ -397,6 +402,22 @@ Let’s get started!`, 'bot');
 
     
 
+    // Polls a background analysis job until it finishes, showing its progress in the loading message.
+    async function waitForJob(jobId, loadingMessage) {
+        while (true) {
+            const response = await fetch(`http://127.0.0.1:5000/jobs/${jobId}`);
+            const job = await response.json();
+            if (!response.ok) throw new Error(job.error || `HTTP error! status: ${response.status}`);
+            if (['completed', 'failed', 'cancelled'].includes(job.status)) return job;
+            if (loadingMessage && job.status === 'running') {
+                loadingMessage.querySelector('p').textContent = job.progress.chunks_analysed
+                    ? `Analysing... ${job.progress.chunks_analysed} of ${job.progress.chunks_emitted} chunks analysed`
+                    : `Analysing... ${job.progress.lines_processed.toLocaleString()} lines, ${job.progress.chunks_emitted} chunks`;
+            }
+            await new Promise(resolve => setTimeout(resolve, 1000));
+        }
+    }
+
     function handlePowerlogFile(file) {
         uploadedPowerlogFile = file;
         appendMessage(`Powerlog file selected: ${uploadedPowerlogFile.name}`, 'user');
@@ -425,15 +446,23 @@ Let’s get started!`, 'bot');
                 body: formData
             });
             const result = await response.json();
-            if (loadingMessage) loadingMessage.remove();
             if (response.ok) {
-                appendMessage('Analysis complete! You can view the summary by clicking the report in the sidebar :)', 'bot');
-                addReportToSidebar(result.issue_name);
+                const job = await waitForJob(result.job_id, loadingMessage);
+                if (loadingMessage) loadingMessage.remove();
+                if (job.status === 'completed') {
+                    appendMessage('Analysis complete! You can view the summary by clicking the report in the sidebar :)', 'bot');
+                    addReportToSidebar(result.issue_name);
+                } else {
+                    appendMessage(`Analysis ${job.status}.`, 'bot');
+                    if (job.error) appendMessage(job.error, 'bot');
+                }
             } else {
+                if (loadingMessage) loadingMessage.remove();
                 appendMessage(`Error: ${result.error}`, 'bot');
                 if (result.details) appendMessage(result.details, 'bot');
             }
         } catch (error) {
+            if (loadingMessage) loadingMessage.remove();
             appendMessage('An unexpected error occurred. Please check the console.', 'bot');
             console.error('Error:', error);
         }
@@ -442,13 +471,83 @@ Let’s get started!`, 'bot');
         uploadedMessageFile = null;
     }
 
+    // Reads the server-sent events of /chat_stream, rendering the answer as its tokens arrive
+    async function renderChatStream(response, loadingMessage) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let answer = '';
+        let reasoning = '';
+        let answerParagraph = null;
+
+        const showAnswer = (text) => {
+            if (!answerParagraph) {
+                if (loadingMessage) loadingMessage.remove();
+                const messageDiv = document.createElement('div');
+                messageDiv.classList.add('chat-message', 'bot-message');
+                answerParagraph = document.createElement('p');
+                messageDiv.appendChild(answerParagraph);
+                chatBox.appendChild(messageDiv);
+            }
+            answerParagraph.innerHTML = markdownToHtml(text);
+            chatBox.scrollTop = chatBox.scrollHeight;
+        };
+
+        const handleEvent = (event, data) => {
+            if (event === 'token') {
+                answer += data.text;
+                showAnswer(answer);
+            } else if (event === 'reasoning' && loadingMessage && !answerParagraph) {
+                // Show the tail of a reasoning model's thinking until its answer starts
+                reasoning += data.text;
+                let preview = loadingMessage.querySelector('.reasoning-preview');
+                if (!preview) {
+                    preview = document.createElement('small');
+                    preview.classList.add('reasoning-preview');
+                    loadingMessage.appendChild(preview);
+                }
+                preview.textContent = reasoning.slice(-200);
+            } else if (event === 'done') {
+                showAnswer(data.response);
+            } else if (event === 'error') {
+                if (loadingMessage) loadingMessage.remove();
+                appendMessage(data.response || `Error: ${data.error}`, 'bot');
+                if (data.details) appendMessage(data.details, 'bot');
+            }
+        };
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const frame = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                let event = 'message';
+                let data = '';
+                for (const line of frame.split('\n')) {
+                    if (line.startsWith('event: ')) event = line.slice(7);
+                    else if (line.startsWith('data: ')) data += line.slice(6);
+                }
+                if (data) handleEvent(event, JSON.parse(data));
+            }
+        }
+        if (loadingMessage) loadingMessage.remove();
+    }
+
     async function sendChatQuery(query, loadingMessage) {
         try {
-            const response = await fetch('http://127.0.0.1:5000/chat', {
+            const response = await fetch('http://127.0.0.1:5000/chat_stream', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({ query: query, session_id: sessionId })
             });
+            // Answers from the assistant are streamed; commands get the same JSON as /chat
+            if (response.ok && (response.headers.get('Content-Type') || '').includes('text/event-stream')) {
+                await renderChatStream(response, loadingMessage);
+                return;
+            }
             const result = await response.json();
             if (loadingMessage) loadingMessage.remove();
 
@@ -460,6 +559,18 @@ Let’s get started!`, 'bot');
                     if (result.report_ready && result.issue_name) {
                         addReportToSidebar(result.issue_name);
                     }
+                    if (result.job_id) {
+                        const jobLoadingMessage = appendLoadingMessage();
+                        const job = await waitForJob(result.job_id, jobLoadingMessage);
+                        jobLoadingMessage.remove();
+                        if (job.status === 'completed') {
+                            appendMessage(job.result.response, 'bot');
+                            addReportToSidebar(job.result.issue_name);
+                        } else {
+                            appendMessage(`Analysis of '${result.issue_name}' ${job.status}.`, 'bot');
+                            if (job.error) appendMessage(job.error, 'bot');
+                        }
+                    }
                 } else if (result.error) {
                     appendMessage(`Error: ${result.error}`, 'bot');
                 } else {